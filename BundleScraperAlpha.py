@@ -1,49 +1,46 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 import json
-import sqlite3
 from datetime import datetime
-import time
 import os
+import argparse
+import scraper_storage
+from bundle_common import (NetworkStats, Readiness, apply_lean_blocking, bundle_driver_pool, scrape_with_worker_pool,
+                           scrape_in_tab_window, create_snapshot_table, record_bundle_snapshots,
+                           deactivate_missing_bundles, bundle_summary, extract_tile_metadata,
+                           add_change_tracking_columns, bundle_content_hash, sync_bundle_contents,
+                           complete_in_browser)
 
 class HumbleBundleScraper:
-    def __init__(self):
-        # Konfiguracja opcji Chrome
-        chrome_options = Options()
+    def __init__(self, workers=1, tabs=4, page_timeout=20, profile="default", backend="browser"):
+        # "browser" - Selenium, "http" - strony pobierane przez aiohttp i parsowane bez Chrome (bundle_http)
+        self.backend = backend
         
-        # Opcje zapewniające, że Chrome pozostanie zminimalizowany
-        chrome_options.add_argument("--start-minimized")
-        chrome_options.add_argument("--window-position=-32000,-32000")  # Przesuń okno poza ekran
+        # WebDriver z puli (trwały profil, podłączanie do działającej przeglądarki, recykling - driver_pool)
+        # Profil "lean" blokuje obrazy, media, fonty i skrypty śledzące
+        self.profile = profile
+        self.driver_pool = bundle_driver_pool(profile=profile) if backend == "browser" else None
+        self.driver = self.driver_pool.acquire() if backend == "browser" else None
         
-        # Opcje wydajnościowe i zapobiegające wyskakiwaniu okien
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-notifications")
-        chrome_options.add_argument("--disable-popup-blocking")
+        # Liczba równoległych przeglądarek dla stron bundli (1 = karty w jednej przeglądarce)
+        self.workers = workers
         
-        # Opcjonalnie możemy użyć trybu headless, ale może to wpłynąć na działanie niektórych stron
-        # chrome_options.add_argument("--headless=new")
+        # Maksymalna liczba kart ładowanych jednocześnie w trybie jednej przeglądarki
+        self.tabs = tabs
         
-        # Inicjalizacja WebDrivera z opcjami
-        self.driver = webdriver.Chrome(options=chrome_options)
+        # Oczekiwanie na gotowość stron (zamiast stałych time.sleep) z pomiarem czasu
+        self.readiness = Readiness(timeout=page_timeout)
         
-        # Ustaw timeout dla operacji WebDrivera
-        self.driver.set_page_load_timeout(30)
-        
-        # Dodatkowe ustawienie rozmiaru okna na minimalny
-        self.driver.set_window_size(1, 1)
-        
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        # Licznik ruchu sieciowego (bajty na stronę, zablokowane żądania)
+        self.network_stats = NetworkStats(profile)
+        self.readiness.network_stats = self.network_stats
         self.db_name = 'humble_bundles.db'
         self.setup_database()
     
     def setup_database(self):
         """Inicjalizacja bazy danych SQLite"""
-        conn = sqlite3.connect(self.db_name)
+        conn = scraper_storage.connect(self.db_name)
         cursor = conn.cursor()
         
         # Tworzenie tabel jeśli nie istnieją
@@ -67,15 +64,15 @@ class HumbleBundleScraper:
         ''')
         
         conn.commit()
-        conn.close()
-    
+
     def save_to_database(self, bundle_data):
+        conn = None
         try:
             print("Zapisuję dane do bazy danych...")
             db_path = os.path.join(os.getcwd(), 'humble_bundles.db')
             print(f"Ścieżka do bazy danych: {db_path}")
             
-            conn = sqlite3.connect(db_path)
+            conn = scraper_storage.connect(db_path)
             cursor = conn.cursor()
             
             # Tworzenie tabel z lepszą strukturą
@@ -87,7 +84,8 @@ class HumbleBundleScraper:
                 url TEXT UNIQUE,
                 date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 bundle_type TEXT,
-                is_active INTEGER DEFAULT 1
+                is_active INTEGER DEFAULT 1,
+                content_hash TEXT
             )
             ''')
             
@@ -115,21 +113,37 @@ class HumbleBundleScraper:
                 cursor.execute("UPDATE bundle_contents SET item_name = content_item WHERE item_name IS NULL")
                 conn.commit()
             
+            # Starsza tabela bundles (z setup_database) nie ma kolumn typu i aktywności
+            cursor.execute("PRAGMA table_info(bundles)")
+            bundle_columns = [column[1] for column in cursor.fetchall()]
+            if 'bundle_type' not in bundle_columns:
+                cursor.execute("ALTER TABLE bundles ADD COLUMN bundle_type TEXT")
+            if 'is_active' not in bundle_columns:
+                cursor.execute("ALTER TABLE bundles ADD COLUMN is_active INTEGER DEFAULT 1")
+            
+            # Skrót zawartości - niezmienione bundle nie są przepisywane
+            add_change_tracking_columns(cursor)
+            
+            # Historia cen i zawartości (migawki tylko do dopisywania)
+            create_snapshot_table(cursor)
+            
             # Dodaj indeksy dla szybszego wyszukiwania
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_bundle_title ON bundles(title)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_bundle_type ON bundles(bundle_type)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_bundle_active ON bundles(is_active)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_bundle_contents ON bundle_contents(bundle_id)")
             
-            # Oznacz wszystkie istniejące bundle jako nieaktywne przed dodaniem nowych
-            cursor.execute("UPDATE bundles SET is_active = 0")
+            # Jeden znacznik czasu dla całego przebiegu (klucz migawek historii)
+            scrape_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            bundles_by_id = {}
+            unchanged = 0
             
             # Dodaj nowe dane
             for bundle in bundle_data:
                 title = bundle.get('title', 'Nieznany Bundle')
                 price = bundle.get('price_range', '€1')
                 url = bundle.get('url', '')
-                contents = bundle.get('contents', [])
+                content_hash = bundle_content_hash(bundle)
                 
                 # Określ typ bundla na podstawie tytułu lub URL
                 bundle_type = 'Inny'
@@ -141,37 +155,45 @@ class HumbleBundleScraper:
                     bundle_type = 'Oprogramowanie'
                 
                 # Sprawdź czy bundle już istnieje
-                cursor.execute("SELECT id FROM bundles WHERE url = ?", (url,))
+                cursor.execute("SELECT id, content_hash, is_active FROM bundles WHERE url = ?", (url,))
                 result = cursor.fetchone()
                 
+                if result and result[1] == content_hash and result[2] == 1:
+                    # Bez zmian od poprzedniego przebiegu - nic do zapisania
+                    unchanged += 1
+                    continue
+                
                 if result:
                     # Bundle istnieje, aktualizuj dane
                     bundle_id = result[0]
                     cursor.execute('''
                     UPDATE bundles 
-                    SET title = ?, price_range = ?, is_active = 1, bundle_type = ?
+                    SET title = ?, price_range = ?, is_active = 1, bundle_type = ?, content_hash = ?
                     WHERE id = ?
-                    ''', (title, price, bundle_type, bundle_id))
-                    
-                    # Usuń starą zawartość
-                    cursor.execute("DELETE FROM bundle_contents WHERE bundle_id = ?", (bundle_id,))
+                    ''', (title, price, bundle_type, content_hash, bundle_id))
                 else:
                     # Dodaj nowy bundle
                     cursor.execute('''
-                    INSERT INTO bundles (title, price_range, url, bundle_type, is_active)
-                    VALUES (?, ?, ?, ?, 1)
-                    ''', (title, price, url, bundle_type))
+                    INSERT INTO bundles (title, price_range, url, bundle_type, is_active, content_hash)
+                    VALUES (?, ?, ?, ?, 1, ?)
+                    ''', (title, price, url, bundle_type, content_hash))
                     bundle_id = cursor.lastrowid
                 
-                # Dodaj zawartość bundla
-                for i, item in enumerate(contents):
-                    cursor.execute('''
-                    INSERT INTO bundle_contents (bundle_id, item_name, item_order)
-                    VALUES (?, ?, ?)
-                    ''', (bundle_id, item, i+1))
+                bundles_by_id[bundle_id] = bundle
+            
+            # Zawartość jako różnica z bazą, bez powtórzeń nazw (indeks unikalny z deduplicate_database)
+            sync_bundle_contents(
+                cursor, {bundle_id: bundle.get('contents', []) for bundle_id, bundle in bundles_by_id.items()})
+            
+            # Nieaktywne stają się tylko bundle, które zniknęły ze strony (bez przepisywania całej tabeli)
+            deactivate_missing_bundles(cursor, [bundle.get('url', '') for bundle in bundle_data])
+            
+            # Historia: nowa migawka tylko dla bundli, które się zmieniły
+            snapshots = record_bundle_snapshots(cursor, bundles_by_id, scrape_time)
             
             conn.commit()
-            print(f"Zapisano {len(bundle_data)} bundli do bazy danych")
+            print(f"Zapisano {len(bundles_by_id)} bundli do bazy danych, bez zmian: {unchanged} "
+                  f"(nowe migawki historii: {snapshots})")
             
             # Wyświetl statystyki
             cursor.execute("SELECT bundle_type, COUNT(*) FROM bundles WHERE is_active = 1 GROUP BY bundle_type")
@@ -180,13 +202,14 @@ class HumbleBundleScraper:
             for bundle_type, count in stats:
                 print(f"- {bundle_type}: {count}")
             
-            conn.close()
             return True
-            
+        
         except Exception as e:
             print(f"Błąd podczas zapisywania do bazy danych: {str(e)}")
             import traceback
             traceback.print_exc()
+            if conn:
+                conn.rollback()  # Połączenie jest współdzielone - nie zostawiaj otwartej transakcji
             return False
     
     def save_to_json(self, bundle_data):
@@ -277,143 +300,162 @@ class HumbleBundleScraper:
             print(f"Błąd podczas pobierania zawartości: {str(e)}")
             return []
 
+    def extract_bundle_info(self, driver):
+        """Pobiera tytuł, cenę i zawartość bundla z otwartej strony"""
+        url = driver.current_url
+        print(f"URL: {url}")
+        
+        # Pobierz tytuł z URL
+        try:
+            bundle_name = url.split('/')[-1].split('?')[0]
+            title = bundle_name.replace('-', ' ').replace('_', ' ').title()
+            print(f"Tytuł: {title}")
+        except:
+            title = "Nieznany tytuł"
+        
+        # Pobierz cenę - NOWA METODA
+        tier_count = 0
+        try:
+            # Szukamy etykiety z ceną
+            price_labels = driver.find_elements(By.CSS_SELECTOR, "label.preset-price")
+            tier_count = len(price_labels)  # Jedna etykieta na próg cenowy
+            if price_labels:
+                # Bierzemy pierwszą (najniższą) cenę
+                price_range = price_labels[0].text.strip()
+                print(f"Znaleziona cena: {price_range}")
+            else:
+                # Alternatywne metody pobierania ceny
+                price_element = driver.find_element(By.CSS_SELECTOR, ".price-info, .fine-print, .price-text")
+                price_range = price_element.text.strip().split('\n')[0]
+                print(f"Alternatywna cena: {price_range}")
+        except Exception as e:
+            print(f"Błąd podczas pobierania ceny: {e}")
+            price_range = "Cena nieznana"
+        
+        # Pobierz zawartość (gry)
+        try:
+            game_titles = WebDriverWait(driver, 10).until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "span.item-title"))
+            )
+            contents = [title.text.strip() for title in game_titles if title.text.strip()]
+            print(f"Znaleziono {len(contents)} elementów")
+        except Exception as e:
+            print(f"Błąd podczas pobierania zawartości: {e}")
+            contents = ["Nie udało się pobrać zawartości"]
+        
+        bundle_info = {
+            'title': title,
+            'price_range': price_range,
+            'tier_count': tier_count,
+            'contents': contents,
+            'url': url
+        }
+        
+        return bundle_info
+
+    def scrape_bundles_http(self):
+        """Scrapowanie bez przeglądarki: lista i strony bundli pobierane równolegle przez HTTP"""
+        from bundle_http import fetch_bundles  # aiohttp potrzebny tylko dla tego backendu
+        
+        try:
+            print("Rozpoczynam scrapowanie (HTTP, bez przeglądarki)...")
+            listing, bundle_data = fetch_bundles(concurrency=max(self.workers, self.tabs))
+            bundle_data = self.complete_in_browser(bundle_data)
+            
+            return self.report_and_save(bundle_data)
+        except Exception as e:
+            print(f"Wystąpił błąd główny: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return [], None, False
+
+    def complete_in_browser(self, bundle_data):
+        """Strony renderowane po stronie klienta (bez progów w HTML) dokańcza w przeglądarkach headless"""
+        return complete_in_browser(
+            bundle_data,
+            self.extract_bundle_info,
+            self.workers,
+            pool=bundle_driver_pool(headless=True, profile=self.profile),
+            network_stats=self.network_stats
+        )
+
+    def report_and_save(self, bundle_data):
+        """Wyświetla zebrane bundle i zapisuje je do JSON oraz bazy danych"""
+        if not bundle_data:
+            print("\nNie znaleziono żadnych bundli!")
+        else:
+            print(f"\nPomyślnie zebrano dane o {len(bundle_data)} bundlach")
+            
+            # Wyświetl zebrane dane
+            print("\nZnalezione bundle:")
+            for bundle in bundle_data:
+                print(f"\nTytuł: {bundle['title']}")
+                print(f"Cena: {bundle['price_range']}")
+                print(f"Liczba elementów: {len(bundle['contents'])}")
+                print("-" * 50)
+        
+        # Zapisz dane do bazy danych i JSON
+        json_path = self.save_to_json(bundle_data)
+        db_success = self.save_to_database(bundle_data)
+        
+        return bundle_data, json_path, db_success
+
     def scrape_bundles(self):
+        if self.backend == "http":
+            return self.scrape_bundles_http()
+        
         try:
             print("Rozpoczynam scrapowanie...")
             self.driver.get('https://www.humblebundle.com/bundles')
             print("Czekam na załadowanie strony...")
-            time.sleep(10)
             
-            # Poczekaj na załadowanie bundli
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".tile-holder"))
-            )
+            # Poczekaj na załadowanie bundli i wyciszenie ruchu sieciowego
+            self.readiness.wait_for(self.driver, "lista bundli", ".tile-holder", network_idle=True)
             
-            bundle_tiles = self.driver.find_elements(By.CSS_SELECTOR, ".tile-holder")
-            print(f"Znaleziono {len(bundle_tiles)} bundli")
+            # Linki wszystkich kafelków jednym wywołaniem WebDrivera
+            tiles = extract_tile_metadata(self.driver)
+            print(f"Znaleziono {len(tiles)} bundli")
             
             # Zbierz wszystkie linki do bundli
-            bundle_links = []
-            for tile in bundle_tiles:
-                try:
-                    link = tile.find_element(By.TAG_NAME, "a")
-                    url = link.get_attribute('href')
-                    bundle_links.append(url)
-                except Exception as e:
-                    print(f"Nie udało się pobrać linku: {e}")
-            
+            bundle_links = [tile['url'] for tile in tiles if tile.get('url')]
+            if len(bundle_links) < len(tiles):
+                print(f"Nie udało się pobrać linku dla {len(tiles) - len(bundle_links)} kafelków")
+
             print(f"Zebrano {len(bundle_links)} linków do bundli")
             
             # Usuń duplikaty
             bundle_links = list(set(bundle_links))
             print(f"Po usunięciu duplikatów: {len(bundle_links)} unikalnych bundli")
             
-            # Otwórz każdy bundle w nowej karcie
-            original_window = self.driver.current_window_handle
-            tabs = [original_window]  # Lista otwartych kart
-            
-            print("Otwieram bundle w nowych kartach...")
-            for i, url in enumerate(bundle_links):
-                # Otwórz nową kartę
-                self.driver.execute_script("window.open('', '_blank');")
-                tabs.append(self.driver.window_handles[-1])
-                self.driver.switch_to.window(tabs[-1])
-                
-                # Przejdź do URL bundle
-                print(f"Otwieram bundle {i+1}/{len(bundle_links)}: {url}")
-                self.driver.get(url)
-                time.sleep(1)  # Krótka pauza między otwieraniem kart
-            
-            # Przełącz z powrotem na pierwszą kartę
-            self.driver.switch_to.window(original_window)
-            
-            # Przetwarzaj każdą kartę po kolei
-            bundle_data = []
-            
-            print("\nPrzetwarzam otwarte karty...")
-            for i, tab in enumerate(tabs[1:], 1):  # Pomijamy pierwszą kartę (strona główna)
-                try:
-                    print(f"\nPrzetwarzam bundle {i}/{len(tabs)-1}")
-                    self.driver.switch_to.window(tab)
-                    
-                    url = self.driver.current_url
-                    print(f"URL: {url}")
-                    
-                    # Pobierz tytuł z URL
-                    try:
-                        bundle_name = url.split('/')[-1].split('?')[0]
-                        title = bundle_name.replace('-', ' ').replace('_', ' ').title()
-                        print(f"Tytuł: {title}")
-                    except:
-                        title = "Nieznany tytuł"
-                    
-                    # Pobierz cenę - NOWA METODA
-                    try:
-                        # Szukamy etykiety z ceną
-                        price_labels = self.driver.find_elements(By.CSS_SELECTOR, "label.preset-price")
-                        if price_labels:
-                            # Bierzemy pierwszą (najniższą) cenę
-                            price_range = price_labels[0].text.strip()
-                            print(f"Znaleziona cena: {price_range}")
-                        else:
-                            # Alternatywne metody pobierania ceny
-                            price_element = self.driver.find_element(By.CSS_SELECTOR, ".price-info, .fine-print, .price-text")
-                            price_range = price_element.text.strip().split('\n')[0]
-                            print(f"Alternatywna cena: {price_range}")
-                    except Exception as e:
-                        print(f"Błąd podczas pobierania ceny: {e}")
-                        price_range = "Cena nieznana"
-                    
-                    # Pobierz zawartość (gry)
-                    try:
-                        game_titles = WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "span.item-title"))
-                        )
-                        contents = [title.text.strip() for title in game_titles if title.text.strip()]
-                        print(f"Znaleziono {len(contents)} elementów")
-                    except Exception as e:
-                        print(f"Błąd podczas pobierania zawartości: {e}")
-                        contents = ["Nie udało się pobrać zawartości"]
-                    
-                    bundle_info = {
-                        'title': title,
-                        'price_range': price_range,
-                        'contents': contents,
-                        'url': url
-                    }
-                    
-                    bundle_data.append(bundle_info)
-                    print(f"Dodano bundle: {title}")
-                    
-                except Exception as e:
-                    print(f"Błąd podczas przetwarzania karty: {str(e)}")
-            
-            # Zamknij wszystkie karty oprócz pierwszej
-            for tab in tabs[1:]:
-                self.driver.switch_to.window(tab)
-                self.driver.close()
-            
-            # Wróć do pierwszej karty
-            self.driver.switch_to.window(original_window)
-            
-            if not bundle_data:
-                print("\nNie znaleziono żadnych bundli!")
+            if self.workers > 1:
+                # Każdy bundle w jednej z {self.workers} niezależnych przeglądarek headless
+                print(f"Przetwarzam bundle w {self.workers} równoległych przeglądarkach...")
+                bundle_data = scrape_with_worker_pool(
+                    bundle_links,
+                    self.extract_bundle_info,
+                    self.workers,
+                    pool=bundle_driver_pool(headless=True, profile=self.profile),
+                    network_stats=self.network_stats
+                )
             else:
-                print(f"\nPomyślnie zebrano dane o {len(bundle_data)} bundlach")
-                
-                # Wyświetl zebrane dane
-                print("\nZnalezione bundle:")
-                for bundle in bundle_data:
-                    print(f"\nTytuł: {bundle['title']}")
-                    print(f"Cena: {bundle['price_range']}")
-                    print(f"Liczba elementów: {len(bundle['contents'])}")
-                    print("-" * 50)
+                # Przesuwne okno co najwyżej {self.tabs} kart ładowanych jednocześnie
+                print(f"Przetwarzam bundle w oknie {self.tabs} kart...")
+                bundle_data = scrape_in_tab_window(
+                    self.driver,
+                    bundle_links,
+                    self.extract_bundle_info,
+                    self.tabs,
+                    timeout=self.readiness.timeout,
+                    readiness=self.readiness,
+                    prepare_tab=apply_lean_blocking if self.profile == "lean" else None
+                )
+                self.driver_pool.page_loaded(self.driver, len(bundle_links) + 1)  # Karty i lista bundli
             
-            # Zapisz dane do bazy danych i JSON
-            json_path = self.save_to_json(bundle_data)
-            db_success = self.save_to_database(bundle_data)
+            print(f"\nCzas oczekiwania na strony: {self.readiness.summary()}")
+            self.network_stats.collect(self.driver)
+            self.network_stats.report()
             
-            return bundle_data, json_path, db_success
+            return self.report_and_save(bundle_data)
             
         except Exception as e:
             print(f"Wystąpił błąd główny: {str(e)}")
@@ -422,7 +464,7 @@ class HumbleBundleScraper:
             return [], None, False
             
         finally:
-            self.driver.quit()
+            self.driver_pool.release(self.driver)
 
     def get_bundle_price(self, driver):
         try:
@@ -451,77 +493,46 @@ class HumbleBundleScraper:
         except:
             return "€1"
 
-    def display_database_summary(self):
-        """Wyświetla podsumowanie zawartości bazy danych w czytelny sposób."""
+    def display_database_summary(self, as_json=False):
+        """Wyświetla podsumowanie zawartości bazy danych w czytelny sposób (albo jako JSON)."""
         try:
-            db_path = os.path.join(os.getcwd(), 'humble_bundles.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
+            summary = bundle_summary(scraper_storage.connect(os.path.join(os.getcwd(), 'humble_bundles.db')).cursor())
             
-            # Pobierz wszystkie aktywne bundle
-            cursor.execute("""
-            SELECT id, title, price_range, bundle_type, date_added 
-            FROM bundles 
-            WHERE is_active = 1
-            ORDER BY bundle_type, title
-            """)
+            if as_json:
+                print(json.dumps(summary, ensure_ascii=False, indent=4))
+                return True
             
-            bundles = cursor.fetchall()
-            
-            if not bundles:
+            if not summary['bundles']:
                 print("Brak aktywnych bundli w bazie danych.")
                 return
             
-            # Statystyki według typu
-            cursor.execute("""
-            SELECT bundle_type, COUNT(*) as count 
-            FROM bundles 
-            WHERE is_active = 1 
-            GROUP BY bundle_type
-            ORDER BY count DESC
-            """)
-            
-            stats = cursor.fetchall()
-            
             print("\n===== PODSUMOWANIE BUNDLI W BAZIE DANYCH =====")
-            print(f"Łączna liczba aktywnych bundli: {len(bundles)}")
+            print(f"Łączna liczba aktywnych bundli: {summary['active_bundles']}")
             print("\nPodział według kategorii:")
-            for bundle_type, count in stats:
+            for bundle_type, count in summary['by_type'].items():
                 print(f"- {bundle_type}: {count} bundli")
             
             # Wyświetl szczegóły każdego bundla
             print("\n===== SZCZEGÓŁY BUNDLI =====")
-            for bundle_id, title, price_range, bundle_type, date_added in bundles:
-                # Pobierz liczbę elementów w bundlu
-                cursor.execute("SELECT COUNT(*) FROM bundle_contents WHERE bundle_id = ?", (bundle_id,))
-                item_count = cursor.fetchone()[0]
-                
-                # Pobierz przykładowe elementy (pierwsze 3)
-                cursor.execute("""
-                SELECT item_name FROM bundle_contents 
-                WHERE bundle_id = ? 
-                ORDER BY item_order 
-                LIMIT 3
-                """, (bundle_id,))
-                
-                sample_items = cursor.fetchall()
-                sample_items = [item[0] for item in sample_items]
+            for bundle in summary['bundles']:
+                item_count = bundle['item_count']
                 
                 # Formatuj wyświetlanie
-                print(f"\n[{bundle_type}] {title}")
-                print(f"Cena: {price_range}")
-                print(f"Dodano: {date_added}")
+                print(f"\n[{bundle['bundle_type']}] {bundle['title']}")
+                print(f"Cena: {bundle['price_range']}")
+                print(f"Dodano: {bundle['date_added']}")
+                if bundle['expiration_date']:
+                    print(f"Wygasa: {bundle['expiration_date']}")
                 print(f"Liczba elementów: {item_count}")
                 print("Przykładowe elementy:")
-                for item in sample_items:
+                for item in bundle['sample_items']:
                     print(f"- {item}")
-                if item_count > 3:
-                    print(f"- ... i {item_count - 3} więcej")
+                if item_count > len(bundle['sample_items']):
+                    print(f"- ... i {item_count - len(bundle['sample_items'])} więcej")
                 print("-" * 50)
             
-            conn.close()
             return True
-            
+        
         except Exception as e:
             print(f"Błąd podczas wyświetlania podsumowania bazy danych: {str(e)}")
             import traceback
@@ -529,7 +540,23 @@ class HumbleBundleScraper:
             return False
 
 def main():
-    scraper = HumbleBundleScraper()
+    parser = argparse.ArgumentParser(description="Scraper bundli Humble Bundle")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="liczba równoległych przeglądarek headless dla stron bundli (domyślnie 1: karty w jednej przeglądarce)")
+    parser.add_argument('--tabs', type=int, default=4,
+                        help="maksymalna liczba kart ładowanych jednocześnie przy --workers 1 (domyślnie 4)")
+    parser.add_argument('--page-timeout', type=int, default=20,
+                        help="maksymalny czas oczekiwania na gotowość strony w sekundach (domyślnie 20)")
+    parser.add_argument('--profile', choices=['default', 'lean'], default='default',
+                        help="'lean' blokuje obrazy, media, fonty i skrypty śledzące oraz używa strategii ładowania eager")
+    parser.add_argument('--backend', choices=['browser', 'http'], default='browser',
+                        help="'http' pobiera strony przez aiohttp i parsuje je bez uruchamiania Chrome")
+    parser.add_argument('--summary', choices=['text', 'json', 'none'], default='text',
+                        help="podsumowanie aktywnych bundli z bazy po zapisie (domyślnie text)")
+    args = parser.parse_args()
+    
+    scraper = HumbleBundleScraper(workers=args.workers, tabs=args.tabs, page_timeout=args.page_timeout,
+                                  profile=args.profile, backend=args.backend)
     bundles, json_filename, db_success = scraper.scrape_bundles()
     
     # Wyświetlenie wyników
@@ -545,6 +572,9 @@ def main():
     
     print(f"\nDane zostały zapisane do bazy SQLite: {scraper.db_name}")
     print(f"Dane zostały zapisane do pliku JSON: {json_filename}")
+    
+    if args.summary != 'none':
+        scraper.display_database_summary(as_json=args.summary == 'json')
 
 if __name__ == "__main__":
     main()
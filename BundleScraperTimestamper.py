@@ -1,43 +1,43 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 import json
-import sqlite3
-from datetime import datetime
 import time
+from datetime import datetime, timedelta
 import os
+import argparse
+import scraper_storage
+from bundle_common import (NetworkStats, Readiness, apply_lean_blocking, bundle_driver_pool, scrape_with_worker_pool,
+                           scrape_in_tab_window, create_snapshot_table, record_bundle_snapshots,
+                           deactivate_missing_bundles, bundle_summary, extract_tile_metadata,
+                           add_change_tracking_columns, bundle_content_hash, sync_bundle_contents,
+                           complete_in_browser, ensure_unique_url_index)
+from bundle_expiration import expiration_changed, format_local, resolve_expiration
 
 class HumbleBundleScraper:
-    def __init__(self):
-        # Konfiguracja opcji Chrome
-        chrome_options = Options()
+    def __init__(self, workers=1, tabs=4, page_timeout=20, profile="default", backend="browser"):
+        # "browser" - Selenium, "http" - strony pobierane przez aiohttp i parsowane bez Chrome (bundle_http)
+        self.backend = backend
         
-        # Opcje zapewniające, że Chrome pozostanie zminimalizowany
-        chrome_options.add_argument("--start-minimized")
-        chrome_options.add_argument("--window-position=-32000,-32000")  # Przesuń okno poza ekran
+        # WebDriver z puli (trwały profil, podłączanie do działającej przeglądarki, recykling - driver_pool)
+        # Profil "lean" blokuje obrazy, media, fonty i skrypty śledzące
+        self.profile = profile
+        self.driver_pool = bundle_driver_pool(profile=profile) if backend == "browser" else None
+        self.driver = self.driver_pool.acquire() if backend == "browser" else None
+        self.http_session = None  # bundle_http.BundleSession w trybie ciągłym z backendem "http"
         
-        # Opcje wydajnościowe i zapobiegające wyskakiwaniu okien
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-notifications")
-        chrome_options.add_argument("--disable-popup-blocking")
+        # Liczba równoległych przeglądarek dla stron bundli (1 = karty w jednej przeglądarce)
+        self.workers = workers
         
-        # Opcjonalnie możemy użyć trybu headless, ale może to wpłynąć na działanie niektórych stron
-        # chrome_options.add_argument("--headless=new")
+        # Maksymalna liczba kart ładowanych jednocześnie w trybie jednej przeglądarki
+        self.tabs = tabs
         
-        # Inicjalizacja WebDrivera z opcjami
-        self.driver = webdriver.Chrome(options=chrome_options)
+        # Oczekiwanie na gotowość stron (zamiast stałych time.sleep) z pomiarem czasu
+        self.readiness = Readiness(timeout=page_timeout)
         
-        # Ustaw timeout dla operacji WebDrivera
-        self.driver.set_page_load_timeout(30)
-        
-        # Dodatkowe ustawienie rozmiaru okna na minimalny
-        self.driver.set_window_size(1, 1)
-        
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        # Licznik ruchu sieciowego (bajty na stronę, zablokowane żądania)
+        self.network_stats = NetworkStats(profile)
+        self.readiness.network_stats = self.network_stats
         self.db_path = os.path.join(os.getcwd(), 'humble_bundles.db')
         self.setup_database()
     
@@ -45,7 +45,7 @@ class HumbleBundleScraper:
         """Inicjalizacja bazy danych SQLite"""
         try:
             print(f"Inicjalizuję bazę danych: {self.db_path}")
-            conn = sqlite3.connect(self.db_path)
+            conn = scraper_storage.connect(self.db_path)
             cursor = conn.cursor()
             
             # Sprawdź czy tabela istnieje
@@ -64,7 +64,11 @@ class HumbleBundleScraper:
                         date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         bundle_type TEXT,
                         is_active INTEGER DEFAULT 1,
-                        expiration_date TEXT
+                        expiration_date TEXT,
+                        expiration_confidence TEXT,
+                        content_hash TEXT,
+                        etag TEXT,
+                        last_modified TEXT
                     )
                 ''')
             else:
@@ -82,6 +86,11 @@ class HumbleBundleScraper:
                 if 'expiration_date' not in columns:
                     cursor.execute("ALTER TABLE bundles ADD COLUMN expiration_date TEXT")
                     print("Dodano kolumnę expiration_date do istniejącej tabeli")
+
+                # Dodaj kolumnę expiration_confidence jeśli nie istnieje
+                if 'expiration_confidence' not in columns:
+                    cursor.execute("ALTER TABLE bundles ADD COLUMN expiration_confidence TEXT")
+                    print("Dodano kolumnę expiration_confidence do istniejącej tabeli")
             
             # Tworzenie tabeli zawartości bundle
             cursor.execute('''
@@ -100,7 +109,6 @@ class HumbleBundleScraper:
             
             # Dodaj indeksy dla istniejących kolumn
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_bundle_title ON bundles(title)")
-            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_bundle_url ON bundles(url)")  # Unikalne URL
             
             if 'bundle_type' in columns:
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_bundle_type ON bundles(bundle_type)")
@@ -110,114 +118,122 @@ class HumbleBundleScraper:
             
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_bundle_contents ON bundle_contents(bundle_id)")
             
-            # Usuń potencjalne duplikaty
-            self.deduplicate_database()
+            # Skrót zawartości i walidatory HTTP do pomijania niezmienionych bundli
+            add_change_tracking_columns(cursor)
+            
+            # Historia cen i zawartości (migawki tylko do dopisywania)
+            create_snapshot_table(cursor)
             
             conn.commit()
+            
+            # Usuń potencjalne duplikaty i załóż indeksy unikalne (URL, element bundla)
+            self.deduplicate_database()
             print("Inicjalizacja bazy danych zakończona pomyślnie")
-            conn.close()
         except Exception as e:
             print(f"Błąd podczas inicjalizacji bazy danych: {str(e)}")
             import traceback
             traceback.print_exc()
     
     def deduplicate_database(self):
-        """Usuwa duplikaty z bazy danych"""
+        """Usuwa duplikaty z bazy danych kilkoma zapytaniami zbiorczymi i zakłada ograniczenia unikalności"""
+        conn = scraper_storage.connect(self.db_path)
         try:
-            conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
+            start = time.perf_counter()
             
             print("Sprawdzam duplikaty w bazie danych...")
+            cursor.execute("BEGIN TRANSACTION")
             
-            # Znajdź duplikaty URL
+            # Mapowanie duplikatów URL na najnowszy rekord (najwyższe id) w jednym zapytaniu okienkowym
+            cursor.execute("DROP TABLE IF EXISTS temp.bundle_remap")
             cursor.execute("""
-            SELECT url, COUNT(*) as count
-            FROM bundles
-            GROUP BY url
-            HAVING COUNT(*) > 1
+            CREATE TEMP TABLE bundle_remap AS
+            SELECT id AS old_id, keep_id
+            FROM (
+                SELECT id, MAX(id) OVER (PARTITION BY url) AS keep_id
+                FROM bundles
+                WHERE url IS NOT NULL
+            )
+            WHERE id != keep_id
             """)
+            cursor.execute("SELECT COUNT(*), COUNT(DISTINCT keep_id) FROM bundle_remap")
+            duplicate_rows, duplicate_urls = cursor.fetchone()
             
-            duplicates = cursor.fetchall()
-            if duplicates:
-                print(f"Znaleziono {len(duplicates)} URL z duplikatami")
+            if duplicate_rows:
+                print(f"Znaleziono {duplicate_urls} URL z duplikatami ({duplicate_rows} nadmiarowych rekordów)")
                 
-                for url, count in duplicates:
-                    print(f"URL {url} ma {count} duplikatów")
-                    
-                    # Znajdź wszystkie rekordy z tym URL
-                    cursor.execute("SELECT id FROM bundles WHERE url = ? ORDER BY id DESC", (url,))
-                    record_ids = [row[0] for row in cursor.fetchall()]
-                    
-                    # Zachowaj najnowszy rekord, usuń pozostałe
-                    keep_id = record_ids[0]
-                    delete_ids = record_ids[1:]
-                    
-                    print(f"Zachowuję rekord ID={keep_id}, usuwam ID: {delete_ids}")
-                    
-                    # Zaktualizuj zawartość bundla - przenieś wszystkie elementy do zachowanego rekordu
-                    for delete_id in delete_ids:
-                        cursor.execute("""
-                        UPDATE bundle_contents 
-                        SET bundle_id = ?
-                        WHERE bundle_id = ?
-                        """, (keep_id, delete_id))
-                        
-                        # Usuń zduplikowany rekord
-                        cursor.execute("DELETE FROM bundles WHERE id = ?", (delete_id,))
-                    
-                print(f"Usunięto duplikaty. Zatwierdzam zmiany...")
-                conn.commit()
+                # Przenieś zawartość i historię do zachowanych rekordów; to, co już tam jest, zostaje
+                for table in ("bundle_contents", "bundle_snapshots"):
+                    cursor.execute(f"""
+                    UPDATE OR IGNORE {table}
+                    SET bundle_id = (SELECT keep_id FROM bundle_remap WHERE old_id = {table}.bundle_id)
+                    WHERE bundle_id IN (SELECT old_id FROM bundle_remap)
+                    """)
+                    cursor.execute(f"DELETE FROM {table} WHERE bundle_id IN (SELECT old_id FROM bundle_remap)")
+                
+                cursor.execute("DELETE FROM bundles WHERE id IN (SELECT old_id FROM bundle_remap)")
+                print("Usunięto duplikaty URL.")
             else:
                 print("Nie znaleziono duplikatów URL w bazie danych.")
+            cursor.execute("DROP TABLE temp.bundle_remap")
             
-            # Sprawdź duplikaty w zawartości bundli
+            # Duplikaty w zawartości bundli - zostaje pierwszy rekord (najniższe id)
             cursor.execute("""
-            SELECT bundle_id, item_name, COUNT(*) as count
-            FROM bundle_contents
-            GROUP BY bundle_id, item_name
-            HAVING COUNT(*) > 1
+            DELETE FROM bundle_contents
+            WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY bundle_id, item_name ORDER BY id) AS row_number
+                    FROM bundle_contents
+                )
+                WHERE row_number > 1
+            )
             """)
-            
-            content_duplicates = cursor.fetchall()
-            if content_duplicates:
-                print(f"Znaleziono {len(content_duplicates)} zduplikowanych elementów w bundle_contents")
-                
-                for bundle_id, item_name, count in content_duplicates:
-                    print(f"Bundle ID={bundle_id}, Element '{item_name}' ma {count} duplikatów")
-                    
-                    # Znajdź wszystkie zduplikowane rekordy
-                    cursor.execute("""
-                    SELECT id FROM bundle_contents 
-                    WHERE bundle_id = ? AND item_name = ?
-                    ORDER BY id
-                    """, (bundle_id, item_name))
-                    
-                    record_ids = [row[0] for row in cursor.fetchall()]
-                    
-                    # Zachowaj pierwszy rekord, usuń pozostałe
-                    keep_id = record_ids[0]
-                    delete_ids = record_ids[1:]
-                    
-                    for delete_id in delete_ids:
-                        cursor.execute("DELETE FROM bundle_contents WHERE id = ?", (delete_id,))
-                
-                print(f"Usunięto duplikaty zawartości. Zatwierdzam zmiany...")
-                conn.commit()
+            if cursor.rowcount:
+                print(f"Usunięto {cursor.rowcount} zduplikowanych elementów w bundle_contents")
             else:
                 print("Nie znaleziono duplikatów w zawartości bundli.")
             
-            conn.close()
+            # Ograniczenia unikalności - nowe duplikaty nie mogą już powstać przy zapisie
+            ensure_unique_url_index(cursor)
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_bundle_contents_item ON bundle_contents(bundle_id, item_name)")
+            
+            conn.commit()
+            print(f"Sprawdzanie duplikatów zakończone w {(time.perf_counter() - start) * 1000:.1f} ms")
             return True
         except Exception as e:
             print(f"Błąd podczas usuwania duplikatów: {str(e)}")
+            conn.rollback()
             return False
 
-    def save_to_database(self, bundle_data):
-        """Zapisuje dane do bazy danych SQLite"""
+    def bundle_type_for(self, title, url):
+        """Określa typ bundla na podstawie tytułu lub URL"""
+        if 'Book Bundle' in title or 'books' in url:
+            return 'Książki'
+        elif 'Game Bundle' in title or 'games' in url:
+            return 'Gry'
+        elif 'Software Bundle' in title or 'software' in url:
+            return 'Oprogramowanie'
+        return 'Inny'
+
+    def save_to_database(self, bundle_data, listed_urls=None):
+        """Zapisuje dane do bazy danych SQLite w jednej transakcji (upsert bundli + różnica zawartości).
+
+        `listed_urls` to wszystkie bundle z listy, gdy zapisywana jest tylko ich część (tryb ciągły);
+        domyślnie nieaktywne stają się bundle spoza bundle_data.
+        """
         if not bundle_data:
             print("Brak danych do zapisania")
             return False
         
+        # Pomijaj duplikaty URL w aktualnym zbiorze danych (pierwszy wygrywa)
+        bundles_by_url = {}
+        for bundle in bundle_data:
+            url = bundle.get('url', '')
+            if url in bundles_by_url:
+                print(f"Pomijam duplikat URL: {url}")
+                continue
+            bundles_by_url[url] = bundle
+        
         max_retries = 3
         retry_count = 0
         
@@ -226,12 +242,8 @@ class HumbleBundleScraper:
             try:
                 print(f"Zapisuję dane do bazy danych: {self.db_path} (próba {retry_count + 1}/{max_retries})")
                 
-                # Upewnij się, że katalog istnieje
-                db_dir = os.path.dirname(self.db_path)
-                if not os.path.exists(db_dir) and db_dir:
-                    os.makedirs(db_dir)
-                
-                conn = sqlite3.connect(self.db_path)
+                # Wspólne połączenie procesu (WAL, busy_timeout) - tworzy też brakujący katalog
+                conn = scraper_storage.connect(self.db_path)
                 cursor = conn.cursor()
                 
                 # Włącz obsługę kluczy obcych
@@ -240,85 +252,83 @@ class HumbleBundleScraper:
                 # Rozpocznij transakcję
                 cursor.execute("BEGIN TRANSACTION")
                 
-                # Najpierw oznacz wszystkie jako nieaktywne
-                cursor.execute("UPDATE bundles SET is_active = 0")
+                # Jeden znacznik czasu dla całego przebiegu (klucz migawek historii)
+                scrape_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 
-                # Lista URL przetworzonych bundli do śledzenia duplikatów
-                processed_urls = set()
+                # Stan z poprzednich przebiegów - niezmienione bundle nie są w ogóle zapisywane
+                cursor.execute('''
+                SELECT url, content_hash, etag, last_modified, expiration_date, expiration_confidence, is_active
+                FROM bundles
+                WHERE url IN (SELECT value FROM json_each(?))
+                ''', (json.dumps(list(bundles_by_url)),))
+                stored = {row[0]: row[1:] for row in cursor.fetchall()}
                 
-                # Dodaj nowe dane
-                for bundle in bundle_data:
-                    title = bundle.get('title', 'Nieznany Bundle')
-                    price = bundle.get('price_range', '€1')
-                    url = bundle.get('url', '')
-                    contents = bundle.get('contents', [])
-                    expiration_date = bundle.get('expiration_date')
+                # Upsert bundli - jedno zapytanie na bundle zamiast SELECT + INSERT/UPDATE
+                bundles_by_id = {}
+                metadata_updates = []
+                unchanged = 0
+                for url, bundle in bundles_by_url.items():
+                    content_hash = bundle.get('content_hash') or bundle_content_hash(bundle)
+                    etag, last_modified = bundle.get('etag'), bundle.get('last_modified')
+                    expiration_date, confidence = bundle.get('expiration_date'), bundle.get('expiration_confidence')
                     
-                    # Pomijaj duplikaty URL w aktualnym zbiorze danych
-                    if url in processed_urls:
-                        print(f"Pomijam duplikat URL: {url}")
+                    previous = stored.get(url)
+                    if previous is not None and previous[0] == content_hash:
+                        old_hash, old_etag, old_last_modified, old_expiration, old_confidence, is_active = previous
+                        if (is_active and (old_etag, old_last_modified, old_confidence) == (etag, last_modified, confidence)
+                                and not expiration_changed(old_expiration, expiration_date, confidence)):
+                            unchanged += 1
+                        else:
+                            # Ta sama zawartość - tylko metadane, bez zawartości i migawki
+                            metadata_updates.append((etag, last_modified, expiration_date, confidence, url))
                         continue
                     
-                    processed_urls.add(url)
-                    
-                    # Określ typ bundla na podstawie tytułu lub URL
-                    bundle_type = 'Inny'
-                    if 'Book Bundle' in title or 'books' in url:
-                        bundle_type = 'Książki'
-                    elif 'Game Bundle' in title or 'games' in url:
-                        bundle_type = 'Gry'
-                    elif 'Software Bundle' in title or 'software' in url:
-                        bundle_type = 'Oprogramowanie'
-                    
-                    # Sprawdź czy bundle już istnieje
-                    cursor.execute("SELECT id FROM bundles WHERE url = ?", (url,))
-                    result = cursor.fetchone()
-                    
-                    if result:
-                        # Bundle istnieje, aktualizuj dane
-                        bundle_id = result[0]
-                        cursor.execute('''
-                        UPDATE bundles 
-                        SET title = ?, price_range = ?, is_active = 1, bundle_type = ?, expiration_date = ?
-                        WHERE id = ?
-                        ''', (title, price, bundle_type, expiration_date, bundle_id))
-                    else:
-                        # Dodaj nowy bundle
-                        cursor.execute('''
-                        INSERT INTO bundles (title, price_range, url, bundle_type, is_active, expiration_date)
-                        VALUES (?, ?, ?, ?, 1, ?)
-                        ''', (title, price, url, bundle_type, expiration_date))
-                        bundle_id = cursor.lastrowid
-                    
-                    # Dodaj zawartość bundla
-                    for i, item in enumerate(contents):
-                        cursor.execute('''
-                        INSERT INTO bundle_contents (bundle_id, item_name, item_order)
-                        VALUES (?, ?, ?)
-                        ''', (bundle_id, item, i+1))
+                    title = bundle.get('title', 'Nieznany Bundle')
+                    price = bundle.get('price_range', '€1')
+                    cursor.execute('''
+                    INSERT INTO bundles (title, price_range, url, bundle_type, is_active, expiration_date,
+                                         expiration_confidence, content_hash, etag, last_modified)
+                    VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        title = excluded.title,
+                        price_range = excluded.price_range,
+                        bundle_type = excluded.bundle_type,
+                        is_active = 1,
+                        expiration_date = excluded.expiration_date,
+                        expiration_confidence = excluded.expiration_confidence,
+                        content_hash = excluded.content_hash,
+                        etag = excluded.etag,
+                        last_modified = excluded.last_modified
+                    RETURNING id
+                    ''', (title, price, url, self.bundle_type_for(title, url), expiration_date, confidence,
+                          content_hash, etag, last_modified))
+                    bundles_by_id[cursor.fetchone()[0]] = bundle
+                
+                cursor.executemany('''
+                UPDATE bundles
+                SET is_active = 1, etag = ?, last_modified = ?, expiration_date = ?, expiration_confidence = ?
+                WHERE url = ?
+                ''', metadata_updates)
+                
+                inserted, reordered, deleted = sync_bundle_contents(
+                    cursor, {bundle_id: bundle.get('contents', []) for bundle_id, bundle in bundles_by_id.items()})
+                
+                # Nieaktywne stają się tylko bundle, które zniknęły ze strony (bez przepisywania całej tabeli)
+                deactivated = deactivate_missing_bundles(
+                    cursor, bundles_by_url if listed_urls is None else listed_urls)
+                
+                # Historia: nowa migawka tylko dla bundli, które się zmieniły
+                snapshots = record_bundle_snapshots(cursor, bundles_by_id, scrape_time)
                 
                 # Zatwierdź zmiany
                 conn.commit()
-                print("Zapisywanie zakończone pomyślnie")
-                
-                # Usuń potencjalne duplikaty
-                self.deduplicate_database()
+                print(f"Zapisywanie zakończone pomyślnie ({len(bundles_by_id)} zmienionych bundli, "
+                      f"{len(metadata_updates)} tylko metadane, {unchanged} bez zmian; elementy: "
+                      f"+{inserted} nowych, {reordered} zmian kolejności, -{deleted} usuniętych)")
+                print(f"Nowe migawki historii: {snapshots}, wygasłe bundle: {deactivated}")
                 
                 return True
             
-            except sqlite3.IntegrityError as e:
-                if "UNIQUE constraint failed: bundles.url" in str(e):
-                    print(f"Błąd duplikatu URL: {str(e)}")
-                    print("Próba naprawy duplikatów...")
-                    
-                    # Spróbuj naprawić duplikaty i kontynuuj
-                    self.deduplicate_database()
-                    retry_count += 1
-                    continue
-                else:
-                    print(f"Błąd integralności bazy danych: {str(e)}")
-                    retry_count += 1
-            
             except Exception as e:
                 print(f"BŁĄD podczas zapisywania do bazy danych: {str(e)}")
                 import traceback
@@ -335,17 +345,8 @@ class HumbleBundleScraper:
                 # Spróbuj ponownie
                 retry_count += 1
                 print(f"Ponawiam próbę zapisu ({retry_count}/{max_retries})...")
-                time.sleep(1)  # Odczekaj chwilę przed ponowną próbą
-            
-            finally:
-                # Upewnij się, że połączenie zostanie zamknięte
-                if conn:
-                    try:
-                        conn.close()
-                        print("Połączenie z bazą danych zostało zamknięte")
-                    except:
-                        print("Nie udało się zamknąć połączenia z bazą danych")
-        
+                self.readiness.pause(1, "ponowienie zapisu do bazy")  # Odczekaj chwilę przed ponowną próbą
+
         # Jeśli wszystkie próby zakończyły się niepowodzeniem
         if retry_count >= max_retries:
             print(f"⚠️ Wszystkie {max_retries} prób zapisu do bazy danych zakończyły się niepowodzeniem.")
@@ -355,44 +356,68 @@ class HumbleBundleScraper:
         return False
 
     def verify_database_consistency(self, bundle_data):
-        """Sprawdza czy dane w bazie danych są zgodne z danymi JSON"""
+        """Porównuje zebrane bundle z bazą jednym zapytaniem (tabela tymczasowa + złączenia).
+        
+        Zwraca słownik z listami: missing (brak w bazie), inactive (w bazie, ale nieaktywne),
+        content_mismatches (inna liczba elementów), stale_active (aktywne w bazie, a nie na stronie)
+        oraz polem consistent.
+        """
+        diff = {'missing': [], 'inactive': [], 'content_mismatches': [], 'stale_active': [], 'consistent': False}
+        conn = scraper_storage.connect(self.db_path)
         try:
-            conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
+            cursor.execute("BEGIN")  # Tylko odczyt - transakcja jest na końcu wycofywana razem z tabelą tymczasową
+            cursor.execute("CREATE TEMP TABLE scraped_bundles (url TEXT PRIMARY KEY, item_count INTEGER)")
+            # Zapis pomija powtórzone elementy, więc porównujemy liczbę unikalnych pozycji
+            cursor.executemany("INSERT OR REPLACE INTO temp.scraped_bundles (url, item_count) VALUES (?, ?)",
+                               [(bundle.get('url', ''), len(dict.fromkeys(bundle.get('contents', []))))
+                                for bundle in bundle_data])
             
-            # Sprawdź czy liczba bundli się zgadza
-            cursor.execute("SELECT COUNT(*) FROM bundles WHERE is_active = 1")
-            db_bundle_count = cursor.fetchone()[0]
-            if db_bundle_count != len(bundle_data):
-                print(f"Niezgodność: W bazie danych jest {db_bundle_count} bundli, a w danych JSON {len(bundle_data)}")
-                return False
+            cursor.execute("""
+            WITH content_counts AS (
+                SELECT b.url, b.is_active, COUNT(c.id) AS db_count
+                FROM temp.scraped_bundles s
+                JOIN bundles b ON b.url = s.url
+                LEFT JOIN bundle_contents c ON c.bundle_id = b.id
+                GROUP BY b.id
+            )
+            SELECT 'missing', s.url, NULL, s.item_count
+            FROM temp.scraped_bundles s
+            LEFT JOIN bundles b ON b.url = s.url
+            WHERE b.id IS NULL
+            UNION ALL
+            SELECT 'inactive', url, NULL, NULL FROM content_counts WHERE is_active = 0
+            UNION ALL
+            SELECT 'content_mismatches', c.url, c.db_count, s.item_count
+            FROM content_counts c
+            JOIN temp.scraped_bundles s ON s.url = c.url
+            WHERE c.db_count != s.item_count
+            UNION ALL
+            SELECT 'stale_active', b.url, NULL, NULL
+            FROM bundles b
+            WHERE b.is_active = 1 AND NOT EXISTS (SELECT 1 FROM temp.scraped_bundles s WHERE s.url = b.url)
+            """)
+            for kind, url, db_count, scraped_count in cursor.fetchall():
+                if kind == 'content_mismatches':
+                    diff[kind].append({'url': url, 'db_count': db_count, 'scraped_count': scraped_count})
+                else:
+                    diff[kind].append(url)
             
-            # Sprawdź zawartość każdego bundla
-            for bundle in bundle_data:
-                url = bundle.get('url', '')
-                contents = bundle.get('contents', [])
-                
-                # Znajdź bundle w bazie danych
-                cursor.execute("SELECT id FROM bundles WHERE url = ? AND is_active = 1", (url,))
-                result = cursor.fetchone()
-                if not result:
-                    print(f"Niezgodność: Bundle z URL {url} nie został znaleziony w bazie danych")
-                    return False
-                
-                bundle_id = result[0]
-                
-                # Sprawdź liczbę elementów w bundlu
-                cursor.execute("SELECT COUNT(*) FROM bundle_contents WHERE bundle_id = ?", (bundle_id,))
-                db_content_count = cursor.fetchone()[0]
-                if db_content_count != len(contents):
-                    print(f"Niezgodność: Bundle {url} ma {db_content_count} elementów w bazie danych, a {len(contents)} w danych JSON")
-                    return False
-            
-            conn.close()
-            return True
+            diff['consistent'] = not any(diff[kind] for kind in ('missing', 'inactive', 'content_mismatches', 'stale_active'))
+            if diff['consistent']:
+                print(f"Baza danych zgodna z zebranymi danymi ({len(bundle_data)} bundli)")
+            else:
+                print(f"Niezgodności: brak w bazie {len(diff['missing'])}, nieaktywne {len(diff['inactive'])}, "
+                      f"inna liczba elementów {len(diff['content_mismatches'])}, "
+                      f"nieaktualnie aktywne {len(diff['stale_active'])}")
+                for mismatch in diff['content_mismatches']:
+                    print(f"- {mismatch['url']}: {mismatch['db_count']} elementów w bazie, {mismatch['scraped_count']} na stronie")
+            return diff
         except Exception as e:
             print(f"Błąd podczas weryfikacji bazy danych: {str(e)}")
-            return False
+            return diff
+        finally:
+            conn.rollback()
 
     def save_to_emergency_file(self, bundle_data):
         """Zapisuje dane do pliku awaryjnego w przypadku problemów z bazą danych"""
@@ -504,239 +529,426 @@ class HumbleBundleScraper:
             print(f"Błąd podczas pobierania zawartości: {str(e)}")
             return []
 
-    def scrape_bundles(self):
+    def extract_bundle_info(self, driver, expirations=None):
+        """Pobiera tytuł, cenę i zawartość bundla z otwartej strony"""
+        url = driver.current_url
+        print(f"URL: {url}")
+        
+        # Pobierz tytuł z URL
         try:
-            print("Rozpoczynam scrapowanie...")
-            self.driver.get('https://www.humblebundle.com/bundles')
-            print("Czekam na załadowanie strony...")
-            time.sleep(10)
-            
-            # Poczekaj na załadowanie bundli
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".tile-holder"))
+            bundle_name = url.split('/')[-1].split('?')[0]
+            title = bundle_name.replace('-', ' ').replace('_', ' ').title()
+            print(f"Tytuł: {title}")
+        except:
+            title = "Nieznany tytuł"
+        
+        # Pobierz cenę - NOWA METODA
+        tier_count = 0
+        try:
+            # Szukamy etykiety z ceną
+            price_labels = driver.find_elements(By.CSS_SELECTOR, "label.preset-price")
+            tier_count = len(price_labels)  # Jedna etykieta na próg cenowy
+            if price_labels:
+                # Bierzemy pierwszą (najniższą) cenę
+                price_range = price_labels[0].text.strip()
+                print(f"Znaleziona cena: {price_range}")
+            else:
+                # Alternatywne metody pobierania ceny
+                price_element = driver.find_element(By.CSS_SELECTOR, ".price-info, .fine-print, .price-text")
+                price_range = price_element.text.strip().split('\n')[0]
+                print(f"Alternatywna cena: {price_range}")
+        except Exception as e:
+            print(f"Błąd podczas pobierania ceny: {e}")
+            price_range = "Cena nieznana"
+        
+        # Pobierz zawartość (gry)
+        try:
+            game_titles = WebDriverWait(driver, 10).until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "span.item-title"))
             )
+            contents = [title.text.strip() for title in game_titles if title.text.strip()]
+            print(f"Znaleziono {len(contents)} elementów")
+        except Exception as e:
+            print(f"Błąd podczas pobierania zawartości: {e}")
+            contents = ["Nie udało się pobrać zawartości"]
+        
+        bundle_info = {
+            'title': title,
+            'price_range': price_range,
+            'tier_count': tier_count,
+            'contents': contents,
+            'url': url
+        }
+        
+        # Data wygaśnięcia odczytana wcześniej z kafelka listy (Expiration z bundle_expiration)
+        return self.apply_expiration(bundle_info, expirations)
+
+    def scrape_bundles_http(self):
+        """Scrapowanie bez przeglądarki: lista i strony bundli pobierane równolegle przez HTTP"""
+        from bundle_http import fetch_bundles  # aiohttp potrzebny tylko dla tego backendu
+        
+        try:
+            print("Rozpoczynam scrapowanie (HTTP, bez przeglądarki)...")
+            scrape_start = datetime.now().astimezone()
+            listing, bundle_data = fetch_bundles(concurrency=max(self.workers, self.tabs),
+                                                 validators=self.stored_validators())
+            bundle_data = self.restore_unchanged_bundles(self.complete_in_browser(bundle_data))
             
-            bundle_tiles = self.driver.find_elements(By.CSS_SELECTOR, ".tile-holder")
-            print(f"Znaleziono {len(bundle_tiles)} bundli")
-            
-            # Zbierz wszystkie linki do bundli
-            bundle_links = []
-            expiration_dates = {}  # Słownik do przechowywania dat wygaśnięcia
-            
-            # Najpierw zbierz wszystkie linki i daty wygaśnięcia na stronie głównej
-            for tile in bundle_tiles:
-                try:
-                    link = tile.find_element(By.TAG_NAME, "a")
-                    url = link.get_attribute('href')
-                    
-                    # Pobierz datę wygaśnięcia
-                    try:
-                        # Próbuj różnych selektorów do znalezienia licznika
-                        countdown_selectors = [
-                            ".js-countdown-timer", 
-                            ".timer-wrapper",
-                            ".js-countdown-timer.is-hidden",
-                            "[aria-label*='days']"
-                        ]
-                        
-                        countdown_element = None
-                        for selector in countdown_selectors:
-                            try:
-                                elements = tile.find_elements(By.CSS_SELECTOR, selector)
-                                if elements:
-                                    countdown_element = elements[0]
-                                    break
-                            except:
-                                continue
-                        
-                        if countdown_element:
-                            # Podejście 1: Pobieranie z elementów span
-                            try:
-                                days_element = countdown_element.find_element(By.CSS_SELECTOR, ".js-days")
-                                hours_element = countdown_element.find_element(By.CSS_SELECTOR, ".js-hours")
-                                minutes_element = countdown_element.find_element(By.CSS_SELECTOR, ".js-minutes")
-                                
-                                days_text = days_element.text
-                                hours_text = hours_element.text
-                                minutes_text = minutes_element.text
-                                
-                                # Wyczyść tekst i wyodrębnij liczby
-                                days = int(days_text.replace("Days Left", "").replace("Day Left", "").strip()) if "Day" in days_text else 0
-                                hours = int(hours_text.strip())
-                                minutes = int(minutes_text.strip())
-                            except Exception as e:
-                                print(f"Nie udało się pobrać czasu metodą spans: {e}")
-                                
-                                # Podejście 2: Pobieranie z atrybutu aria-label
-                                try:
-                                    aria_label = countdown_element.get_attribute("aria-label")
-                                    if aria_label:
-                                        print(f"Znaleziono aria-label: {aria_label}")
-                                        # Przetwarzanie tekstu aria-label
-                                        # Format: "X days, Y hours, Z minutes, and W seconds left"
-                                        parts = aria_label.split(",")
-                                        
-                                        days = 0
-                                        hours = 0
-                                        minutes = 0
-                                        
-                                        for part in parts:
-                                            part = part.strip().lower()
-                                            if "day" in part:
-                                                days = int(part.split()[0])
-                                            elif "hour" in part:
-                                                hours = int(part.split()[0])
-                                            elif "minute" in part and "and" not in part:
-                                                minutes = int(part.split()[0])
-                                except Exception as ex:
-                                    print(f"Nie udało się pobrać czasu z aria-label: {ex}")
-                                    # Ustawmy domyślne wartości
-                                    days = 14  # Typowy czas trwania bundla
-                                    hours = 0
-                                    minutes = 0
-                            
-                            # Oblicz datę wygaśnięcia na podstawie obecnej daty
-                            from datetime import datetime, timedelta
-                            expiration_date = datetime.now() + timedelta(days=days, hours=hours, minutes=minutes)
-                            expiration_date_str = expiration_date.strftime('%Y-%m-%d %H:%M:%S')
-                            
-                            expiration_dates[url] = expiration_date_str
-                            print(f"Bundle {url} wygasa: {expiration_date_str} (za {days}d {hours}h {minutes}m)")
-                        else:
-                            print(f"Nie znaleziono elementu odliczania dla {url}")
-                            expiration_dates[url] = None
-                    except Exception as e:
-                        print(f"Nie udało się pobrać daty wygaśnięcia dla {url}: {e}")
-                        expiration_dates[url] = None
-                    
-                    bundle_links.append(url)
-                except Exception as e:
-                    print(f"Nie udało się pobrać linku: {e}")
-            
-            print(f"Zebrano {len(bundle_links)} linków do bundli")
-            
-            # Usuń duplikaty
-            bundle_links = list(set(bundle_links))
-            print(f"Po usunięciu duplikatów: {len(bundle_links)} unikalnych bundli")
-            
-            # Otwórz każdy bundle w nowej karcie
-            original_window = self.driver.current_window_handle
-            tabs = [original_window]  # Lista otwartych kart
-            
-            print("Otwieram bundle w nowych kartach...")
-            for i, url in enumerate(bundle_links):
-                # Otwórz nową kartę
-                self.driver.execute_script("window.open('', '_blank');")
-                tabs.append(self.driver.window_handles[-1])
-                self.driver.switch_to.window(tabs[-1])
-                
-                # Przejdź do URL bundle
-                print(f"Otwieram bundle {i+1}/{len(bundle_links)}: {url}")
-                self.driver.get(url)
-                time.sleep(1)  # Krótka pauza między otwieraniem kart
-            
-            # Przełącz z powrotem na pierwszą kartę
-            self.driver.switch_to.window(original_window)
-            
-            # Przetwarzaj każdą kartę po kolei
-            bundle_data = []
-            
-            print("\nPrzetwarzam otwarte karty...")
-            for i, tab in enumerate(tabs[1:], 1):  # Pomijamy pierwszą kartę (strona główna)
-                try:
-                    print(f"\nPrzetwarzam bundle {i}/{len(tabs)-1}")
-                    self.driver.switch_to.window(tab)
-                    
-                    url = self.driver.current_url
-                    print(f"URL: {url}")
-                    
-                    # Pobierz tytuł z URL
-                    try:
-                        bundle_name = url.split('/')[-1].split('?')[0]
-                        title = bundle_name.replace('-', ' ').replace('_', ' ').title()
-                        print(f"Tytuł: {title}")
-                    except:
-                        title = "Nieznany tytuł"
-                    
-                    # Pobierz cenę - NOWA METODA
-                    try:
-                        # Szukamy etykiety z ceną
-                        price_labels = self.driver.find_elements(By.CSS_SELECTOR, "label.preset-price")
-                        if price_labels:
-                            # Bierzemy pierwszą (najniższą) cenę
-                            price_range = price_labels[0].text.strip()
-                            print(f"Znaleziona cena: {price_range}")
-                        else:
-                            # Alternatywne metody pobierania ceny
-                            price_element = self.driver.find_element(By.CSS_SELECTOR, ".price-info, .fine-print, .price-text")
-                            price_range = price_element.text.strip().split('\n')[0]
-                            print(f"Alternatywna cena: {price_range}")
-                    except Exception as e:
-                        print(f"Błąd podczas pobierania ceny: {e}")
-                        price_range = "Cena nieznana"
-                    
-                    # Pobierz zawartość (gry)
-                    try:
-                        game_titles = WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "span.item-title"))
-                        )
-                        contents = [title.text.strip() for title in game_titles if title.text.strip()]
-                        print(f"Znaleziono {len(contents)} elementów")
-                    except Exception as e:
-                        print(f"Błąd podczas pobierania zawartości: {e}")
-                        contents = ["Nie udało się pobrać zawartości"]
-                    
-                    bundle_info = {
-                        'title': title,
-                        'price_range': price_range,
-                        'contents': contents,
-                        'url': url,
-                        'expiration_date': expiration_dates.get(url)
-                    }
-                    
-                    bundle_data.append(bundle_info)
-                    print(f"Dodano bundle: {title}")
-                    if expiration_dates.get(url):
-                        print(f"Data wygaśnięcia: {expiration_dates.get(url)}")
-                    
-                except Exception as e:
-                    print(f"Błąd podczas przetwarzania karty: {str(e)}")
+            # Daty wygaśnięcia z kafelków listy (licznik, atrybut końca albo osadzony JSON)
+            expirations = self.listing_expirations(listing, scrape_start)
+            for bundle_info in bundle_data:
+                self.apply_expiration(bundle_info, expirations)
             
-            # Zamknij wszystkie karty oprócz pierwszej
-            for tab in tabs[1:]:
-                self.driver.switch_to.window(tab)
-                self.driver.close()
+            return self.report_and_save(bundle_data)
+        except Exception as e:
+            print(f"Wystąpił błąd główny: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return [], None, False
+
+    def complete_in_browser(self, bundle_data):
+        """Strony renderowane po stronie klienta (bez progów w HTML) dokańcza w przeglądarkach headless"""
+        return complete_in_browser(
+            bundle_data,
+            self.extract_bundle_info,
+            self.workers,
+            pool=bundle_driver_pool(headless=True, profile=self.profile),
+            network_stats=self.network_stats
+        )
+
+    def stored_validators(self):
+        """{url: (etag, last_modified)} zapisanych bundli - do żądań warunkowych backendu HTTP"""
+        cursor = scraper_storage.connect(self.db_path).cursor()
+        cursor.execute('''
+            SELECT url, etag, last_modified FROM bundles
+            WHERE content_hash IS NOT NULL AND (etag IS NOT NULL OR last_modified IS NOT NULL)
+        ''')
+        return {url: (etag, last_modified) for url, etag, last_modified in cursor.fetchall()}
+
+    def restore_unchanged_bundles(self, bundle_data):
+        """Uzupełnia z bazy bundle, których strony się nie zmieniły (odpowiedź 304).
+
+        Jedno zapytanie odczytuje tytuł, cenę, zawartość, liczbę progów (z ostatniej migawki)
+        i skrót, więc zapis rozpozna je jako niezmienione.
+        """
+        urls = [bundle_info['url'] for bundle_info in bundle_data if bundle_info.get('not_modified')]
+        if not urls:
+            return bundle_data
+        
+        cursor = scraper_storage.connect(self.db_path).cursor()
+        cursor.execute('''
+            SELECT b.url, b.title, b.price_range, b.content_hash, b.etag, b.last_modified,
+                   (SELECT tier_count FROM bundle_snapshots s
+                    WHERE s.bundle_id = b.id ORDER BY s.scrape_time DESC LIMIT 1),
+                   (SELECT json_group_array(item_name) FROM (
+                        SELECT item_name FROM bundle_contents c WHERE c.bundle_id = b.id ORDER BY c.item_order))
+            FROM bundles b
+            WHERE b.url IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(urls),))
+        stored = {row[0]: row[1:] for row in cursor.fetchall()}
+        
+        restored = []
+        for bundle_info in bundle_data:
+            if bundle_info.get('not_modified'):
+                if bundle_info['url'] not in stored:
+                    print(f"Brak w bazie danych strony bez zmian: {bundle_info['url']}")
+                    continue
+                title, price_range, content_hash, etag, last_modified, tier_count, contents = stored[bundle_info['url']]
+                bundle_info.update({
+                    'title': title,
+                    'price_range': price_range,
+                    'tier_count': tier_count,
+                    'contents': json.loads(contents),
+                    'content_hash': content_hash,
+                    # 304 nie musi powtarzać walidatorów - wtedy zostają zapisane
+                    'etag': bundle_info.get('etag') or etag,
+                    'last_modified': bundle_info.get('last_modified') or last_modified
+                })
+            restored.append(bundle_info)
+        return restored
+
+    def listing_expirations(self, listing, scrape_start=None):
+        """[(url, metadane kafelka)] z listy HTTP -> {url: Expiration} tym samym resolve_expiration co w przeglądarce"""
+        # Wszystkie liczniki odnoszą się do tej samej chwili - pobrania listy
+        scrape_start = scrape_start or datetime.now().astimezone()
+        expirations = {}
+        for url, tile in listing:
+            expirations[url] = resolve_expiration(tile, scrape_start)
+            if expirations[url].expires_at is None:
+                print(f"Brak daty wygaśnięcia dla {url}: {expirations[url].note}")
+        return expirations
+
+    def apply_expiration(self, bundle_info, expirations):
+        """Uzupełnia bundle_info o datę wygaśnięcia i jej pewność odczytane wcześniej z listy"""
+        expiration = (expirations or {}).get(bundle_info['url'])
+        if expiration is not None:
+            bundle_info['expiration_date'] = format_local(expiration.expires_at)
+            bundle_info['expiration_confidence'] = expiration.confidence
+        else:
+            bundle_info.setdefault('expiration_date', None)
+            bundle_info.setdefault('expiration_confidence', None)
+        return bundle_info
+
+    def report_and_save(self, bundle_data):
+        """Wyświetla zebrane bundle i zapisuje je do JSON oraz bazy danych"""
+        if not bundle_data:
+            print("\nNie znaleziono żadnych bundli!")
+        else:
+            print(f"\nPomyślnie zebrano dane o {len(bundle_data)} bundlach")
             
-            # Wróć do pierwszej karty
-            self.driver.switch_to.window(original_window)
+            # Wyświetl zebrane dane
+            print("\nZnalezione bundle:")
+            for bundle in bundle_data:
+                print(f"\nTytuł: {bundle['title']}")
+                print(f"Cena: {bundle['price_range']}")
+                print(f"Liczba elementów: {len(bundle['contents'])}")
+                print("-" * 50)
+        
+        # Zapisz dane do bazy danych i JSON
+        json_path = self.save_to_json(bundle_data)
+        db_success = self.save_to_database(bundle_data)
+        if db_success:
+            self.verify_database_consistency(bundle_data)
+        
+        return bundle_data, json_path, db_success
+
+    def read_listing(self):
+        """Odczytuje listę /bundles; zwraca {url: Expiration} w kolejności strony, bez duplikatów"""
+        if self.backend == "http":
+            return self.listing_expirations(self.http_session.fetch_listing())
+        
+        self.driver.get('https://www.humblebundle.com/bundles')
+        self.driver_pool.page_loaded(self.driver)
+        print("Czekam na załadowanie strony...")
+        
+        # Poczekaj na załadowanie bundli i wyciszenie ruchu sieciowego
+        self.readiness.wait_for(self.driver, "lista bundli", ".tile-holder", network_idle=True)
+        
+        # Metadane wszystkich kafelków jednym wywołaniem; liczniki są parsowane lokalnie
+        tiles_start = time.perf_counter()
+        tiles = extract_tile_metadata(self.driver)
+        # Wszystkie liczniki odnoszą się do tej samej chwili - odczytu listy
+        scrape_start = datetime.now().astimezone()
+        print(f"Znaleziono {len(tiles)} bundli")
+        
+        expirations = {}  # URL -> Expiration (data wygaśnięcia, źródło, pewność)
+        low_confidence = 0
+        
+        # Zbierz wszystkie linki i daty wygaśnięcia na stronie głównej
+        for tile in tiles:
+            url = tile.get('url')
+            if not url:
+                print("Nie udało się pobrać linku: kafelek bez odnośnika")
+                continue
+            if url in expirations:
+                continue
             
-            if not bundle_data:
-                print("\nNie znaleziono żadnych bundli!")
+            expiration = resolve_expiration(tile, scrape_start)
+            expirations[url] = expiration
+            if expiration.expires_at is None:
+                print(f"Brak daty wygaśnięcia dla {url}: {expiration.note}")
             else:
-                print(f"\nPomyślnie zebrano dane o {len(bundle_data)} bundlach")
-                
-                # Wyświetl zebrane dane
-                print("\nZnalezione bundle:")
-                for bundle in bundle_data:
-                    print(f"\nTytuł: {bundle['title']}")
-                    print(f"Cena: {bundle['price_range']}")
-                    print(f"Liczba elementów: {len(bundle['contents'])}")
-                    print("-" * 50)
+                print(f"Bundle {url} wygasa: {format_local(expiration.expires_at)} "
+                      f"(źródło: {expiration.source}, pewność: {expiration.confidence})")
+                if expiration.confidence == 'low':
+                    low_confidence += 1
+                    if expiration.note:
+                        print(f"⚠️ {expiration.note}")
+        
+        if low_confidence:
+            print(f"⚠️ Daty wygaśnięcia o niskiej pewności: {low_confidence}")
+        print(f"Przetworzono kafelki listy w {(time.perf_counter() - tiles_start) * 1000:.1f} ms")
+        return expirations
+
+    def scrape_pages(self, bundle_links, expirations):
+        """Pobiera strony podanych bundli (HTTP, pula przeglądarek albo okno kart w self.driver)"""
+        if self.backend == "http":
+            bundle_data = self.complete_in_browser(
+                self.http_session.fetch_pages(bundle_links, self.stored_validators()))
+            return [self.apply_expiration(bundle_info, expirations)
+                    for bundle_info in self.restore_unchanged_bundles(bundle_data)]
+        
+        if self.workers > 1:
+            # Każdy bundle w jednej z {self.workers} niezależnych przeglądarek headless
+            print(f"Przetwarzam bundle w {self.workers} równoległych przeglądarkach...")
+            return scrape_with_worker_pool(
+                bundle_links,
+                lambda driver: self.extract_bundle_info(driver, expirations),
+                self.workers,
+                pool=bundle_driver_pool(headless=True, profile=self.profile),
+                network_stats=self.network_stats
+            )
+        
+        # Przesuwne okno co najwyżej {self.tabs} kart ładowanych jednocześnie
+        print(f"Przetwarzam bundle w oknie {self.tabs} kart...")
+        self.driver_pool.page_loaded(self.driver, len(bundle_links))
+        return scrape_in_tab_window(
+            self.driver,
+            bundle_links,
+            lambda driver: self.extract_bundle_info(driver, expirations),
+            self.tabs,
+            timeout=self.readiness.timeout,
+            readiness=self.readiness,
+            prepare_tab=apply_lean_blocking if self.profile == "lean" else None
+        )
+
+    def scrape_bundles(self):
+        if self.backend == "http":
+            return self.scrape_bundles_http()
+        
+        try:
+            print("Rozpoczynam scrapowanie...")
+            expirations = self.read_listing()
+            
+            # Lista jest już bez duplikatów (kolejność strony)
+            bundle_links = list(expirations)
+            print(f"Zebrano {len(bundle_links)} unikalnych linków do bundli")
             
-            # Zapisz dane do bazy danych i JSON
-            json_path = self.save_to_json(bundle_data)
-            db_success = self.save_to_database(bundle_data)
+            bundle_data = self.scrape_pages(bundle_links, expirations)
             
-            return bundle_data, json_path, db_success
+            print(f"\nCzas oczekiwania na strony: {self.readiness.summary()}")
+            self.network_stats.collect(self.driver)
+            self.network_stats.report()
             
+            return self.report_and_save(bundle_data)
+        
         except Exception as e:
             print(f"Wystąpił błąd główny: {str(e)}")
             import traceback
             traceback.print_exc()
             return [], None, False
+        
+        finally:
+            self.driver_pool.release(self.driver)
+
+    def plan_rescrape(self, expirations, last_scraped, now, expiry_window, refresh_interval, max_age):
+        """Wybiera bundle z listy do ponownego pobrania; zwraca {url: powód}.
+        
+        Pobierane są tylko bundle nowe (brak aktywnego wpisu w bazie), ze zmienioną datą
+        wygaśnięcia na kafelku, bliskie końca (co `refresh_interval`) oraz niepobierane
+        dłużej niż `max_age`. Pozostałe pozostają bez zmian w bazie.
+        """
+        cursor = scraper_storage.connect(self.db_path).cursor()
+        cursor.execute('''
+            SELECT url, expiration_date, is_active FROM bundles
+            WHERE url IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(list(expirations)),))
+        stored = {url: (expiration_date, is_active) for url, expiration_date, is_active in cursor.fetchall()}
+        
+        plan = {}
+        for url, expiration in expirations.items():
+            stored_date, is_active = stored.get(url, (None, 0))
+            stored_at = datetime.strptime(stored_date, '%Y-%m-%d %H:%M:%S').astimezone() if stored_date else None
+            since_scraped = now - last_scraped[url] if url in last_scraped else None
             
+            if not is_active:
+                plan[url] = "nowy"
+            elif expiration_changed(stored_date, format_local(expiration.expires_at), expiration.confidence):
+                plan[url] = "zmieniony kafelek"
+            elif stored_at is not None and stored_at - now <= expiry_window and (
+                    since_scraped is None or since_scraped >= refresh_interval):
+                plan[url] = "bliski koniec"
+            elif (since_scraped if since_scraped is not None else now - self.daemon_started) >= max_age:
+                plan[url] = "nieodświeżany"
+        return plan
+
+    def deactivate_unlisted(self, listed_urls):
+        """Oznacza jako nieaktywne bundle, które zniknęły z listy (bez pobierania stron)"""
+        conn = scraper_storage.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN TRANSACTION")
+            deactivated = deactivate_missing_bundles(cursor, listed_urls)
+            conn.commit()
+            return deactivated
+        except Exception as e:
+            conn.rollback()
+            print(f"Błąd podczas oznaczania wygasłych bundli: {str(e)}")
+            return 0
+
+    def run_daemon(self, interval=300, expiry_window=6, refresh_interval=60, max_age=24, rounds=None):
+        """Tryb ciągły: co `interval` s odczytuje listę i pobiera tylko nowe, zmienione i bliskie końca bundle.
+        
+        Przeglądarka (albo sesja HTTP) pozostaje otwarta między przebiegami. `expiry_window`
+        i `max_age` są w godzinach, `refresh_interval` w minutach; `rounds` ogranicza liczbę
+        przebiegów (None - do przerwania Ctrl+C).
+        """
+        if self.backend == "http":
+            from bundle_http import BundleSession  # aiohttp potrzebny tylko dla tego backendu
+            self.http_session = BundleSession(concurrency=max(self.workers, self.tabs))
+        
+        expiry_window = timedelta(hours=expiry_window)
+        refresh_interval = timedelta(minutes=refresh_interval)
+        max_age = timedelta(hours=max_age)
+        self.daemon_started = datetime.now().astimezone()
+        last_scraped = {}
+        pages_listed = 0
+        pages_loaded = 0
+        round_number = 0
+        
+        print(f"Tryb ciągły: lista co {interval} s, okno wygasania {expiry_window}, "
+              f"odświeżanie bliskich końca co {refresh_interval}, maksymalny wiek {max_age}")
+        try:
+            while rounds is None or round_number < rounds:
+                round_number += 1
+                round_start = time.perf_counter()
+                try:
+                    expirations = self.read_listing()
+                    if not expirations:
+                        # Pusta lista to raczej błąd strony niż koniec wszystkich bundli - nic nie dezaktywuj
+                        print(f"Przebieg {round_number}: lista bundli jest pusta, pomijam")
+                    else:
+                        now = datetime.now().astimezone()
+                        plan = self.plan_rescrape(expirations, last_scraped, now,
+                                                  expiry_window, refresh_interval, max_age)
+                        pages_listed += len(expirations)
+                        pages_loaded += len(plan)
+                        
+                        reasons = {}
+                        for reason in plan.values():
+                            reasons[reason] = reasons.get(reason, 0) + 1
+                        print(f"Przebieg {round_number}: {len(expirations)} bundli na liście, do pobrania {len(plan)} "
+                              f"({', '.join(f'{reason}: {count}' for reason, count in reasons.items()) or 'brak zmian'})")
+                        
+                        if plan:
+                            bundle_data = self.scrape_pages(list(plan), expirations)
+                            # Zapis tylko pobranych bundli; nieaktywne stają się te, których nie ma na liście
+                            if self.save_to_database(bundle_data, listed_urls=expirations):
+                                # Czas pobrania tylko dla zapisanych stron - nieudane wracają w następnym przebiegu
+                                saved = {bundle_info['url'] for bundle_info in bundle_data} & set(plan)
+                                for url in saved:
+                                    last_scraped[url] = now
+                                if len(saved) < len(plan):
+                                    print(f"Nie udało się pobrać {len(plan) - len(saved)} stron "
+                                          f"- ponowię je w następnym przebiegu")
+                            else:
+                                print("Nie zapisano bundli - ponowię je w następnym przebiegu")
+                        else:
+                            deactivated = self.deactivate_unlisted(expirations)
+                            if deactivated:
+                                print(f"Wygasłe bundle: {deactivated}")
+                        
+                        print(f"Przebieg {round_number} zakończony w {time.perf_counter() - round_start:.2f} s; "
+                              f"łącznie pobrano {pages_loaded} stron bundli "
+                              f"({pages_loaded / pages_listed:.0%} pełnych przebiegów)")
+                except Exception as e:
+                    # Błąd jednego przebiegu nie kończy trybu ciągłego
+                    print(f"Błąd w przebiegu {round_number}: {str(e)}")
+                    import traceback
+                    traceback.print_exc()
+                
+                if self.backend == "browser":
+                    # Przeglądarka zostaje między przebiegami; po limicie stron jest zastępowana nową
+                    self.driver = self.driver_pool.checkpoint(self.driver)
+                if rounds is None or round_number < rounds:
+                    time.sleep(max(0, interval - (time.perf_counter() - round_start)))
+        except KeyboardInterrupt:
+            print("\nZatrzymano tryb ciągły")
         finally:
-            self.driver.quit()
+            if self.backend == "http":
+                self.http_session.close()
+            else:
+                self.driver_pool.release(self.driver)
 
     def get_bundle_price(self, driver):
         try:
@@ -765,78 +977,46 @@ class HumbleBundleScraper:
         except:
             return "€1"
 
-    def display_database_summary(self):
-        """Wyświetla podsumowanie zawartości bazy danych w czytelny sposób."""
+    def display_database_summary(self, as_json=False):
+        """Wyświetla podsumowanie zawartości bazy danych w czytelny sposób (albo jako JSON)."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Pobierz wszystkie aktywne bundle
-            cursor.execute("""
-            SELECT id, title, price_range, bundle_type, date_added, expiration_date 
-            FROM bundles 
-            WHERE is_active = 1
-            ORDER BY bundle_type, title
-            """)
+            summary = bundle_summary(scraper_storage.connect(self.db_path).cursor())
             
-            bundles = cursor.fetchall()
+            if as_json:
+                print(json.dumps(summary, ensure_ascii=False, indent=4))
+                return True
             
-            if not bundles:
+            if not summary['bundles']:
                 print("Brak aktywnych bundli w bazie danych.")
                 return
             
-            # Statystyki według typu
-            cursor.execute("""
-            SELECT bundle_type, COUNT(*) as count 
-            FROM bundles 
-            WHERE is_active = 1 
-            GROUP BY bundle_type
-            ORDER BY count DESC
-            """)
-            
-            stats = cursor.fetchall()
-            
             print("\n===== PODSUMOWANIE BUNDLI W BAZIE DANYCH =====")
-            print(f"Łączna liczba aktywnych bundli: {len(bundles)}")
+            print(f"Łączna liczba aktywnych bundli: {summary['active_bundles']}")
             print("\nPodział według kategorii:")
-            for bundle_type, count in stats:
+            for bundle_type, count in summary['by_type'].items():
                 print(f"- {bundle_type}: {count} bundli")
             
             # Wyświetl szczegóły każdego bundla
             print("\n===== SZCZEGÓŁY BUNDLI =====")
-            for bundle_id, title, price_range, bundle_type, date_added, expiration_date in bundles:
-                # Pobierz liczbę elementów w bundlu
-                cursor.execute("SELECT COUNT(*) FROM bundle_contents WHERE bundle_id = ?", (bundle_id,))
-                item_count = cursor.fetchone()[0]
-                
-                # Pobierz przykładowe elementy (pierwsze 3)
-                cursor.execute("""
-                SELECT item_name FROM bundle_contents 
-                WHERE bundle_id = ? 
-                ORDER BY item_order 
-                LIMIT 3
-                """, (bundle_id,))
-                
-                sample_items = cursor.fetchall()
-                sample_items = [item[0] for item in sample_items]
+            for bundle in summary['bundles']:
+                item_count = bundle['item_count']
                 
                 # Formatuj wyświetlanie
-                print(f"\n[{bundle_type}] {title}")
-                print(f"Cena: {price_range}")
-                print(f"Dodano: {date_added}")
-                if expiration_date:
-                    print(f"Wygasa: {expiration_date}")
+                print(f"\n[{bundle['bundle_type']}] {bundle['title']}")
+                print(f"Cena: {bundle['price_range']}")
+                print(f"Dodano: {bundle['date_added']}")
+                if bundle['expiration_date']:
+                    print(f"Wygasa: {bundle['expiration_date']}")
                 print(f"Liczba elementów: {item_count}")
                 print("Przykładowe elementy:")
-                for item in sample_items:
+                for item in bundle['sample_items']:
                     print(f"- {item}")
-                if item_count > 3:
-                    print(f"- ... i {item_count - 3} więcej")
+                if item_count > len(bundle['sample_items']):
+                    print(f"- ... i {item_count - len(bundle['sample_items'])} więcej")
                 print("-" * 50)
             
-            conn.close()
             return True
-            
+        
         except Exception as e:
             print(f"Błąd podczas wyświetlania podsumowania bazy danych: {str(e)}")
             import traceback
@@ -844,7 +1024,34 @@ class HumbleBundleScraper:
             return False
 
 def main():
-    scraper = HumbleBundleScraper()
+    parser = argparse.ArgumentParser(description="Scraper bundli Humble Bundle")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="liczba równoległych przeglądarek headless dla stron bundli (domyślnie 1: karty w jednej przeglądarce)")
+    parser.add_argument('--tabs', type=int, default=4,
+                        help="maksymalna liczba kart ładowanych jednocześnie przy --workers 1 (domyślnie 4)")
+    parser.add_argument('--page-timeout', type=int, default=20,
+                        help="maksymalny czas oczekiwania na gotowość strony w sekundach (domyślnie 20)")
+    parser.add_argument('--profile', choices=['default', 'lean'], default='default',
+                        help="'lean' blokuje obrazy, media, fonty i skrypty śledzące oraz używa strategii ładowania eager")
+    parser.add_argument('--backend', choices=['browser', 'http'], default='browser',
+                        help="'http' pobiera strony przez aiohttp i parsuje je bez uruchamiania Chrome")
+    parser.add_argument('--summary', choices=['text', 'json', 'none'], default='text',
+                        help="podsumowanie aktywnych bundli z bazy po zapisie (domyślnie text)")
+    parser.add_argument('--daemon', action='store_true',
+                        help="tryb ciągły: okresowo sprawdza listę i pobiera tylko nowe, zmienione i bliskie końca bundle")
+    parser.add_argument('--interval', type=int, default=300,
+                        help="odstęp między sprawdzeniami listy w trybie ciągłym, w sekundach (domyślnie 300)")
+    parser.add_argument('--expiry-window', type=float, default=6,
+                        help="bundle wygasające w ciągu tylu godzin są odświeżane co godzinę (domyślnie 6)")
+    parser.add_argument('--max-age', type=float, default=24,
+                        help="bundle niepobierane dłużej niż tyle godzin są odświeżane (domyślnie 24)")
+    args = parser.parse_args()
+    
+    scraper = HumbleBundleScraper(workers=args.workers, tabs=args.tabs, page_timeout=args.page_timeout,
+                                  profile=args.profile, backend=args.backend)
+    if args.daemon:
+        scraper.run_daemon(interval=args.interval, expiry_window=args.expiry_window, max_age=args.max_age)
+        return
     bundles, json_filename, db_success = scraper.scrape_bundles()
     
     # Wyświetlenie wyników
@@ -862,6 +1069,9 @@ def main():
     
     print(f"\nDane zostały zapisane do bazy SQLite: {scraper.db_path}")
     print(f"Dane zostały zapisane do pliku JSON: {json_filename}")
+    
+    if args.summary != 'none':
+        scraper.display_database_summary(as_json=args.summary == 'json')
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
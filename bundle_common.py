@@ -0,0 +1,692 @@
+"""Wspólne elementy scraperów bundli (BundleScraperAlpha.py, BundleScraperTimestamper.py)."""
+
+import os
+import json
+import time
+import hashlib
+import queue
+import threading
+from collections import deque
+
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+import driver_pool
+from bundle_expiration import END_TIMESTAMP_ATTRIBUTES
+
+# Selektor, którego pojawienie się oznacza, że strona bundla jest gotowa do przetworzenia
+BUNDLE_READY_SELECTOR = "span.item-title"
+
+# --- Lista bundli (/bundles) ---
+# Selektory licznika w kolejności prób (jak wcześniej w pętli po kafelkach)
+COUNTDOWN_SELECTORS = [
+    ".js-countdown-timer",
+    ".timer-wrapper",
+    ".js-countdown-timer.is-hidden",
+    "[aria-label*='days']",
+]
+
+# Jedno wywołanie execute_script zwraca URL, części licznika, aria-label i znacznik końca wszystkich kafelków,
+# zamiast kilkunastu find_element(s) na kafelek. textContent działa też dla ukrytego licznika.
+TILE_METADATA_SCRIPT = """
+const countdownSelectors = arguments[0];
+const endAttributes = arguments[1];
+const text = (root, selector) => {
+    const element = root.querySelector(selector);
+    return element ? element.textContent.trim() : null;
+};
+const endTimestamp = tile => {
+    const selector = endAttributes.map(name => `[${name}]`).join(', ');
+    for (const element of [tile, ...tile.querySelectorAll(selector)]) {
+        for (const name of endAttributes) {
+            const value = element.getAttribute(name);
+            if (value) return value;
+        }
+    }
+    return null;
+};
+return Array.from(document.querySelectorAll('.tile-holder')).map(tile => {
+    const link = tile.querySelector('a');
+    let countdown = null;
+    for (const selector of countdownSelectors) {
+        countdown = tile.querySelector(selector);
+        if (countdown) break;
+    }
+    return {
+        url: link ? link.href : null,
+        has_countdown: countdown !== null,
+        days: countdown ? text(countdown, '.js-days') : null,
+        hours: countdown ? text(countdown, '.js-hours') : null,
+        minutes: countdown ? text(countdown, '.js-minutes') : null,
+        seconds: countdown ? text(countdown, '.js-seconds') : null,
+        aria_label: countdown ? countdown.getAttribute('aria-label') : null,
+        end_timestamp: endTimestamp(tile),
+    };
+});
+"""
+
+
+def extract_tile_metadata(driver):
+    """Zwraca metadane wszystkich kafelków .tile-holder bieżącej strony w jednym wywołaniu WebDrivera"""
+    return driver.execute_script(TILE_METADATA_SCRIPT, COUNTDOWN_SELECTORS, END_TIMESTAMP_ATTRIBUTES) or []
+
+
+# --- Profil "lean" ---
+# Czytamy tylko tekst (span.item-title, label.preset-price, licznik), więc obrazy, media,
+# fonty i zewnętrzne skrypty śledzące są blokowane przez CDP (Network.setBlockedURLs).
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*facebook.net*", "*facebook.com/tr*", "*connect.facebook*", "*hotjar.com*", "*optimizely.com*",
+    "*youtube.com*", "*ytimg.com*", "*twitter.com*", "*tiktok.com*", "*reddit.com*", "*bing.com*",
+]
+NETWORK_STATS_FILE = "network_stats.json"
+
+
+def apply_lean_blocking(driver):
+    """Włącza blokowanie zasobów w bieżącej karcie (CDP działa per karta)"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+
+
+def chrome_options(headless=False, profile="default"):
+    """Opcje Chrome używane przez scrapery bundli"""
+    chrome_options = Options()
+
+    # Opcje zapewniające, że Chrome pozostanie zminimalizowany
+    chrome_options.add_argument("--start-minimized")
+    chrome_options.add_argument("--window-position=-32000,-32000")  # Przesuń okno poza ekran
+
+    # Opcje wydajnościowe i zapobiegające wyskakiwaniu okien
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-notifications")
+    chrome_options.add_argument("--disable-popup-blocking")
+
+    # Tryb headless może wpłynąć na działanie niektórych stron, dlatego domyślnie jest wyłączony
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    
+    # Logi sieciowe (performance log) pozwalają wykryć bezczynność sieci zamiast czekać na sztywno
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+    
+    if profile == "lean":
+        # Bez obrazów i autoodtwarzania mediów we wszystkich kartach; DOMContentLoaded wystarcza
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+        chrome_options.page_load_strategy = "eager"
+    return chrome_options
+
+
+def prepare_driver(driver, profile="default"):
+    """Ustawienia sesji WebDrivera - dla nowej przeglądarki i po podłączeniu do działającej"""
+    if profile == "lean":
+        apply_lean_blocking(driver)
+
+    # Ustaw timeout dla operacji WebDrivera
+    driver.set_page_load_timeout(30)
+
+    # Dodatkowe ustawienie rozmiaru okna na minimalny
+    driver.set_window_size(1, 1)
+
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+
+def bundle_driver_pool(headless=False, profile="default"):
+    """Pula przeglądarek scraperów bundli (trwały profil, podłączanie, recykling) dla danej konfiguracji"""
+    name = f"bundles-{profile}" + ("-headless" if headless else "")
+    return driver_pool.get_pool(name, lambda: chrome_options(headless, profile),
+                                setup=lambda driver: prepare_driver(driver, profile))
+
+
+# --- Historia bundli ---
+# Tabela tylko do dopisywania: nowy wiersz powstaje wyłącznie wtedy, gdy cena, liczba progów
+# albo zawartość różni się od ostatniego zapisanego stanu bundla. Klucz główny
+# (bundle_id, scrape_time) obsługuje zapytania "cena w czasie" dla bundla bez skanowania tabeli.
+BUNDLE_SNAPSHOTS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS bundle_snapshots (
+        bundle_id INTEGER NOT NULL,
+        scrape_time TEXT NOT NULL,
+        price_range TEXT,
+        tier_count INTEGER,
+        item_count INTEGER,
+        item_hash TEXT NOT NULL,
+        expiration_date TEXT,
+        PRIMARY KEY (bundle_id, scrape_time),
+        FOREIGN KEY (bundle_id) REFERENCES bundles (id)
+    ) WITHOUT ROWID
+'''
+
+# Wstawia migawkę tylko, jeśli ostatnia migawka bundla ma inną cenę, liczbę progów lub zawartość
+# (zapisane migawki są niezmienne - drugi przebieg w tej samej sekundzie nie nadpisuje istniejącej)
+INSERT_SNAPSHOT_SQL = '''
+    INSERT INTO bundle_snapshots
+        (bundle_id, scrape_time, price_range, tier_count, item_count, item_hash, expiration_date)
+    SELECT :bundle_id, :scrape_time, :price_range, :tier_count, :item_count, :item_hash, :expiration_date
+    WHERE NOT EXISTS (
+        SELECT 1 FROM (
+            SELECT price_range, tier_count, item_hash
+            FROM bundle_snapshots
+            WHERE bundle_id = :bundle_id
+            ORDER BY scrape_time DESC
+            LIMIT 1
+        ) AS latest
+        WHERE latest.price_range IS :price_range
+          AND latest.tier_count IS :tier_count
+          AND latest.item_hash = :item_hash
+    )
+    ON CONFLICT (bundle_id, scrape_time) DO NOTHING
+'''
+
+
+def create_snapshot_table(cursor):
+    cursor.execute(BUNDLE_SNAPSHOTS_SCHEMA)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bundle_snapshots_time ON bundle_snapshots(scrape_time)")
+
+
+def bundle_item_hash(contents):
+    """Skrót zawartości bundla (kolejność pozycji ma znaczenie)"""
+    normalized = [item.strip() for item in contents]
+    return hashlib.sha256(json.dumps(normalized, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+# Kolumny bundles do wykrywania zmian: skrót zapisywanych danych i walidatory HTTP strony bundla
+CHANGE_TRACKING_COLUMNS = {'content_hash': 'TEXT', 'etag': 'TEXT', 'last_modified': 'TEXT'}
+
+
+def add_change_tracking_columns(cursor):
+    """Dodaje do istniejącej tabeli bundles brakujące kolumny wykrywania zmian"""
+    cursor.execute("PRAGMA table_info(bundles)")
+    columns = {column[1] for column in cursor.fetchall()}
+    for name, column_type in CHANGE_TRACKING_COLUMNS.items():
+        if name not in columns:
+            cursor.execute(f"ALTER TABLE bundles ADD COLUMN {name} {column_type}")
+            print(f"Dodano kolumnę {name} do istniejącej tabeli")
+
+
+def ensure_unique_url_index(cursor):
+    """Zapewnia unikalny indeks na bundles.url (wymagany przez ON CONFLICT(url)) bez dublowania go.
+
+    Tabele z ograniczeniem `url TEXT UNIQUE` mają już sqlite_autoindex - wtedy własny indeks
+    tylko podwajałby koszt zapisu, więc jest usuwany. Tworzony jest tylko dla starych tabel
+    bez tego ograniczenia.
+    """
+    cursor.execute("PRAGMA index_list(bundles)")
+    unique_indexes = [row[1] for row in cursor.fetchall() if row[2] and row[1] != 'idx_bundle_url']
+    for name in unique_indexes:
+        cursor.execute(f"PRAGMA index_info('{name}')")
+        if [row[2] for row in cursor.fetchall()] == ['url']:
+            cursor.execute("DROP INDEX IF EXISTS idx_bundle_url")
+            return
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_bundle_url ON bundles(url)")
+
+
+def bundle_content_hash(bundle):
+    """Skrót wszystkiego, co zapis bundla zmienia w bazie: tytułu, ceny, liczby progów i zawartości.
+
+    Zawartość jest znormalizowana tak jak przy zapisie (bez spacji na brzegach i bez powtórzeń).
+    """
+    normalized = {
+        'title': (bundle.get('title') or "").strip(),
+        'price_range': (bundle.get('price_range') or "").strip(),
+        'tier_count': bundle.get('tier_count'),
+        'contents': list(dict.fromkeys(item.strip() for item in bundle.get('contents', []))),
+    }
+    return hashlib.sha256(json.dumps(normalized, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def sync_bundle_contents(cursor, contents_by_id):
+    """Zastępuje zawartość bundli przez różnicę z tym, co już jest w bazie.
+
+    Jedno zapytanie pobiera obecną zawartość wszystkich bundli, a zmiany są wykonywane
+    trzema executemany (usunięcia, zmiany kolejności, nowe elementy), więc tabela
+    bundle_contents nie rośnie przy kolejnych przebiegach. Obie wersje scrapera zapisują zawartość
+    tylko przez tę funkcję, więc indeks unikalny (bundle_id, item_name) z deduplicate_database
+    jest zawsze spełniony.
+    """
+    cursor.execute("""
+    SELECT id, bundle_id, item_name, item_order
+    FROM bundle_contents
+    WHERE bundle_id IN (SELECT value FROM json_each(?))
+    ORDER BY id
+    """, (json.dumps(list(contents_by_id)),))
+
+    existing = {}
+    to_delete = []
+    for row_id, bundle_id, item_name, item_order in cursor.fetchall():
+        items = existing.setdefault(bundle_id, {})
+        if item_name in items:
+            to_delete.append((row_id,))  # Duplikat z wcześniejszych przebiegów
+        else:
+            items[item_name] = (row_id, item_order)
+
+    to_update = []
+    to_insert = []
+    for bundle_id, contents in contents_by_id.items():
+        items = existing.get(bundle_id, {})
+        seen = set()
+        for item_order, item_name in enumerate(contents, start=1):
+            if item_name in seen:
+                continue  # Ta sama pozycja dwa razy na stronie - zapisujemy ją raz
+            seen.add(item_name)
+            if item_name in items:
+                row_id, old_order = items.pop(item_name)
+                if old_order != item_order:
+                    to_update.append((item_order, row_id))
+            else:
+                to_insert.append((bundle_id, item_name, item_order))
+        # Elementy, których nie ma już na stronie bundla
+        to_delete.extend((row_id,) for row_id, _ in items.values())
+
+    cursor.executemany("DELETE FROM bundle_contents WHERE id = ?", to_delete)
+    cursor.executemany("UPDATE bundle_contents SET item_order = ? WHERE id = ?", to_update)
+    cursor.executemany('''
+    INSERT INTO bundle_contents (bundle_id, item_name, item_order)
+    VALUES (?, ?, ?)
+    ''', to_insert)
+    return len(to_insert), len(to_update), len(to_delete)
+
+
+def record_bundle_snapshots(cursor, bundles_by_id, scrape_time):
+    """Dopisuje migawki zmienionych bundli; zwraca liczbę nowych wierszy.
+
+    `bundles_by_id` to {bundle_id: bundle_info}. Data wygaśnięcia jest zapisywana, ale nie
+    decyduje o nowej migawce - liczona z licznika przesuwa się o minuty w każdym przebiegu.
+    """
+    snapshots = [{
+        'bundle_id': bundle_id,
+        'scrape_time': scrape_time,
+        'price_range': bundle.get('price_range'),
+        'tier_count': bundle.get('tier_count'),
+        'item_count': len(bundle.get('contents', [])),
+        'item_hash': bundle_item_hash(bundle.get('contents', [])),
+        'expiration_date': bundle.get('expiration_date'),
+    } for bundle_id, bundle in bundles_by_id.items()]
+    cursor.executemany(INSERT_SNAPSHOT_SQL, snapshots)
+    return cursor.rowcount if snapshots else 0
+
+
+def deactivate_missing_bundles(cursor, urls):
+    """Oznacza jako nieaktywne tylko te aktywne bundle, których nie ma w bieżącym przebiegu"""
+    cursor.execute('''
+        UPDATE bundles SET is_active = 0
+        WHERE is_active = 1 AND url NOT IN (SELECT value FROM json_each(?))
+    ''', (json.dumps(list(urls)),))
+    return cursor.rowcount
+
+
+# Podsumowanie aktywnych bundli jednym zapytaniem: liczba elementów z GROUP BY
+# i pierwsze `:sample_size` elementów z ROW_NUMBER(), zamiast dwóch zapytań na bundle
+BUNDLE_SUMMARY_SQL = '''
+    WITH active AS (
+        SELECT id, title, price_range, bundle_type, {date_added} AS date_added, {expiration_date} AS expiration_date
+        FROM bundles
+        WHERE is_active = 1
+    ),
+    item_counts AS (
+        SELECT bundle_id, COUNT(*) AS item_count
+        FROM bundle_contents
+        WHERE bundle_id IN (SELECT id FROM active)
+        GROUP BY bundle_id
+    ),
+    samples AS (
+        SELECT bundle_id, item_name,
+               ROW_NUMBER() OVER (PARTITION BY bundle_id ORDER BY item_order, id) AS sample_number
+        FROM bundle_contents
+        WHERE bundle_id IN (SELECT id FROM active)
+    )
+    SELECT a.id, a.title, a.price_range, a.bundle_type, a.date_added, a.expiration_date,
+           COALESCE(c.item_count, 0), s.item_name
+    FROM active a
+    LEFT JOIN item_counts c ON c.bundle_id = a.id
+    LEFT JOIN samples s ON s.bundle_id = a.id AND s.sample_number <= :sample_size
+    ORDER BY a.bundle_type, a.title, a.id, s.sample_number
+'''
+
+
+def bundle_summary(cursor, sample_size=3):
+    """Zwraca podsumowanie aktywnych bundli jako słownik (gotowy do wypisania lub json.dump)"""
+    cursor.execute("PRAGMA table_info(bundles)")
+    columns = [column[1] for column in cursor.fetchall()]
+    # Starsza tabela bundles scrapera Alpha nie ma wszystkich kolumn
+    optional_columns = {name: name if name in columns else 'NULL' for name in ('date_added', 'expiration_date')}
+    cursor.execute(BUNDLE_SUMMARY_SQL.format(**optional_columns), {'sample_size': sample_size})
+
+    bundles = []
+    by_type = {}
+    for bundle_id, title, price_range, bundle_type, date_added, expiration_date, item_count, item_name in cursor:
+        if not bundles or bundles[-1]['id'] != bundle_id:
+            bundles.append({
+                'id': bundle_id,
+                'title': title,
+                'price_range': price_range,
+                'bundle_type': bundle_type,
+                'date_added': date_added,
+                'expiration_date': expiration_date,
+                'item_count': item_count,
+                'sample_items': [],
+            })
+            by_type[bundle_type] = by_type.get(bundle_type, 0) + 1
+        if item_name is not None:
+            bundles[-1]['sample_items'].append(item_name)
+
+    return {
+        'active_bundles': len(bundles),
+        'by_type': dict(sorted(by_type.items(), key=lambda item: item[1], reverse=True)),
+        'bundles': bundles,
+    }
+
+
+class NetworkStats:
+    """Zlicza ruch sieciowy z logów performance: bajty pobrane, strony i zablokowane żądania.
+
+    Średnia liczba bajtów na stronę jest zapisywana per profil w NETWORK_STATS_FILE,
+    więc przebieg "lean" może podać oszczędność względem ostatniego przebiegu "default".
+    """
+
+    def __init__(self, profile="default", stats_file=NETWORK_STATS_FILE):
+        self.profile = profile
+        self.stats_file = stats_file
+        self.bytes_received = 0
+        self.documents = 0
+        self.blocked_requests = 0
+        self.request_types = {}
+        self.lock = threading.Lock()
+
+    def observe(self, message):
+        method = message.get("method")
+        params = message.get("params", {})
+        with self.lock:
+            if method == "Network.requestWillBeSent":
+                self.request_types[params.get("requestId")] = params.get("type")
+            elif method == "Network.loadingFinished":
+                self.bytes_received += int(params.get("encodedDataLength", 0))
+                if self.request_types.pop(params.get("requestId"), None) == "Document":
+                    self.documents += 1
+            elif method == "Network.loadingFailed":
+                self.request_types.pop(params.get("requestId"), None)
+                if params.get("blockedReason"):
+                    self.blocked_requests += 1
+
+    def collect(self, driver):
+        """Odczytuje zaległe wpisy logu performance (np. przed zamknięciem przeglądarki)."""
+        try:
+            entries = driver.get_log("performance")
+        except WebDriverException:
+            return
+        for entry in entries:
+            self.observe(json.loads(entry["message"])["message"])
+
+    def bytes_per_page(self):
+        return self.bytes_received / self.documents if self.documents else 0
+
+    def report(self):
+        """Wypisuje podsumowanie, zapisuje średnią dla profilu i zwraca oszacowaną oszczędność w bajtach."""
+        baselines = {}
+        if os.path.exists(self.stats_file):
+            try:
+                with open(self.stats_file, encoding='utf-8') as f:
+                    baselines = json.load(f)
+            except (IOError, OSError, ValueError):
+                baselines = {}
+
+        print(f"Sieć ({self.profile}): {self.bytes_received / 1024:.0f} KB na {self.documents} stron, "
+              f"zablokowano {self.blocked_requests} żądań")
+        bytes_saved = None
+        baseline = baselines.get("default", {}).get("bytes_per_page")
+        if self.profile != "default" and self.documents:
+            if baseline:
+                bytes_saved = max(0, baseline - self.bytes_per_page()) * self.documents
+                print(f"Oszczędność względem profilu default: ~{bytes_saved / 1024:.0f} KB w tym przebiegu")
+            else:
+                print("Brak pomiaru dla profilu default - uruchom raz z --profile default, aby policzyć oszczędność")
+
+        if self.documents:
+            baselines[self.profile] = {"bytes_per_page": self.bytes_per_page(),
+                                       "measured": time.strftime('%Y-%m-%d %H:%M:%S')}
+            try:
+                with open(self.stats_file, 'w', encoding='utf-8') as f:
+                    json.dump(baselines, f, indent=4)
+            except (IOError, OSError) as e:
+                print(f"Nie udało się zapisać statystyk sieci: {e}")
+        return bytes_saved
+
+
+class Readiness:
+    """Czekanie na gotowość strony zamiast stałych time.sleep().
+
+    Łączy warunki DOM (selektor CSS), wykrywanie bezczynności sieci na podstawie
+    logów performance oraz konfigurowalne limity czasu. Każde oczekiwanie
+    (również zamierzone pauzy) jest zapisywane, żeby można było pokazać, ile
+    czasu scraper faktycznie spędził na czekaniu.
+    """
+
+    def __init__(self, timeout=20, network_idle_time=0.5, poll_interval=0.1):
+        self.timeout = timeout
+        self.network_idle_time = network_idle_time
+        self.poll_interval = poll_interval
+        self.waits = []  # (etykieta, sekundy, wynik)
+        self.network_stats = None  # NetworkStats, jeśli ruch sieciowy ma być liczony
+
+    def wait_for(self, driver, label, css_selector=None, network_idle=False, timeout=None):
+        """Czeka na `css_selector` i opcjonalnie na bezczynność sieci; zwraca True, jeśli strona jest gotowa."""
+        timeout = timeout or self.timeout
+        start = time.monotonic()
+        outcome = "ok"
+        try:
+            if css_selector:
+                WebDriverWait(driver, timeout, poll_frequency=self.poll_interval).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, css_selector))
+                )
+            if network_idle and not self.wait_for_network_idle(driver, start + timeout):
+                outcome = "sieć aktywna"
+        except TimeoutException:
+            outcome = "timeout"
+        elapsed = time.monotonic() - start
+        self.waits.append((label, elapsed, outcome))
+        print(f"Gotowość '{label}': {elapsed:.2f} s ({outcome})")
+        if outcome == "timeout":
+            raise TimeoutException(f"Strona nie była gotowa ({label}) w ciągu {timeout} s")
+        return outcome == "ok"
+
+    def wait_for_network_idle(self, driver, deadline):
+        """Czeka, aż przez network_idle_time nie będzie żadnego trwającego żądania sieciowego."""
+        in_flight = set()
+        idle_since = time.monotonic()
+        while time.monotonic() < deadline:
+            try:
+                entries = driver.get_log("performance")
+            except WebDriverException:
+                return True  # Brak logów performance - zostają same warunki DOM
+            for entry in entries:
+                message = json.loads(entry["message"])["message"]
+                if self.network_stats:
+                    self.network_stats.observe(message)
+                method = message.get("method")
+                request_id = message.get("params", {}).get("requestId")
+                if method == "Network.requestWillBeSent":
+                    in_flight.add(request_id)
+                elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                    in_flight.discard(request_id)
+            now = time.monotonic()
+            if in_flight:
+                idle_since = now
+            elif now - idle_since >= self.network_idle_time:
+                return True
+            time.sleep(self.poll_interval)
+        return False
+
+    def pause(self, seconds, label):
+        """Zamierzona pauza (np. przed ponowieniem zapisu) - zapisywana razem z pozostałymi oczekiwaniami."""
+        time.sleep(seconds)
+        self.record(label, seconds, "pauza")
+
+    def record(self, label, seconds, outcome):
+        """Zapisuje oczekiwanie zmierzone poza wait_for (np. sumę odpytywań kart w scrape_in_tab_window)."""
+        self.waits.append((label, seconds, outcome))
+
+    def summary(self):
+        total = sum(seconds for _, seconds, _ in self.waits)
+        return f"{len(self.waits)} oczekiwań, łącznie {total:.2f} s"
+
+
+def scrape_with_worker_pool(urls, handler, workers, pool=None, network_stats=None):
+    """Przetwarza strony bundli równolegle w `workers` niezależnych przeglądarkach.
+
+    Każdy wątek bierze własnego WebDrivera z puli (domyślnie headless) i pobiera kolejne URL
+    z jednej kolejki; po załadowaniu strony handler(driver) zwraca słownik bundla albo None.
+    Wyniki są zbierane w jednym miejscu i zwracane w kolejności URL z listy wejściowej.
+    """
+    pool = pool or bundle_driver_pool(headless=True)
+    url_queue = queue.Queue()
+    for index, url in enumerate(urls):
+        url_queue.put((index, url))
+
+    results = [None] * len(urls)
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        try:
+            driver = pool.acquire()
+        except Exception as e:
+            print(f"[worker {worker_id}] Nie udało się uruchomić przeglądarki: {e}")
+            return
+        try:
+            while True:
+                try:
+                    index, url = url_queue.get_nowait()
+                except queue.Empty:
+                    break
+                print(f"[worker {worker_id}] Przetwarzam bundle {index + 1}/{len(urls)}: {url}")
+                try:
+                    driver.get(url)
+                    bundle_info = handler(driver)
+                except Exception as e:
+                    print(f"[worker {worker_id}] Błąd podczas przetwarzania {url}: {str(e)}")
+                    bundle_info = None
+                with lock:
+                    results[index] = bundle_info
+                # Po limicie stron przeglądarka jest zastępowana nową (ograniczenie wycieków pamięci)
+                driver = pool.checkpoint(driver, pages=1,
+                                         before_recycle=network_stats.collect if network_stats else None)
+        finally:
+            if network_stats:
+                network_stats.collect(driver)
+            pool.release(driver)
+
+    threads = [threading.Thread(target=worker, args=(i + 1,), daemon=True)
+               for i in range(max(1, min(workers, len(urls))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if not url_queue.empty():
+        print(f"⚠️ {url_queue.qsize()} bundli nie zostało przetworzonych (brak działających przeglądarek)")
+    return [bundle_info for bundle_info in results if bundle_info]
+
+
+def complete_in_browser(bundle_data, handler, workers, pool=None, network_stats=None):
+    """Dokańcza w przeglądarce bundle z backendu HTTP oznaczone 'needs_browser'.
+
+    Strony renderowane po stronie klienta nie mają w HTML progów cenowych, więc bez przeglądarki
+    miałyby 0 progów i nieznaną cenę. Takie strony są ładowane w puli (scrape_with_worker_pool)
+    i zastępowane wynikiem handlera z walidatorami (etag, last_modified) z odpowiedzi HTTP.
+    Bundle, których nie udało się dokończyć, są pomijane zamiast zapisywać błędną cenę.
+    """
+    urls = [bundle_info['url'] for bundle_info in bundle_data if bundle_info.get('needs_browser')]
+    if not urls:
+        return bundle_data
+
+    print(f"Strony renderowane w przeglądarce: {len(urls)} - dokańczam je w Selenium...")
+    rendered = {bundle_info['url']: bundle_info
+                for bundle_info in scrape_with_worker_pool(urls, handler, workers, pool=pool,
+                                                           network_stats=network_stats)}
+    completed = []
+    for bundle_info in bundle_data:
+        if bundle_info.pop('needs_browser', False):
+            browser_info = rendered.get(bundle_info['url'])
+            if browser_info is None:
+                print(f"⚠️ Pomijam {bundle_info['url']} - nie udało się go dokończyć w przeglądarce")
+                continue
+            browser_info['etag'] = bundle_info.get('etag')
+            browser_info['last_modified'] = bundle_info.get('last_modified')
+            bundle_info = browser_info
+        completed.append(bundle_info)
+    return completed
+
+
+def scrape_in_tab_window(driver, urls, handler, window_size=4, ready_selector=BUNDLE_READY_SELECTOR,
+                         timeout=20, poll_interval=0.2, readiness=None, prepare_tab=None):
+    """Przetwarza strony bundli w jednej przeglądarce z przesuwnym oknem co najwyżej `window_size` kart.
+
+    Karty są otwierane przez window.open (bez blokowania), więc ładują się równolegle.
+    Karta jest przetwarzana przez handler(driver) i zamykana, gdy tylko pojawi się
+    `ready_selector` (albo minie `timeout`), a jej miejsce zajmuje kolejny URL.
+    Jeśli podano prepare_tab(driver), karta jest najpierw otwierana pusta, żeby
+    np. blokowanie zasobów przez CDP zadziałało przed załadowaniem strony.
+    """
+    original_window = driver.current_window_handle
+    pending = deque(enumerate(urls))
+    open_tabs = {}  # uchwyt karty -> (indeks, url, czas otwarcia)
+    results = [None] * len(urls)
+    stalled_since = None  # początek odpytywania, w którym żadna karta nie była gotowa
+
+    while pending or open_tabs:
+        # Uzupełnij okno nowymi kartami
+        while pending and len(open_tabs) < window_size:
+            index, url = pending.popleft()
+            known_handles = set(driver.window_handles)
+            print(f"Otwieram bundle {index + 1}/{len(urls)}: {url}")
+            driver.execute_script("window.open(arguments[0], '_blank');", "about:blank" if prepare_tab else url)
+            new_handles = set(driver.window_handles) - known_handles
+            if not new_handles:
+                print(f"Nie udało się otworzyć karty dla {url}")
+                continue
+            handle = new_handles.pop()
+            if prepare_tab:
+                driver.switch_to.window(handle)
+                prepare_tab(driver)
+                driver.execute_script("window.location.href = arguments[0];", url)  # bez czekania na load
+            open_tabs[handle] = (index, url, time.monotonic())
+
+        # Przetwórz i zamknij karty, które są już gotowe
+        processed = False
+        for handle, (index, url, opened_at) in list(open_tabs.items()):
+            driver.switch_to.window(handle)
+            is_ready = bool(driver.find_elements(By.CSS_SELECTOR, ready_selector))
+            if not is_ready and time.monotonic() - opened_at < timeout:
+                continue
+            if not is_ready:
+                print(f"Timeout ładowania {url}, próbuję przetworzyć mimo to...")
+            if stalled_since is not None:
+                # Jedno oczekiwanie na cały przestój, a nie wpis za każde odpytanie co poll_interval
+                if readiness:
+                    readiness.record("oczekiwanie na karty", time.monotonic() - stalled_since,
+                                     "ok" if is_ready else "timeout")
+                stalled_since = None
+            print(f"\nPrzetwarzam bundle {index + 1}/{len(urls)}")
+            try:
+                results[index] = handler(driver)
+            except Exception as e:
+                print(f"Błąd podczas przetwarzania karty: {str(e)}")
+            driver.close()
+            del open_tabs[handle]
+            processed = True
+
+        driver.switch_to.window(original_window)
+        if not processed and open_tabs:
+            # Żadna karta nie jest jeszcze gotowa - czas liczony od pierwszego pustego odpytania
+            if stalled_since is None:
+                stalled_since = time.monotonic()
+            time.sleep(poll_interval)
+
+    return [bundle_info for bundle_info in results if bundle_info]
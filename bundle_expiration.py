@@ -0,0 +1,257 @@
+"""Parsowanie dat wygaśnięcia bundli z kafelków listy /bundles.
+
+Kolejność źródeł:
+1. znacznik końca zapisany przez stronę (atrybut data-end-*/datetime albo end_date|datetime z JSON),
+2. licznik w elementach span (.js-days, .js-hours, .js-minutes, .js-seconds),
+3. licznik w atrybucie aria-label.
+
+Licznik jest zawsze liczony względem jednego momentu (`anchor`) - chwili odczytu listy -
+a nie bieżącego czasu przy przetwarzaniu danego kafelka. Gdy nic nie da się odczytać,
+wynik ma expires_at = None i confidence "none" zamiast domyślnych 14 dni.
+
+Uruchom `python bundle_expiration.py`, żeby sprawdzić parser na wbudowanym korpusie przypadków.
+"""
+
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+# Atrybuty, w których strona może podać bezwzględny czas końca (sprawdzane w tej kolejności)
+END_TIMESTAMP_ATTRIBUTES = ['data-end-date', 'data-end-time', 'data-end', 'data-expires', 'data-timestamp', 'datetime']
+
+# Pewność wyniku: high - czas bezwzględny albo pełny licznik, medium - dokładność do godzin
+# albo brak elementu dni, low - tylko dni, źródła się nie zgadzają lub koniec jest w przeszłości
+CONFIDENCE_LEVELS = ('high', 'medium', 'low', 'none')
+
+Expiration = namedtuple('Expiration', ['expires_at', 'source', 'confidence', 'note'])
+
+# Różnica, poniżej której dwie daty z licznika uznajemy za tę samą (tykanie między odczytami);
+# dla pewności "low" (same dni) tolerancja to doba
+EXPIRATION_TOLERANCE = timedelta(minutes=15)
+LOW_CONFIDENCE_TOLERANCE = timedelta(days=1)
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'  # format dat wygaśnięcia w bazie (czas lokalny)
+
+UNIT_PATTERN = re.compile(
+    r"(\d+)\s*(days?|d|hours?|hrs?|h|minutes?|mins?|m|seconds?|secs?|s)(?![a-z])", re.IGNORECASE)
+CLOCK_PATTERN = re.compile(r"(?<!\d)(\d{1,3}):(\d{2})(?::(\d{2}))?(?!\d)")
+INTEGER_PATTERN = re.compile(r"\d+")
+UNIT_SECONDS = {'d': 86400, 'h': 3600, 'm': 60, 's': 1}
+
+
+def _unit_key(unit):
+    unit = unit.lower()
+    if unit.startswith('mi') or unit == 'm':
+        return 'm'
+    return unit[0]
+
+
+def format_local(expires_at):
+    """Czas w formacie zapisywanym w bazie (lokalny, bez strefy) albo None"""
+    if expires_at is None:
+        return None
+    return expires_at.astimezone().replace(tzinfo=None).strftime(DATE_FORMAT)
+
+
+def expiration_changed(old_date, new_date, confidence=None):
+    """Czy data wygaśnięcia (w formacie format_local albo None) zmieniła się bardziej niż o tolerancję"""
+    if old_date is None or new_date is None:
+        return (old_date is None) != (new_date is None)
+    difference = abs(datetime.strptime(old_date, DATE_FORMAT) - datetime.strptime(new_date, DATE_FORMAT))
+    return difference > (LOW_CONFIDENCE_TOLERANCE if confidence == 'low' else EXPIRATION_TOLERANCE)
+
+
+def parse_end_timestamp(value):
+    """Bezwzględny czas końca (ISO 8601 albo epoka w s/ms) jako datetime ze strefą; naiwny ISO to UTC."""
+    if value is None or isinstance(value, bool):
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    if re.fullmatch(r"\d+(\.\d+)?", text):
+        seconds = float(text)
+        if seconds > 1e11:  # milisekundy
+            seconds /= 1000
+        return datetime.fromtimestamp(seconds, tz=timezone.utc)
+    try:
+        end = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    return end
+
+
+def parse_countdown_spans(days_text, hours_text, minutes_text, seconds_text=None):
+    """(pozostały czas, pewność) z tekstów elementów licznika albo None.
+
+    Godziny i minuty są wymagane. Element dni bez liczby (np. pusty w ostatnim dniu) oznacza
+    0 dni, ale obniża pewność do "medium".
+    """
+    values = {}
+    for key, text in (('h', hours_text), ('m', minutes_text), ('s', seconds_text)):
+        match = INTEGER_PATTERN.search(text or "")
+        if match:
+            values[key] = int(match.group())
+        elif key != 's':
+            return None
+    days_match = INTEGER_PATTERN.search(days_text or "")
+    confidence = 'high' if days_match else 'medium'
+    remaining = timedelta(days=int(days_match.group()) if days_match else 0, hours=values['h'],
+                          minutes=values['m'], seconds=values.get('s', 0))
+    return remaining, confidence
+
+
+def parse_countdown_label(label):
+    """(pozostały czas, pewność, dokładność) z tekstu typu aria-label albo None.
+
+    Obsługuje "2 days, 3 hours, 4 minutes, and 5 seconds left", "1 day left", "3d 4h 5m"
+    oraz zegar "23:59:10". Dokładność to najmniejsza podana jednostka.
+    """
+    if not label:
+        return None
+    parts = {}
+    for number, unit in UNIT_PATTERN.findall(label):
+        parts.setdefault(_unit_key(unit), int(number))
+    clock = CLOCK_PATTERN.search(label)
+    if clock and not ({'h', 'm'} & parts.keys()):
+        parts['h'], parts['m'] = int(clock.group(1)), int(clock.group(2))
+        if clock.group(3):
+            parts['s'] = int(clock.group(3))
+    if not parts:
+        return None
+
+    remaining = timedelta(seconds=sum(UNIT_SECONDS[key] * value for key, value in parts.items()))
+    precision = min(UNIT_SECONDS[key] for key in parts)
+    if precision <= 60:
+        confidence = 'high'
+    elif precision == 3600:
+        confidence = 'medium'
+    else:
+        confidence = 'low'  # tylko dni - błąd do doby
+    return remaining, confidence, timedelta(seconds=precision)
+
+
+def resolve_expiration(tile, anchor):
+    """Wylicza Expiration dla metadanych kafelka (jak z extract_tile_metadata) względem `anchor`.
+
+    `anchor` to datetime ze strefą - chwila odczytu listy, wspólna dla wszystkich kafelków.
+    """
+    end = parse_end_timestamp(tile.get('end_timestamp'))
+    if end is not None:
+        if end < anchor:
+            return Expiration(end, 'timestamp', 'low', "czas końca w przeszłości")
+        return Expiration(end, 'timestamp', 'high', None)
+
+    label = parse_countdown_label(tile.get('aria_label'))
+    spans = parse_countdown_spans(tile.get('days'), tile.get('hours'), tile.get('minutes'), tile.get('seconds'))
+    if spans is not None:
+        remaining, confidence = spans
+        note = None
+        if label is not None:
+            # Tolerancja: dokładność etykiety plus minuta na tykanie licznika między odczytami
+            if abs(label[0] - remaining) > label[2] + timedelta(minutes=1):
+                confidence = 'low'
+                note = f"licznik ({remaining}) i aria-label ({label[0]}) się nie zgadzają"
+        return Expiration(anchor + remaining, 'spans', confidence, note)
+
+    if label is not None:
+        remaining, confidence, _ = label
+        return Expiration(anchor + remaining, 'aria-label', confidence, None)
+
+    if tile.get('has_countdown'):
+        return Expiration(None, None, 'none', "nie udało się odczytać licznika")
+    return Expiration(None, None, 'none', "brak licznika")
+
+
+# --- Korpus przypadków (python bundle_expiration.py) ---
+ANCHOR = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+UTC = timezone.utc
+
+CORPUS = [
+    # (opis, metadane kafelka, oczekiwany expires_at, źródło, pewność)
+    ("spany z dniami",
+     {'days': "3 Days Left", 'hours': "04", 'minutes': "15"},
+     datetime(2026, 1, 4, 16, 15, tzinfo=UTC), 'spans', 'high'),
+    ("spany, jeden dzień",
+     {'days': "1 Day Left", 'hours': "0", 'minutes': "5"},
+     datetime(2026, 1, 2, 12, 5, tzinfo=UTC), 'spans', 'high'),
+    ("spany z sekundami",
+     {'days': "0 Days Left", 'hours': "1", 'minutes': "2", 'seconds': "30"},
+     datetime(2026, 1, 1, 13, 2, 30, tzinfo=UTC), 'spans', 'high'),
+    ("spany bez liczby dni (ostatni dzień)",
+     {'days': "", 'hours': "7", 'minutes': "30"},
+     datetime(2026, 1, 1, 19, 30, tzinfo=UTC), 'spans', 'medium'),
+    ("spany zgodne z aria-label",
+     {'days': "2 Days Left", 'hours': "3", 'minutes': "4",
+      'aria_label': "2 days, 3 hours, 4 minutes, and 59 seconds left"},
+     datetime(2026, 1, 3, 15, 4, tzinfo=UTC), 'spans', 'high'),
+    ("spany niezgodne z aria-label",
+     {'days': "9 Days Left", 'hours': "3", 'minutes': "4",
+      'aria_label': "2 days, 3 hours, 4 minutes, and 5 seconds left"},
+     datetime(2026, 1, 10, 15, 4, tzinfo=UTC), 'spans', 'low'),
+    ("aria-label pełny",
+     {'aria_label': "2 days, 3 hours, 4 minutes, and 5 seconds left"},
+     datetime(2026, 1, 3, 15, 4, 5, tzinfo=UTC), 'aria-label', 'high'),
+    ("aria-label liczba pojedyncza",
+     {'aria_label': "1 day, 1 hour, 1 minute, and 1 second left"},
+     datetime(2026, 1, 2, 13, 1, 1, tzinfo=UTC), 'aria-label', 'high'),
+    ("aria-label bez dni",
+     {'aria_label': "5 hours, 10 minutes, and 0 seconds left"},
+     datetime(2026, 1, 1, 17, 10, tzinfo=UTC), 'aria-label', 'high'),
+    ("aria-label tylko godziny",
+     {'aria_label': "Ends in 5 hours"},
+     datetime(2026, 1, 1, 17, 0, tzinfo=UTC), 'aria-label', 'medium'),
+    ("aria-label tylko dni",
+     {'aria_label': "14 days left"},
+     datetime(2026, 1, 15, 12, 0, tzinfo=UTC), 'aria-label', 'low'),
+    ("aria-label skrócony",
+     {'aria_label': "3d 4h 5m"},
+     datetime(2026, 1, 4, 16, 5, tzinfo=UTC), 'aria-label', 'high'),
+    ("aria-label zegar",
+     {'aria_label': "Ends in 23:59:10"},
+     datetime(2026, 1, 2, 11, 59, 10, tzinfo=UTC), 'aria-label', 'high'),
+    ("znacznik ISO z Z",
+     {'end_timestamp': "2026-01-20T18:00:00Z", 'aria_label': "1 day left"},
+     datetime(2026, 1, 20, 18, 0, tzinfo=UTC), 'timestamp', 'high'),
+    ("znacznik ISO naiwny (UTC)",
+     {'end_timestamp': "2026-01-20T18:00:00"},
+     datetime(2026, 1, 20, 18, 0, tzinfo=UTC), 'timestamp', 'high'),
+    ("znacznik ISO z przesunięciem",
+     {'end_timestamp': "2026-01-20T20:00:00+02:00"},
+     datetime(2026, 1, 20, 18, 0, tzinfo=UTC), 'timestamp', 'high'),
+    ("znacznik epoka w sekundach",
+     {'end_timestamp': "1768932000"},
+     datetime(2026, 1, 20, 18, 0, tzinfo=UTC), 'timestamp', 'high'),
+    ("znacznik epoka w milisekundach",
+     {'end_timestamp': 1768932000000},
+     datetime(2026, 1, 20, 18, 0, tzinfo=UTC), 'timestamp', 'high'),
+    ("znacznik w przeszłości",
+     {'end_timestamp': "2025-12-31T00:00:00Z"},
+     datetime(2025, 12, 31, 0, 0, tzinfo=UTC), 'timestamp', 'low'),
+    ("błędny znacznik, licznik ze spanów",
+     {'end_timestamp': "wkrótce", 'days': "1 Day Left", 'hours': "2", 'minutes': "3"},
+     datetime(2026, 1, 2, 14, 3, tzinfo=UTC), 'spans', 'high'),
+    ("licznik nieczytelny",
+     {'has_countdown': True, 'days': "Days Left", 'hours': "", 'minutes': "", 'aria_label': "soon"},
+     None, None, 'none'),
+    ("brak licznika",
+     {'has_countdown': False},
+     None, None, 'none'),
+]
+
+
+def run_corpus():
+    """Sprawdza resolve_expiration na korpusie; zwraca liczbę błędów."""
+    failures = 0
+    for description, tile, expires_at, source, confidence in CORPUS:
+        result = resolve_expiration(tile, ANCHOR)
+        if (result.expires_at, result.source, result.confidence) != (expires_at, source, confidence):
+            failures += 1
+            print(f"BŁĄD {description}: {result} (oczekiwano {expires_at}, {source}, {confidence})")
+    print(f"Korpus dat wygaśnięcia: {len(CORPUS) - failures}/{len(CORPUS)} poprawnych")
+    return failures
+
+
+if __name__ == "__main__":
+    raise SystemExit(1 if run_corpus() else 0)
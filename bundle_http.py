@@ -0,0 +1,702 @@
+"""Backend HTTP scraperów bundli: strony pobierane asynchronicznie (aiohttp) i parsowane bez przeglądarki.
+
+Zwraca takie same słowniki bundle_info jak ścieżka Selenium (extract_bundle_info),
+ale bez uruchamiania Chrome. Ustaw HUMBLE_BUNDLES_BASE_URL (np. http://127.0.0.1:8000),
+żeby pobierać listę i strony bundli z lokalnego serwera z zapisanymi stronami (fixtures).
+
+`python bundle_http.py` uruchamia samosprawdzenie: pobiera strony FIXTURE_PAGES z lokalnego
+serwera i sprawdza listę, daty wygaśnięcia i strony bundli; z `--browser` otwiera te same
+strony w Chrome (extract_tile_metadata, extract_bundle_info) i porównuje oba wyniki.
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import threading
+from html.parser import HTMLParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urljoin, urlsplit
+
+import aiohttp
+
+from bundle_expiration import END_TIMESTAMP_ATTRIBUTES
+
+# --- Konfiguracja ---
+BUNDLES_BASE_URL = os.environ.get('HUMBLE_BUNDLES_BASE_URL', "https://www.humblebundle.com")
+LISTING_PATH = "/bundles"
+CONCURRENCY = 8        # jednoczesne żądania (i połączenia w puli)
+REQUEST_TIMEOUT = 30
+MAX_RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+NOT_MODIFIED = object()  # Zamiast HTML, gdy serwer odpowiedział 304 na żądanie warunkowe
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+# Teksty używane przez ścieżkę Selenium, gdy nie uda się czegoś znaleźć
+UNKNOWN_TITLE = "Nieznany tytuł"
+UNKNOWN_PRICE = "Cena nieznana"
+MISSING_CONTENTS = "Nie udało się pobrać zawartości"
+
+# Alternatywne selektory ceny z extract_bundle_info (".price-info, .fine-print, .price-text")
+FALLBACK_PRICE_CLASSES = ("price-info", "fine-print", "price-text")
+# Odpowiedniki COUNTDOWN_SELECTORS z bundle_common, w tej samej kolejności prób
+COUNTDOWN_MATCHERS = (
+    lambda element: 'js-countdown-timer' in element.classes(),
+    lambda element: 'timer-wrapper' in element.classes(),
+    lambda element: {'js-countdown-timer', 'is-hidden'} <= set(element.classes()),
+    lambda element: 'days' in (element.attrs.get('aria-label') or ""),
+)
+# Elementy blokowe - w tekście Selenium (.text) zaczynają nową linię
+BLOCK_TAGS = {'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'fieldset',
+              'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li',
+              'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+
+def visible_text(text):
+    """Normalizuje tekst jak WebElement.text: zwinięte spacje w liniach, bez pustych linii."""
+    lines = (re.sub(r"[ \t\r\f\v\xa0]+", " ", line).strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def title_from_url(url):
+    """Tytuł bundla z ostatniego segmentu URL (tak samo jak w extract_bundle_info)."""
+    try:
+        bundle_name = url.split('/')[-1].split('?')[0]
+        return bundle_name.replace('-', ' ').replace('_', ' ').title()
+    except Exception:
+        return UNKNOWN_TITLE
+
+
+class _BundlePageParser(HTMLParser):
+    """Jednoprzebiegowy parser zbierający tekst elementów, które czyta ścieżka Selenium.
+
+    Zbiera: label.preset-price, span.item-title, pierwszy element z FALLBACK_PRICE_CLASSES
+    oraz treść skryptów application/json.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []  # (tag, lista zbieranych tekstów albo None)
+        self.price_labels = []
+        self.item_titles = []
+        self.fallback_price = None
+        self.json_scripts = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or "").split()
+        capture = None
+        if tag == 'label' and 'preset-price' in classes:
+            capture = []
+            self.price_labels.append(capture)
+        elif tag == 'span' and 'item-title' in classes:
+            capture = []
+            self.item_titles.append(capture)
+        elif self.fallback_price is None and any(name in classes for name in FALLBACK_PRICE_CLASSES):
+            capture = []
+            self.fallback_price = capture
+        elif tag == 'script' and 'json' in (attrs.get('type') or ""):
+            capture = []
+            self.json_scripts.append(capture)
+
+        if tag in BLOCK_TAGS:
+            self.append_text("\n")
+        if tag not in VOID_TAGS:
+            self.stack.append((tag, capture))
+
+    def handle_endtag(self, tag):
+        # Zamknij elementy aż do pasującego znacznika (tolerancja na niedomknięty HTML)
+        if not any(open_tag == tag for open_tag, _ in self.stack):
+            return
+        while self.stack:
+            open_tag, _ = self.stack.pop()
+            if open_tag == tag:
+                break
+        if tag in BLOCK_TAGS:
+            self.append_text("\n")
+
+    def handle_data(self, data):
+        # Znaki nowej linii w źródle to zwykłe odstępy; linie wyznaczają tylko elementy blokowe
+        if self.stack and self.stack[-1][0] == 'script':
+            self.append_text(data)
+        else:
+            self.append_text(re.sub(r"\s+", " ", data))
+
+    def append_text(self, text):
+        # Tekst trafia do wszystkich zbieranych przodków (np. label w .price-info)
+        for _, capture in self.stack:
+            if capture is not None:
+                capture.append(text)
+
+    def texts(self, captures):
+        return [visible_text("".join(capture)) for capture in captures]
+
+    def json_documents(self):
+        return _json_documents("".join(capture) for capture in self.json_scripts)
+
+
+class _Element:
+    """Węzeł drzewa strony listy: tag, atrybuty i dzieci (elementy albo tekst)."""
+
+    __slots__ = ('tag', 'attrs', 'children', 'parent')
+
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        self.parent = parent
+
+    def classes(self):
+        return (self.attrs.get('class') or "").split()
+
+    def descendants(self):
+        """Elementy potomne w kolejności dokumentu (jak querySelectorAll)."""
+        stack = [child for child in reversed(self.children) if isinstance(child, _Element)]
+        while stack:
+            element = stack.pop()
+            yield element
+            stack.extend(child for child in reversed(element.children) if isinstance(child, _Element))
+
+    def find(self, predicate):
+        """Pierwszy potomek spełniający warunek albo None (jak querySelector)."""
+        return next((element for element in self.descendants() if predicate(element)), None)
+
+    def text_content(self):
+        return "".join(child if isinstance(child, str) else child.text_content() for child in self.children)
+
+
+class _TreeBuilder(HTMLParser):
+    """Buduje drzewo _Element strony listy - kafelki czyta się jak w TILE_METADATA_SCRIPT."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Element('#document', {}, None)
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        element = _Element(tag, dict(attrs), self.current)
+        self.current.children.append(element)
+        if tag not in VOID_TAGS:
+            self.current = element
+
+    def handle_endtag(self, tag):
+        # Niedomknięte elementy zamyka pasujący znacznik przodka; bez pasującego - ignorowany
+        element = self.current
+        while element is not self.root and element.tag != tag:
+            element = element.parent
+        if element is not self.root:
+            self.current = element.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+
+def _json_documents(texts):
+    documents = []
+    for text in texts:
+        try:
+            documents.append(json.loads(text))
+        except ValueError:
+            continue
+    return documents
+
+
+def _end_timestamp(tile):
+    """Pierwszy atrybut końca z END_TIMESTAMP_ATTRIBUTES na kafelku albo jego potomkach."""
+    for element in [tile, *tile.descendants()]:
+        for name in END_TIMESTAMP_ATTRIBUTES:
+            if element.attrs.get(name):
+                return element.attrs[name]
+    return None
+
+
+def tile_metadata(tile, page_url):
+    """Metadane kafelka .tile-holder - te same pola co extract_tile_metadata w przeglądarce."""
+    def text(root, class_name):
+        element = root.find(lambda element: class_name in element.classes())
+        return element.text_content().strip() if element is not None else None
+
+    link = tile.find(lambda element: element.tag == 'a')
+    countdown = None
+    for matcher in COUNTDOWN_MATCHERS:
+        countdown = tile.find(matcher)
+        if countdown is not None:
+            break
+    return {
+        'url': urljoin(page_url, link.attrs['href']) if link is not None and link.attrs.get('href') else None,
+        'has_countdown': countdown is not None,
+        'days': text(countdown, 'js-days') if countdown is not None else None,
+        'hours': text(countdown, 'js-hours') if countdown is not None else None,
+        'minutes': text(countdown, 'js-minutes') if countdown is not None else None,
+        'seconds': text(countdown, 'js-seconds') if countdown is not None else None,
+        'aria_label': countdown.attrs.get('aria-label') if countdown is not None else None,
+        'end_timestamp': _end_timestamp(tile),
+    }
+
+
+def _walk_json(value):
+    """Zwraca wszystkie słowniki zagnieżdżone w dokumencie JSON."""
+    if isinstance(value, dict):
+        yield value
+        for child in value.values():
+            yield from _walk_json(child)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _walk_json(child)
+
+
+def _json_item_titles(documents):
+    """Nazwy pozycji bundla z osadzonego JSON strony (bundleData.tier_item_data)."""
+    titles = []
+    for document in documents:
+        for node in _walk_json(document):
+            tier_items = node.get('tier_item_data')
+            if isinstance(tier_items, dict):
+                titles.extend(item.get('human_name', "").strip() for item in tier_items.values()
+                              if isinstance(item, dict))
+    return [title for title in titles if title]
+
+
+def parse_bundle_page(html, url):
+    """bundle_info (title, price_range, tier_count, contents, url) z HTML strony bundla - odpowiednik extract_bundle_info.
+
+    Strony bez span.item-title w HTML dostają 'needs_browser': True (patrz complete_in_browser).
+    """
+    parser = _BundlePageParser()
+    parser.feed(html)
+    parser.close()
+
+    price_labels = parser.texts(parser.price_labels)
+    if price_labels:
+        # Bierzemy pierwszą (najniższą) cenę
+        price_range = price_labels[0]
+    elif parser.fallback_price is not None:
+        price_range = parser.texts([parser.fallback_price])[0].split('\n')[0]
+    else:
+        price_range = UNKNOWN_PRICE
+
+    bundle_info = {
+        'title': title_from_url(url),
+        'price_range': price_range,
+        'tier_count': len(price_labels),
+        'contents': [text for text in parser.texts(parser.item_titles) if text],
+        'url': url
+    }
+    if not parser.item_titles:
+        # Strona renderowana po stronie klienta - progi i ceny są dopiero po uruchomieniu skryptów,
+        # w HTML jest tylko lista pozycji w osadzonym JSON. Wywołujący dokańcza ją w przeglądarce
+        # (bundle_common.complete_in_browser), zamiast zapisywać 0 progów i nieznaną cenę.
+        bundle_info['contents'] = _json_item_titles(parser.json_documents()) or [MISSING_CONTENTS]
+        bundle_info['needs_browser'] = True
+    return bundle_info
+
+
+def parse_listing(html, base_url=BUNDLES_BASE_URL):
+    """Zwraca [(url, metadane kafelka)] bundli ze strony /bundles, bez duplikatów, w kolejności strony.
+
+    Metadane mają pola extract_tile_metadata (licznik, aria-label, atrybut końca), więc datę
+    wygaśnięcia wylicza to samo bundle_expiration.resolve_expiration co w ścieżce Selenium.
+    Linki pochodzą z kafelków .tile-holder, a jeśli ich brak - z osadzonego JSON (product_url);
+    end_date|datetime z JSON uzupełnia tylko kafelki bez licznika i atrybutu końca.
+    """
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    page_url = base_url.rstrip('/') + LISTING_PATH
+
+    json_tiles = []
+    for document in _json_documents(element.text_content() for element in builder.root.descendants()
+                                    if element.tag == 'script' and 'json' in (element.attrs.get('type') or "")):
+        for node in _walk_json(document):
+            product_url = node.get('product_url')
+            if isinstance(product_url, str) and product_url:
+                json_tiles.append({'url': urljoin(page_url, product_url), 'has_countdown': False,
+                                   'end_timestamp': node.get('end_date|datetime')})
+    json_ends = {tile['url']: tile['end_timestamp'] for tile in json_tiles if tile['end_timestamp']}
+
+    tiles = [tile_metadata(element, page_url) for element in builder.root.descendants()
+             if 'tile-holder' in element.classes()]
+    listing = {}
+    for tile in tiles or json_tiles:
+        url = tile['url']
+        if not url or urlsplit(url).scheme not in ("http", "https") or url in listing:
+            continue
+        if not tile['has_countdown'] and not tile['end_timestamp'] and url in json_ends:
+            tile = dict(tile, end_timestamp=json_ends[url])
+        listing[url] = tile
+    return list(listing.items())
+
+
+async def _fetch(session, semaphore, url, validators=None):
+    """Pobiera jedną stronę z ponowieniami; zwraca (końcowy URL, HTML, walidatory) albo (url, None, {}).
+
+    `validators` to (etag, last_modified) z poprzedniego pobrania - wtedy żądanie jest warunkowe,
+    a przy odpowiedzi 304 zamiast HTML zwracane jest NOT_MODIFIED.
+    """
+    headers = {}
+    if validators:
+        etag, last_modified = validators
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+    async with semaphore:
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                        await asyncio.sleep(attempt)
+                        continue
+                    page_validators = {'etag': response.headers.get('ETag'),
+                                       'last_modified': response.headers.get('Last-Modified')}
+                    if response.status == 304:
+                        return str(response.url), NOT_MODIFIED, page_validators
+                    response.raise_for_status()
+                    return str(response.url), await response.text(), page_validators
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == MAX_RETRIES:
+                    print(f"Nie udało się pobrać {url}: {e}")
+                    return url, None, {}
+                await asyncio.sleep(attempt)
+    return url, None, {}
+
+
+def _new_session(concurrency):
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    headers = {'User-Agent': USER_AGENT, 'Accept-Language': "en-US,en;q=0.9"}
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers)
+
+
+async def _fetch_listing(session, semaphore, base_url):
+    _, listing_html, _ = await _fetch(session, semaphore, base_url.rstrip('/') + LISTING_PATH)
+    if listing_html is None:
+        return []
+    return parse_listing(listing_html, base_url)
+
+
+async def _fetch_bundles(base_url, concurrency, validators):
+    async with _new_session(concurrency) as session:
+        semaphore = asyncio.Semaphore(concurrency)
+        listing = await _fetch_listing(session, semaphore, base_url)
+        if not listing:
+            return [], []
+        print(f"Znaleziono {len(listing)} bundli, pobieram strony ({concurrency} jednocześnie)...")
+        pages = await asyncio.gather(*(_fetch(session, semaphore, url, validators.get(url))
+                                       for url, _ in listing))
+    return listing, pages
+
+
+def _parse_pages(pages):
+    bundle_data = []
+    not_modified = 0
+    for final_url, html, page_validators in pages:
+        if html is None:
+            continue
+        if html is NOT_MODIFIED:
+            # Strona bez zmian - resztę danych uzupełnia wywołujący z bazy
+            bundle_info = {'url': final_url, 'not_modified': True}
+            not_modified += 1
+        else:
+            bundle_info = parse_bundle_page(html, final_url)
+            if bundle_info.get('needs_browser'):
+                print(f"{bundle_info['title']}: strona renderowana w przeglądarce, "
+                      f"{len(bundle_info['contents'])} elementów w JSON")
+            else:
+                print(f"{bundle_info['title']}: {bundle_info['price_range']}, {len(bundle_info['contents'])} elementów")
+        bundle_info.update(page_validators)
+        bundle_data.append(bundle_info)
+    if not_modified:
+        print(f"Bez zmian od poprzedniego pobrania (304): {not_modified} stron")
+    return bundle_data
+
+
+def fetch_bundles(base_url=BUNDLES_BASE_URL, concurrency=CONCURRENCY, validators=None):
+    """Pobiera listę bundli i wszystkie strony bundli bez przeglądarki.
+
+    Zwraca (listing, bundle_data): listing to [(url, metadane kafelka)] jak parse_listing, a bundle_data
+    to słowniki bundle_info w kolejności listy (pomija strony, których nie udało się pobrać).
+    Każdy bundle_info ma też etag i last_modified strony. `validators` to {url: (etag, last_modified)}
+    z poprzedniego przebiegu - niezmienione strony wracają jako {'url', 'not_modified': True, ...},
+    a strony renderowane po stronie klienta z 'needs_browser': True.
+    """
+    start = time.perf_counter()
+    listing, pages = asyncio.run(_fetch_bundles(base_url, concurrency, validators or {}))
+    bundle_data = _parse_pages(pages)
+    print(f"Pobrano {len(bundle_data)}/{len(listing)} stron bundli w {time.perf_counter() - start:.2f} s")
+    return listing, bundle_data
+
+
+class BundleSession:
+    """Ciepła sesja HTTP dla trybu ciągłego: jedna pętla asyncio i pula połączeń na wiele przebiegów.
+
+    W odróżnieniu od fetch_bundles lista i strony bundli są pobierane osobno, więc można
+    pobrać tylko wybrane strony. Po zakończeniu trzeba wywołać close().
+    """
+
+    def __init__(self, base_url=BUNDLES_BASE_URL, concurrency=CONCURRENCY):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.loop = asyncio.new_event_loop()
+        self.semaphore = None
+        self.session = None
+
+    async def _open(self):
+        if self.session is None or self.session.closed:
+            self.session = _new_session(self.concurrency)
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+        return self.session
+
+    async def _listing(self):
+        return await _fetch_listing(await self._open(), self.semaphore, self.base_url)
+
+    async def _pages(self, urls, validators):
+        session = await self._open()
+        return await asyncio.gather(*(_fetch(session, self.semaphore, url, validators.get(url)) for url in urls))
+
+    def fetch_listing(self):
+        """Zwraca [(url, metadane kafelka)] jak parse_listing (pusta lista, gdy strona się nie pobrała)"""
+        return self.loop.run_until_complete(self._listing())
+
+    def fetch_pages(self, urls, validators=None):
+        """Pobiera podane strony bundli; zwraca słowniki bundle_info jak fetch_bundles"""
+        start = time.perf_counter()
+        bundle_data = _parse_pages(self.loop.run_until_complete(self._pages(urls, validators or {})))
+        print(f"Pobrano {len(bundle_data)}/{len(urls)} stron bundli w {time.perf_counter() - start:.2f} s")
+        return bundle_data
+
+    def close(self):
+        if self.session is not None and not self.session.closed:
+            self.loop.run_until_complete(self.session.close())
+        self.loop.close()
+
+
+# --- Samosprawdzenie na lokalnym serwerze ---
+# Lista bez osadzonego JSON: daty wygaśnięcia tylko z liczników i atrybutów kafelków
+FIXTURE_PAGES = {
+    LISTING_PATH: """
+<html><body>
+  <div class="tile-holder"><a href="/games/alpha-bundle">Alpha</a>
+    <div class="js-countdown-timer" aria-label="3 days, 4 hours, 5 minutes, and 6 seconds left">
+      <span class="js-days">3 Days Left</span> <span class="js-hours">04</span>
+      <span class="js-minutes">05</span> <span class="js-seconds">06</span></div></div>
+  <div class="tile-holder"><a href="/books/beta_bundle?hmb_source=navbar">Beta</a>
+    <span class="timer-wrapper" data-end-date="2030-01-20T18:00:00Z"></span></div>
+  <div class="tile-holder"><a href="/games/alpha-bundle">Alpha (duplikat)</a></div>
+</body></html>
+""",
+    "/games/alpha-bundle": """
+<html><body>
+  <div class="price-info"><label class="preset-price">€1</label>
+    <label class="preset-price"> €10
+      <span class="tier-note">lub więcej</span></label></div>
+  <div class="items">
+    <span class="item-title">Game   One</span>
+    <span class="item-title"> </span>
+    <span class="item-title">Game&nbsp;Two</span>
+  </div>
+</body></html>
+""",
+    # Strona renderowana po stronie klienta: progi i pozycje tworzy skrypt z osadzonego JSON,
+    # więc w HTML ich nie ma - cenę i progi zna dopiero przeglądarka
+    "/books/beta_bundle": """
+<html><body>
+  <div id="react-root"></div>
+  <script type="application/json" id="webpack-bundle-page-data">
+    {"bundleData": {"tier_pricing_data": {"t1": {"price": "€5"}, "t2": {"price": "€12"}, "t3": {"price": "€20"}},
+                    "tier_item_data": {"b1": {"human_name": "Book One"}, "b2": {"human_name": "Book Two"}}}}
+  </script>
+  <script>
+    const data = JSON.parse(document.getElementById('webpack-bundle-page-data').textContent).bundleData;
+    const root = document.getElementById('react-root');
+    for (const tier of Object.values(data.tier_pricing_data)) {
+        const label = document.createElement('label');
+        label.className = 'preset-price';
+        label.textContent = tier.price;
+        root.appendChild(label);
+    }
+    for (const item of Object.values(data.tier_item_data)) {
+        const title = document.createElement('span');
+        title.className = 'item-title';
+        title.textContent = item.human_name;
+        root.appendChild(title);
+    }
+  </script>
+</body></html>
+""",
+}
+
+# Lista tylko z osadzonym JSON (bez kafelków w HTML) - sprawdzana bez serwera
+FIXTURE_JSON_LISTING = """
+<html><body><script type="application/json">
+  {"mosaic": [{"products": [{"product_url": "/games/gamma-bundle", "end_date|datetime": "2030-02-01T12:00:00"},
+                            {"product_url": "/games/delta-bundle"}]}]}
+</script></body></html>
+"""
+
+# Zawartość HTML stron serwowanych bez skryptów (to, co czyta parser; url bez hosta)
+FIXTURE_SERVER_RENDERED = [
+    {'title': "Alpha Bundle", 'price_range': "€1", 'tier_count': 2,
+     'contents': ["Game One", "Game Two"], 'url': "/games/alpha-bundle"},
+]
+BUNDLE_FIELDS = ('title', 'price_range', 'tier_count', 'contents', 'url')
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serwuje FIXTURE_PAGES z ETag i odpowiada 304 na żądania warunkowe, jak humblebundle.com."""
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path not in FIXTURE_PAGES:
+            self.send_error(404)
+            return
+        etag = f'"{abs(hash(FIXTURE_PAGES[path]))}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        data = FIXTURE_PAGES[path].encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server():
+    """Uruchamia FixtureHandler na wolnym porcie; zwraca (serwer, base_url)."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class _SelfCheck:
+    def __init__(self):
+        self.checks = 0
+        self.failures = 0
+
+    def expect(self, condition, message):
+        self.checks += 1
+        if not condition:
+            self.failures += 1
+            print(f"BŁĄD: {message}")
+
+
+def _check_parser(check, base_url, listing, bundle_data):
+    """Sprawdzenia bez przeglądarki: lista, daty wygaśnięcia, strony i żądania warunkowe."""
+    from datetime import datetime, timezone
+    from bundle_expiration import resolve_expiration
+
+    alpha_url, beta_url = base_url + "/games/alpha-bundle", base_url + "/books/beta_bundle?hmb_source=navbar"
+    check.expect([url for url, _ in listing] == [alpha_url, beta_url], f"lista {[url for url, _ in listing]}")
+
+    anchor = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    tiles = dict(listing)
+    if alpha_url in tiles and beta_url in tiles:
+        alpha, beta = resolve_expiration(tiles[alpha_url], anchor), resolve_expiration(tiles[beta_url], anchor)
+        check.expect((alpha.expires_at, alpha.source, alpha.confidence)
+                     == (datetime(2026, 1, 4, 16, 5, 6, tzinfo=timezone.utc), 'spans', 'high'),
+                     f"licznik kafelka bez JSON: {alpha}")
+        check.expect((beta.expires_at, beta.source)
+                     == (datetime(2030, 1, 20, 18, 0, tzinfo=timezone.utc), 'timestamp'),
+                     f"atrybut końca kafelka bez JSON: {beta}")
+
+    json_listing = parse_listing(FIXTURE_JSON_LISTING, base_url)
+    json_expirations = [resolve_expiration(tile, anchor).expires_at for _, tile in json_listing]
+    check.expect([url for url, _ in json_listing] == [base_url + "/games/gamma-bundle",
+                                                      base_url + "/games/delta-bundle"]
+                 and json_expirations == [datetime(2030, 2, 1, 12, 0, tzinfo=timezone.utc), None],
+                 f"lista z JSON: {json_listing}")
+
+    for expected in FIXTURE_SERVER_RENDERED:
+        url = base_url + expected['url']
+        bundle_info = next((bundle for bundle in bundle_data if bundle['url'] == url), {})
+        expected = dict(expected, url=url)
+        differences = {key: (bundle_info.get(key), value) for key, value in expected.items()
+                       if bundle_info.get(key) != value}
+        check.expect(not differences and not bundle_info.get('needs_browser'), f"{url}: {differences}")
+
+    # Strona renderowana po stronie klienta: tylko lista pozycji z JSON i flaga do dokończenia
+    beta = next((bundle for bundle in bundle_data if bundle['url'] == beta_url), {})
+    check.expect(beta.get('needs_browser') and beta.get('contents') == ["Book One", "Book Two"],
+                 f"{beta_url} nie jest oznaczona do dokończenia w przeglądarce: {beta}")
+
+    # Drugi przebieg z walidatorami - niezmienione strony wracają jako 304
+    validators = {bundle['url']: (bundle['etag'], bundle['last_modified']) for bundle in bundle_data}
+    _, repeated = fetch_bundles(base_url, concurrency=2, validators=validators)
+    check.expect(repeated and all(bundle.get('not_modified') for bundle in repeated),
+                 f"żądania warunkowe nie zwróciły 304: {repeated}")
+
+
+def _check_browser(check, base_url, listing, bundle_data):
+    """Parzystość z Selenium: kafelki i bundle_info z Chrome mają być takie same jak z backendu HTTP.
+
+    Wzorcem są extract_tile_metadata i extract_bundle_info na tych samych stronach; strony
+    renderowane po stronie klienta backend HTTP dokańcza przez complete_in_browser.
+    """
+    from bundle_common import bundle_driver_pool, complete_in_browser, extract_tile_metadata
+    from BundleScraperAlpha import HumbleBundleScraper
+
+    scraper = HumbleBundleScraper(backend="http")
+    pool = bundle_driver_pool(headless=True)
+    http_bundles = {bundle['url']: bundle
+                    for bundle in complete_in_browser([dict(bundle) for bundle in bundle_data],
+                                                      scraper.extract_bundle_info, 1, pool=pool)}
+    driver = pool.acquire()
+    try:
+        driver.get(base_url + LISTING_PATH)
+        browser_tiles = {}
+        for tile in extract_tile_metadata(driver):
+            browser_tiles.setdefault(tile['url'], tile)
+        check.expect([tile['url'] for tile in browser_tiles.values()] == [url for url, _ in listing],
+                     f"lista: przeglądarka {list(browser_tiles)}")
+        for url, tile in listing:
+            check.expect(browser_tiles.get(url) == tile,
+                         f"kafelek {url}: HTTP {tile} != przeglądarka {browser_tiles.get(url)}")
+            driver.get(url)
+            browser_info = scraper.extract_bundle_info(driver)
+            http_info = http_bundles.get(url, {})
+            differences = {key: (http_info.get(key), browser_info.get(key)) for key in BUNDLE_FIELDS
+                           if http_info.get(key) != browser_info.get(key)}
+            check.expect(not differences, f"{url}: HTTP != przeglądarka {differences}")
+    finally:
+        pool.release(driver)
+
+
+def run_self_check(browser=False):
+    """Sprawdza backend HTTP na FIXTURE_PAGES z lokalnego serwera; zwraca liczbę błędów.
+
+    Z `browser=True` te same strony są też otwierane w Chrome ścieżką Selenium, a jej wynik
+    (zamiast wartości zapisanych w kodzie) jest wzorcem dla backendu HTTP.
+    """
+    check = _SelfCheck()
+    server, base_url = start_fixture_server()
+    try:
+        listing, bundle_data = fetch_bundles(base_url, concurrency=2)
+        _check_parser(check, base_url, listing, bundle_data)
+        if browser:
+            _check_browser(check, base_url, listing, bundle_data)
+        else:
+            print("Porównanie z przeglądarką pominięte (python bundle_http.py --browser, wymaga Chrome)")
+    except Exception as e:
+        check.expect(False, f"samosprawdzenie przerwane: {e}")
+    finally:
+        server.shutdown()
+    print(f"Samosprawdzenie backendu HTTP: {check.checks - check.failures}/{check.checks} testów zaliczonych")
+    return check.failures
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Samosprawdzenie backendu HTTP na lokalnych stronach testowych")
+    parser.add_argument('--browser', action='store_true',
+                        help="porównaj też z wynikiem ścieżki Selenium (headless Chrome)")
+    raise SystemExit(1 if run_self_check(parser.parse_args().browser) else 0)
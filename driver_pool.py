@@ -0,0 +1,373 @@
+"""Shared Chrome session pool for the scrapers (bundle scrapers and both humbleparser scripts).
+
+A fresh webdriver.Chrome() starts with an empty profile and costs several seconds per run.
+Drivers taken from a pool instead get:
+
+* a persistent profile - every pool slot has its own user-data-dir under PROFILE_ROOT, so the
+                         HTTP cache and cookies survive between runs
+* attach               - with keep_alive, browsers are left running at exit and the next run
+                         attaches to them through the DevTools port Chrome records in the
+                         profile (DevToolsActivePort) instead of launching a new one
+* profile locks        - a process holds a lock file in every profile it uses, so a concurrent
+                         run with the same pool name gets the next free profile instead of
+                         attaching to (and later closing) a browser that is still in use
+* health checks        - an idle driver is checked before it is handed out again and replaced
+                         if the browser died or stopped responding
+* recycling            - a driver is quit and replaced after max_pages page loads, which caps
+                         Chrome's memory growth in long runs
+
+Pools are per process and per name (like scraper_storage.connect). Callers return drivers with
+release() instead of quit(); every pool is closed (or detached, with keep_alive) at interpreter
+exit, or explicitly with close_all(). Only a browser that a pool deliberately left running
+(keep_alive) is attached to; a browser still running on a profile for any other reason (another
+process, a crashed run) is left alone and the pool moves on to the next profile, and so is a
+detached browser that cannot be attached to.
+"""
+
+import os
+import atexit
+import socket
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+
+# --- Configuration ---
+PROFILE_ROOT = os.environ.get('SCRAPER_PROFILE_DIR',
+                              os.path.join(os.path.expanduser('~'), '.cache', 'humble-scrapers', 'chrome'))
+KEEP_ALIVE = os.environ.get('SCRAPER_KEEP_BROWSERS') == '1'  # leave browsers running for the next run
+MAX_PAGES = 200  # page loads before a driver is recycled
+LOCK_FILE = 'scraper.lock'          # in the profile; locked by the process using the profile
+DETACHED_FILE = 'scraper.detached'  # in the profile; written when keep_alive leaves the browser running
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def _devtools_address(profile_dir):
+    """Returns 'host:port' of a Chrome still running on profile_dir, or None."""
+    try:
+        with open(os.path.join(profile_dir, 'DevToolsActivePort')) as f:
+            port = int(f.readline().strip())
+    except (OSError, ValueError):
+        return None
+    try:
+        with socket.create_connection(('127.0.0.1', port), timeout=1):
+            return f"127.0.0.1:{port}"
+    except OSError:
+        return None  # stale file left by a browser that has exited
+
+
+def _lock_profile(profile_dir):
+    """Locks profile_dir for this process; returns the open lock file, or None if another process holds it.
+
+    The OS drops the lock when the process exits, so a crashed run never leaves a stale lock.
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    handle = open(os.path.join(profile_dir, LOCK_FILE), 'a+')
+    try:
+        if fcntl:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        handle.close()
+        return None
+    handle.seek(0)
+    handle.truncate()
+    handle.write(f"{os.getpid()}\n")  # for whoever wonders which process holds the profile
+    handle.flush()
+    return handle
+
+
+def _unlock_profile(handle):
+    try:
+        if not fcntl:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        handle.close()
+    except OSError:
+        pass
+
+
+def _attach_options(options, address):
+    """Options for attaching to a running browser; launch-only settings (args, prefs) cannot apply."""
+    attach = Options()
+    attach.debugger_address = address
+    attach.page_load_strategy = options.page_load_strategy
+    logging_prefs = options.to_capabilities().get('goog:loggingPrefs')
+    if logging_prefs:
+        attach.set_capability('goog:loggingPrefs', logging_prefs)
+    perf_logging_prefs = options.experimental_options.get('perfLoggingPrefs')
+    if perf_logging_prefs:
+        attach.add_experimental_option('perfLoggingPrefs', perf_logging_prefs)
+    return attach
+
+
+class _ProfileBusy(Exception):
+    """Raised by DriverPool._start when a browser still running on the profile cannot be attached to."""
+
+
+class _Slot:
+    def __init__(self, profile_dir, lock):
+        self.profile_dir = profile_dir
+        self.lock = lock
+        self.driver = None
+        self.attached = False
+        self.pages = 0
+        self.in_use = False
+
+
+class DriverPool:
+    """Hands out Chrome drivers for one browser configuration (one options_factory).
+
+    options_factory() returns fresh ChromeOptions, service_factory() an optional Service
+    (e.g. for a custom chromedriver path) and setup(driver) runs on every new or attached driver.
+    """
+
+    def __init__(self, name, options_factory, service_factory=None, setup=None,
+                 max_pages=MAX_PAGES, keep_alive=KEEP_ALIVE):
+        self.name = name
+        self.options_factory = options_factory
+        self.service_factory = service_factory
+        self.setup = setup
+        self.max_pages = max_pages
+        self.keep_alive = keep_alive
+        self.stats = {'launched': 0, 'attached': 0, 'reused': 0, 'recycled': 0, 'unhealthy': 0}
+        self._slots = []
+        self._skipped = set()  # profiles whose detached browser could not be attached to
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Returns a healthy driver: an idle one from this pool, an attached running browser, or a new one."""
+        with self._lock:
+            slot = next((slot for slot in self._slots if not slot.in_use), None)
+            if slot is None:
+                slot = self._new_slot()
+            slot.in_use = True
+        try:
+            if slot.driver is not None and not self.is_healthy(slot.driver):
+                print(f"Driver pool '{self.name}': browser in {slot.profile_dir} is not responding, replacing it")
+                self.stats['unhealthy'] += 1
+                self._quit(slot)
+            if slot.driver is None:
+                slot = self._start_in_free_profile(slot)
+            else:
+                self.stats['reused'] += 1
+        except Exception:
+            slot.in_use = False
+            raise
+        return slot.driver
+
+    def page_loaded(self, driver, pages=1):
+        """Counts page loads towards the recycling limit."""
+        slot = self._slot_for(driver)
+        if slot is not None:
+            slot.pages += pages
+
+    def checkpoint(self, driver, pages=0, before_recycle=None):
+        """Counts `pages` and returns the driver to keep using - a fresh one if this one hit max_pages.
+
+        Call it only between independent pages; the replacement starts on about:blank.
+        before_recycle(driver) runs on the old driver before it is quit (e.g. to read its logs).
+        """
+        slot = self._slot_for(driver)
+        if slot is None:
+            return driver
+        slot.pages += pages
+        if slot.pages < self.max_pages:
+            return driver
+        print(f"Driver pool '{self.name}': recycling the browser after {slot.pages} pages")
+        if before_recycle:
+            before_recycle(driver)
+        self.stats['recycled'] += 1
+        self._quit(slot)
+        try:
+            slot = self._start_in_free_profile(slot)
+        except Exception:
+            slot.in_use = False
+            raise
+        return slot.driver
+
+    def release(self, driver):
+        """Returns a driver to the pool (recycling it if it hit max_pages)."""
+        slot = self._slot_for(driver)
+        if slot is None:
+            return
+        if slot.pages >= self.max_pages:
+            self.stats['recycled'] += 1
+            self._quit(slot)
+        slot.in_use = False
+
+    def is_healthy(self, driver):
+        try:
+            return bool(driver.window_handles) and driver.execute_script("return 1") == 1
+        except WebDriverException:
+            return False
+
+    def close(self):
+        """Quits every browser, or with keep_alive only stops chromedriver and leaves the browsers running."""
+        with self._lock:
+            slots = list(self._slots)
+        for slot in slots:
+            if slot.driver is None:
+                continue
+            if self.keep_alive:
+                try:
+                    slot.driver.service.stop()
+                except Exception as e:
+                    print(f"Driver pool '{self.name}': error detaching from the browser: {e}")
+                slot.driver = None
+                # Marks the browser as left for the next run; only such browsers are attached to
+                with open(os.path.join(slot.profile_dir, DETACHED_FILE), 'w') as f:
+                    f.write(f"{os.getpid()}\n")
+            else:
+                self._quit(slot)
+        for slot in slots:
+            _unlock_profile(slot.lock)
+        if any(self.stats.values()):
+            print(f"Driver pool '{self.name}': {self.summary()}")
+
+    def summary(self):
+        return ", ".join(f"{key} {value}" for key, value in self.stats.items())
+
+    def _new_slot(self):
+        """Locks the first free profile of this pool (called with self._lock held)."""
+        taken = {slot.profile_dir for slot in self._slots} | self._skipped
+        index = 0
+        while True:
+            profile_dir = os.path.join(PROFILE_ROOT, f"{self.name}-{index}")
+            index += 1
+            if profile_dir in taken:
+                continue
+            lock = _lock_profile(profile_dir)
+            if lock is None:
+                print(f"Driver pool '{self.name}': {profile_dir} is used by another process, trying the next profile")
+                continue
+            detached = os.path.exists(os.path.join(profile_dir, DETACHED_FILE))
+            if not detached and _devtools_address(profile_dir):
+                # Chrome allows one browser per profile and this one was not left for us to take over
+                print(f"Driver pool '{self.name}': a browser that was not detached by a pool is running on "
+                      f"{profile_dir}, trying the next profile")
+                _unlock_profile(lock)
+                continue
+            slot = _Slot(profile_dir, lock)
+            self._slots.append(slot)
+            return slot
+
+    def _slot_for(self, driver):
+        with self._lock:
+            return next((slot for slot in self._slots if slot.driver is driver), None)
+
+    def _chrome(self, options):
+        service = self.service_factory() if self.service_factory else None
+        if service is not None:
+            return webdriver.Chrome(service=service, options=options)
+        return webdriver.Chrome(options=options)
+
+    def _start_in_free_profile(self, slot):
+        """Starts a browser in slot, or in a new slot if slot's profile has to be skipped; returns the slot used."""
+        while True:
+            try:
+                self._start(slot)
+                return slot
+            except _ProfileBusy:
+                with self._lock:
+                    self._slots.remove(slot)
+                    self._skipped.add(slot.profile_dir)
+                    _unlock_profile(slot.lock)
+                    slot = self._new_slot()
+                    slot.in_use = True
+            except Exception:
+                slot.in_use = False
+                raise
+
+    def _start(self, slot):
+        os.makedirs(slot.profile_dir, exist_ok=True)
+        options = self.options_factory()
+        driver = None
+        address = None
+        detached_file = os.path.join(slot.profile_dir, DETACHED_FILE)
+        if os.path.exists(detached_file):
+            address = _devtools_address(slot.profile_dir)
+        if address:
+            try:
+                driver = self._chrome(_attach_options(options, address))
+                # Tabs left over from the previous run are closed before the driver is handed out
+                for handle in driver.window_handles[1:]:
+                    driver.switch_to.window(handle)
+                    driver.close()
+                driver.switch_to.window(driver.window_handles[0])
+                slot.attached = True
+                self.stats['attached'] += 1
+            except WebDriverException as e:
+                if driver is not None:
+                    try:
+                        driver.service.stop()  # leaves the browser running, as it was
+                    except Exception:
+                        pass
+                    driver = None
+                if _devtools_address(slot.profile_dir):
+                    # Chrome allows one browser per profile, so a new one cannot start here either
+                    print(f"Driver pool '{self.name}': could not attach to {address} ({e}), "
+                          f"trying the next profile")
+                    raise _ProfileBusy(slot.profile_dir) from e
+                print(f"Driver pool '{self.name}': the browser on {address} exited ({e}), starting a new browser")
+        if os.path.exists(detached_file):
+            os.remove(detached_file)  # from now on the profile belongs to this process
+        if driver is None:
+            options.add_argument(f"--user-data-dir={slot.profile_dir}")
+            if self.keep_alive:
+                options.add_experimental_option("detach", True)  # the browser outlives chromedriver
+            driver = self._chrome(options)
+            slot.attached = False
+            self.stats['launched'] += 1
+        slot.driver = driver
+        slot.pages = 0
+        if self.setup:
+            self.setup(driver)
+
+    def _quit(self, slot):
+        driver, slot.driver = slot.driver, None
+        if driver is None:
+            return
+        try:
+            if slot.attached:
+                driver.execute_cdp_cmd("Browser.close", {})  # quit() alone leaves an attached browser running
+        except WebDriverException:
+            pass
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Driver pool '{self.name}': error closing the browser: {e}")
+
+
+def get_pool(name, options_factory, service_factory=None, setup=None, max_pages=MAX_PAGES):
+    """Returns the process-wide pool called `name`, creating it on first use."""
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = DriverPool(name, options_factory, service_factory=service_factory, setup=setup,
+                              max_pages=max_pages)
+            _pools[name] = pool
+        return pool
+
+
+def close_all():
+    """Closes every pool; with keep_alive the browsers stay running for the next run."""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all)
@@ -0,0 +1,267 @@
+"""Browserless key backend for the humbleparser exporters.
+
+The Humble library page fills the keys table from order JSON. This module fetches that JSON
+directly with a pooled, cookie-authenticated HTTP session and builds the same
+title/key/platform/status rows as the Selenium extractors, without starting Chrome.
+
+Set HUMBLE_API_BASE_URL (e.g. http://127.0.0.1:8000) to point it at a local stub server
+that serves recorded /api/v1/user/order and /api/v1/orders fixtures.
+
+Run `python humble_api.py` to check the JSON-to-row mapping: it serves the recorded fixture
+from a local stub server and compares the rows with what humbleparser_complete's browser
+backend extracts from the same keys rendered as HTML.
+"""
+
+import os
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from humble_common import clean_text, platform_name
+
+# --- Configuration ---
+API_BASE_URL = os.environ.get('HUMBLE_API_BASE_URL', "https://www.humblebundle.com")
+ORDER_LIST_PATH = "/api/v1/user/order"
+ORDERS_PATH = "/api/v1/orders"
+ORDER_BATCH_SIZE = 40  # gamekeys per /api/v1/orders request
+MAX_WORKERS = 4        # concurrent batch requests (and pooled connections)
+REQUEST_TIMEOUT = 30
+
+
+def key_type_platform(key_type):
+    """Maps an order's key_type (e.g. 'steam', 'gog', 'epic') to the platform names used by the scrapers."""
+    return platform_name((key_type or "").replace('_', ' '))
+
+
+def order_to_rows(order, page_number, first_item_number=1):
+    """Builds key rows from one order's tpkd_dict (the data behind one group of rendered rows)."""
+    rows = []
+    for item_number, tpk in enumerate(order.get('tpkd_dict', {}).get('all_tpks', []), start=first_item_number):
+        redeemed_key = tpk.get('redeemed_key_val')
+        rows.append({
+            'title': clean_text(tpk.get('human_name')) or "N/A",
+            'key': clean_text(redeemed_key) if redeemed_key else "UNREDEEMED",
+            'platform': key_type_platform(tpk.get('key_type') or tpk.get('key_type_human_name')),
+            'page_number': page_number,
+            'item_number': item_number,
+            'status': "Redeemed" if redeemed_key else "Unredeemed",
+            'gamekey': order.get('gamekey', ""),
+        })
+    return rows
+
+
+class HumbleApiClient:
+    """Pooled HTTP session authenticated with the _simpleauth_sess cookie."""
+
+    def __init__(self, session_cookie, base_url=API_BASE_URL, max_workers=MAX_WORKERS, batch_size=ORDER_BATCH_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.session = requests.Session()
+        retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # No cookie domain, so the same session also authenticates against a local stub server
+        self.session.cookies.set('_simpleauth_sess', session_cookie)
+        self.session.headers.update({'Accept': 'application/json'})
+        self.request_count = 0
+
+    def get_json(self, path, params=None):
+        self.request_count += 1
+        response = self.session.get(self.base_url + path, params=params, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def list_gamekeys(self):
+        """Returns the gamekeys of every order in the library, newest first."""
+        return [order['gamekey'] for order in self.get_json(ORDER_LIST_PATH)]
+
+    def fetch_orders(self, gamekeys):
+        """Fetches one batch of orders (including their key lists) in a single request."""
+        params = [('all_tpkds', 'true')] + [('gamekeys', gamekey) for gamekey in gamekeys]
+        orders = self.get_json(ORDERS_PATH, params=params)
+        return [dict(orders[gamekey], gamekey=gamekey) for gamekey in gamekeys if gamekey in orders]
+
+    def fetch_key_rows(self, max_keys=None):
+        """Fetches order batches concurrently and returns key rows in library order.
+
+        At most max_workers batches are in flight; once max_keys rows have arrived no further
+        batches are requested.
+        """
+        gamekeys = self.list_gamekeys()
+        batches = iter([gamekeys[i:i + self.batch_size] for i in range(0, len(gamekeys), self.batch_size)])
+        print(f"Found {len(gamekeys)} orders, fetching them in batches of {self.batch_size} "
+              f"({self.max_workers} at a time)...")
+
+        rows = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Results are taken in submission order, so rows come out in the same order as the library
+            pending = deque(executor.submit(self.fetch_orders, batch)
+                            for batch, _ in zip(batches, range(self.max_workers)))
+            page_number = 0
+            while pending:
+                orders = pending.popleft().result()
+                page_number += 1
+                item_number = 1
+                for order in orders:
+                    order_rows = order_to_rows(order, page_number, item_number)
+                    rows.extend(order_rows)
+                    item_number += len(order_rows)
+                if max_keys and len(rows) >= max_keys:
+                    print(f"Maximum key limit ({max_keys}) reached.")
+                    rows = rows[:max_keys]
+                    for future in pending:
+                        future.cancel()
+                    break
+                batch = next(batches, None)
+                if batch is not None:
+                    pending.append(executor.submit(self.fetch_orders, batch))
+        print(f"Fetched {len(rows)} keys with {self.request_count} HTTP requests.")
+        return rows
+
+    def close(self):
+        self.session.close()
+
+
+# --- Self-check against a local stub server (python humble_api.py) ---
+# Recorded /api/v1/orders responses, trimmed to the fields this module reads; keys and gamekeys replaced
+FIXTURE_ORDERS = {
+    "aBcDeFgHiJkLmNoP": {
+        "product": {"human_name": "Humble Indie Bundle 24"},
+        "tpkd_dict": {"all_tpks": [
+            {"human_name": "Celeste", "key_type": "steam", "key_type_human_name": "Steam",
+             "redeemed_key_val": "AAAAA-BBBBB-CCCCC"},
+            {"human_name": "Celeste", "key_type": "steam", "key_type_human_name": "Steam",
+             "redeemed_key_val": None},
+            {"human_name": "Into the Breach", "key_type": "gog", "key_type_human_name": "GOG",
+             "redeemed_key_val": "GOG-KEY-0001"},
+        ]},
+    },
+    "qRsTuVwXyZ012345": {
+        "product": {"human_name": "Humble Choice"},
+        "tpkd_dict": {"all_tpks": [
+            {"human_name": "Control \"Ultimate\" Edition", "key_type": "epic",
+             "key_type_human_name": "Epic Games Store", "redeemed_key_val": "EPIC-0002"},
+            {"human_name": "Origins of Nothing", "key_type": "steam", "key_type_human_name": "Steam",
+             "redeemed_key_val": None},
+        ]},
+    },
+    "zYxWvUtSrQpOnMlK": {
+        "product": {"human_name": "Software Bundle"},
+        "tpkd_dict": {"all_tpks": [
+            {"human_name": "Tool Suite", "key_type": "external_key", "key_type_human_name": "External Key",
+             "redeemed_key_val": "EXT-0003"},
+        ]},
+    },
+}
+
+# The same keys as the keys page renders them (what the browser backend extracts)
+FIXTURE_KEYS_HTML = """
+<table><tbody>
+<tr><td class="game-name"><h4>Celeste</h4></td><td class="platform"><i class="hb hb-steam" title="Steam"></i></td>
+<td class="js-redeemer-cell redeemer-cell"><div class="js-keyfield keyfield redeemed"><div class="keyfield-value">AAAAA-BBBBB-CCCCC</div></div></td></tr>
+<tr><td class="game-name"><h4>Celeste</h4></td><td class="platform"><i class="hb hb-steam" title="Steam"></i></td>
+<td class="js-redeemer-cell redeemer-cell"><div class="js-keyfield keyfield enabled"><div class="keyfield-value">Reveal your Steam key</div></div></td></tr>
+<tr><td class="game-name"><h4>Into the Breach</h4></td><td class="platform"><i class="hb hb-gog" title="GOG"></i></td>
+<td class="js-redeemer-cell redeemer-cell"><div class="js-keyfield keyfield redeemed"><div class="keyfield-value">GOG-KEY-0001</div></div></td></tr>
+<tr><td class="game-name"><h4>Control "Ultimate" Edition</h4></td><td class="platform"><i class="hb hb-epic" title="Epic Games Store"></i></td>
+<td class="js-redeemer-cell redeemer-cell"><div class="js-keyfield keyfield redeemed"><div class="keyfield-value">EPIC-0002</div></div></td></tr>
+<tr><td class="game-name"><h4>Origins of Nothing</h4></td><td class="platform"><i class="hb hb-steam" title="Steam"></i></td>
+<td class="js-redeemer-cell redeemer-cell"><div class="js-keyfield keyfield enabled"><div class="keyfield-value">Reveal your Steam key</div></div></td></tr>
+<tr><td class="game-name"><h4>Tool Suite</h4></td><td class="platform"><i class="hb hb-key" title="External Key"></i></td>
+<td class="js-redeemer-cell redeemer-cell"><div class="js-keyfield keyfield redeemed"><div class="keyfield-value">EXT-0003</div></div></td></tr>
+</tbody></table>
+"""
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    """Serves FIXTURE_ORDERS the way the order endpoints do (only the requested gamekeys)."""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if '_simpleauth_sess=' not in self.headers.get('Cookie', ''):
+            self.send_error(401)
+            return
+        if url.path == ORDER_LIST_PATH:
+            body = [{'gamekey': gamekey} for gamekey in FIXTURE_ORDERS]
+        elif url.path == ORDERS_PATH:
+            gamekeys = parse_qs(url.query).get('gamekeys', [])
+            body = {gamekey: FIXTURE_ORDERS[gamekey] for gamekey in gamekeys if gamekey in FIXTURE_ORDERS}
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    """Starts StubApiHandler on a free local port; returns (server, base_url)."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubApiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_self_check():
+    """Compares the API rows with humbleparser_complete's browser rows for the fixture; returns the number of failures."""
+    from humble_common import parse_keys_html
+    from humbleparser_complete import CSV_FIELDNAMES, build_page_data  # the browser backend (imports selenium)
+
+    failures = 0
+    checks = 0
+    browser_rows = []
+    server, base_url = start_stub_server()
+    try:
+        browser_rows = build_page_data(parse_keys_html(FIXTURE_KEYS_HTML), 1)
+        client = HumbleApiClient("stub-cookie", base_url=base_url, max_workers=2, batch_size=2)
+        api_rows = client.fetch_key_rows()
+        client.close()
+        # Numbering follows API batches vs. pages; every other CSV column must match
+        fields = [field for field in CSV_FIELDNAMES if field not in ('page_number', 'item_number')]
+        checks += 1
+        if len(api_rows) != len(browser_rows):
+            failures += 1
+            print(f"FAIL: {len(api_rows)} API rows, {len(browser_rows)} browser rows")
+        for api_row, browser_row in zip(api_rows, browser_rows):
+            checks += 1
+            api_values = tuple(api_row[field] for field in fields)
+            browser_values = tuple(browser_row[field] for field in fields)
+            if api_values != browser_values:
+                failures += 1
+                print(f"FAIL: API {api_values} != browser {browser_values}")
+
+        # max_keys stops the batches early: one order list request plus the first batch
+        checks += 1
+        client = HumbleApiClient("stub-cookie", base_url=base_url, max_workers=1, batch_size=1)
+        limited_rows = client.fetch_key_rows(max_keys=2)
+        client.close()
+        if len(limited_rows) != 2 or client.request_count != 2:
+            failures += 1
+            print(f"FAIL: max_keys=2 returned {len(limited_rows)} rows with {client.request_count} requests "
+                  f"(expected 2 and 2)")
+    except Exception as e:
+        checks += 1
+        failures += 1
+        print(f"FAIL: self-check aborted: {e}")
+    finally:
+        server.shutdown()
+    print(f"API backend self-check: {checks - failures}/{checks} checks passed")
+    return failures
+
+
+if __name__ == "__main__":
+    raise SystemExit(1 if run_self_check() else 0)
@@ -0,0 +1,289 @@
+"""Shared helpers for the humbleparser key exporters (humbleparser_complete.py, humbleparser3db.py)."""
+
+import os
+import re
+import json
+import time
+from html.parser import HTMLParser
+
+# --- Page-level extraction ---
+# One execute_script call walks every key container on the current page and returns
+# plain values, instead of two WebDriverWaits + get_attribute('outerHTML') per row.
+KEYFIELD_XPATH = ".//div[contains(@class, 'js-keyfield keyfield')]"
+KEY_VALUE_XPATH = ".//div[contains(@class, 'keyfield-value')]"
+
+PAGE_EXTRACT_SCRIPT = """
+const [containerXPath, titleXPath, keyfieldXPath, keyValueXPath] = arguments;
+const first = (xpath, context) => document.evaluate(
+    xpath, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+// Only the attributes that name a platform: the row's platform cell/icons and the keyfield
+const platformHint = (cell, keyfield) => {
+    const row = cell.closest('tr');
+    const platformCell = row ? row.querySelector('td[class*="platform"]') : null;
+    const sources = [platformCell, keyfield, ...cell.querySelectorAll('i[class*="hb-"]')];
+    if (platformCell) sources.push(...platformCell.querySelectorAll('[class*="hb-"], [title], [aria-label]'));
+    return sources.filter(el => el).map(el => [el.getAttribute('class'), el.getAttribute('title'),
+        el.getAttribute('aria-label')].filter(value => value).join(' ')).join(' ');
+};
+const cells = document.evaluate(
+    containerXPath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+const rows = [];
+for (let i = 0; i < cells.snapshotLength; i++) {
+    const cell = cells.snapshotItem(i);
+    const title = first(titleXPath, cell);
+    const keyfield = first(keyfieldXPath, cell);
+    const keyValue = first(keyValueXPath, cell);
+    rows.push({
+        title: title ? title.innerText : null,
+        has_keyfield: keyfield !== null,
+        redeemed: keyfield !== null && (keyfield.getAttribute('class') || '').includes('redeemed'),
+        key: keyValue ? keyValue.innerText : null,
+        platform_hint: platformHint(cell, keyfield),
+    });
+}
+return rows;
+"""
+
+
+def extract_page_rows(driver, container_xpath, title_xpath):
+    """Returns raw row values for every key container on the current page in a single WebDriver call."""
+    return driver.execute_script(
+        PAGE_EXTRACT_SCRIPT,
+        container_xpath,
+        title_xpath,
+        KEYFIELD_XPATH,
+        KEY_VALUE_XPATH,
+    ) or []
+
+
+# Same hint sources as platformHint() in PAGE_EXTRACT_SCRIPT, as XPaths for single WebElements
+PLATFORM_CELL_XPATH = "./ancestor::tr[1]//td[contains(@class, 'platform')]"
+PLATFORM_ICON_XPATH = ".//i[contains(@class, 'hb-')]"
+PLATFORM_CELL_HINTS_XPATH = ".//*[contains(@class, 'hb-') or @title or @aria-label]"
+
+
+def element_platform_hint(container):
+    """Per-element counterpart of platformHint() for the extract_data() fallback (no execute_script)."""
+    from selenium.webdriver.common.by import By  # humble_common itself does not need selenium
+
+    platform_cells = container.find_elements(By.XPATH, PLATFORM_CELL_XPATH)
+    platform_cell = platform_cells[0] if platform_cells else None
+    sources = [platform_cell] + container.find_elements(By.XPATH, KEYFIELD_XPATH)[:1]
+    sources += container.find_elements(By.XPATH, PLATFORM_ICON_XPATH)
+    if platform_cell is not None:
+        sources += platform_cell.find_elements(By.XPATH, PLATFORM_CELL_HINTS_XPATH)
+    return " ".join(
+        " ".join(value for value in (element.get_attribute('class'), element.get_attribute('title'),
+                                     element.get_attribute('aria-label')) if value)
+        for element in sources if element is not None
+    )
+
+
+def clean_text(value):
+    """Mirrors the per-element cleanup done by extract_data()."""
+    return value.strip().replace('"', '') if value else ""
+
+
+# --- Platform Detection ---
+# Token -> platform name. Tokens match whole words of the platform hint (icon classes such as
+# "hb-steam", title/aria-label text, API key_type), so "origin" no longer matches unrelated markup.
+# Extend or override with a JSON object of the same shape in the file named by HUMBLE_PLATFORM_CONFIG.
+PLATFORM_TOKENS = {
+    "steam": "Steam",
+    "gog": "GOG",
+    "origin": "Origin",
+    "ea app": "EA App",
+    "uplay": "Uplay",
+    "ubisoft": "Uplay",
+    "epic": "Epic Games Store",
+    "microsoft": "Microsoft Store",
+    "windows store": "Microsoft Store",
+    "xbox": "Xbox",
+    "battlenet": "Battle.net",
+    "battle.net": "Battle.net",
+    "rockstar": "Rockstar Games Launcher",
+    "nintendo": "Nintendo",
+    "playstation": "PlayStation",
+    "itch": "itch.io",
+}
+PLATFORM_CONFIG_FILE = os.environ.get('HUMBLE_PLATFORM_CONFIG', "")
+
+
+class PlatformClassifier:
+    """Classifies a platform hint with one precompiled, word-bounded pattern."""
+
+    def __init__(self, tokens):
+        self.names = {token.lower(): name for token, name in tokens.items()}
+        # Longest tokens first, so "windows store" wins over a shorter overlapping token
+        alternation = "|".join(re.escape(token) for token in sorted(self.names, key=len, reverse=True))
+        self.pattern = re.compile(rf"(?<![a-z0-9])({alternation})(?![a-z0-9])", re.IGNORECASE)
+
+    def classify(self, hint):
+        match = self.pattern.search(hint or "")
+        return self.names[match.group(1).lower()] if match else "Unknown"
+
+
+def load_platform_classifier(config_file=PLATFORM_CONFIG_FILE):
+    tokens = dict(PLATFORM_TOKENS)
+    if config_file:
+        try:
+            with open(config_file, encoding='utf-8') as f:
+                tokens.update(json.load(f))
+        except (IOError, OSError, ValueError) as e:
+            print(f"Error reading platform config {config_file}: {e}")
+    return PlatformClassifier(tokens)
+
+
+PLATFORM_CLASSIFIER = load_platform_classifier()
+
+
+def platform_name(platform_hint):
+    """Maps the platform hint of a row to the platform name used in the outputs."""
+    return PLATFORM_CLASSIFIER.classify(platform_hint)
+
+
+# --- Parser-only extraction (offline replay of saved keys pages) ---
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+
+class _Node:
+    __slots__ = ('tag', 'attrs', 'children', 'parent')
+
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        self.parent = parent
+
+    def css_class(self):
+        return self.attrs.get('class') or ""
+
+    def elements(self):
+        return [child for child in self.children if isinstance(child, _Node)]
+
+    def descendants(self):
+        for child in self.elements():
+            yield child
+            yield from child.descendants()
+
+    def text(self):
+        parts = []
+        for child in self.children:
+            parts.append(child.text() if isinstance(child, _Node) else child)
+        return "".join(parts)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node('#document', {}, None)
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = _Node(tag, dict(attrs), self.current)
+        self.current.children.append(node)
+        if tag not in VOID_TAGS:
+            self.current = node
+
+    def handle_endtag(self, tag):
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+
+def _visible_text(node):
+    return re.sub(r"\s+", " ", node.text()).strip() if node is not None else None
+
+
+def parse_keys_html(html):
+    """Parser-only counterpart of PAGE_EXTRACT_SCRIPT for a saved keys page (page_source or snapshot file)."""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+
+    rows = []
+    for cell in builder.root.descendants():
+        cell_class = cell.css_class()
+        if cell.tag != 'td' or 'js-redeemer-cell' not in cell_class or 'redeemer-cell' not in cell_class:
+            continue
+        title = None
+        for sibling in cell.parent.elements():
+            if sibling is cell:
+                break
+            if sibling.tag == 'td' and sibling.css_class() == 'game-name':
+                title = next((child for child in sibling.elements() if child.tag == 'h4'), None)
+                if title is not None:
+                    break
+        keyfield = next((node for node in cell.descendants()
+                         if node.tag == 'div' and 'js-keyfield keyfield' in node.css_class()), None)
+        key_value = next((node for node in cell.descendants()
+                          if node.tag == 'div' and 'keyfield-value' in node.css_class()), None)
+        row = cell.parent
+        platform_cell = next((node for node in row.elements()
+                              if node.tag == 'td' and 'platform' in node.css_class()), None)
+        hint_sources = [platform_cell, keyfield]
+        hint_sources += [node for node in cell.descendants() if node.tag == 'i' and 'hb-' in node.css_class()]
+        if platform_cell is not None:
+            hint_sources += [node for node in platform_cell.descendants()
+                             if 'hb-' in node.css_class() or node.attrs.get('title') or node.attrs.get('aria-label')]
+        platform_hint = " ".join(
+            " ".join(value for value in (node.attrs.get('class'), node.attrs.get('title'), node.attrs.get('aria-label')) if value)
+            for node in hint_sources if node is not None
+        )
+        rows.append({
+            'title': _visible_text(title),
+            'has_keyfield': keyfield is not None,
+            'redeemed': keyfield is not None and 'redeemed' in keyfield.css_class(),
+            'key': _visible_text(key_value),
+            'platform_hint': platform_hint,
+        })
+    return rows
+
+
+def save_snapshot(driver, directory, page_number):
+    """Saves the current keys page for offline replay (humbleparser_bench.py)."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"keys_page_{page_number:04d}.html")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(driver.page_source)
+    return path
+
+
+# --- Rate Limiting ---
+class RateLimiter:
+    """Token bucket that paces real network actions (page loads, pagination clicks).
+
+    Rows already present in the DOM are extracted without any waiting; only callers of
+    acquire() are throttled, and the time spent waiting is accumulated for the run summary.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate  # tokens per second
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.last_refill = time.monotonic()
+        self.throttled_seconds = 0.0
+        self.actions = 0
+
+    def acquire(self, label=""):
+        """Blocks until a token is available, then consumes it."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+        if self.tokens < 1:
+            wait_time = (1 - self.tokens) / self.rate
+            print(f"Rate limit: waiting {wait_time:.2f} seconds before {label or 'network action'}...")
+            time.sleep(wait_time)
+            self.throttled_seconds += wait_time
+            self.tokens = 1.0
+            self.last_refill = time.monotonic()
+        self.tokens -= 1
+        self.actions += 1
+
+    def summary(self):
+        return f"{self.actions} network actions, {self.throttled_seconds:.2f} seconds spent throttled"
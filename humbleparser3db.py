@@ -1,52 +1,99 @@
 import os
-import time
+import argparse
 import csv
 import json
 import sqlite3
-import random
+from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from selenium.webdriver.chrome.service import Service
+import driver_pool
+import scraper_storage
+from humble_common import (RateLimiter, extract_page_rows, element_platform_hint, clean_text, platform_name,
+                          save_snapshot)
 
 # --- Configuration ---
 CHROMEDRIVER_PATH = ""
 KEYS_PAGE_URL = "https://www.humblebundle.com/home/keys"
 OUTPUT_CSV = "humble_keys.csv"
 OUTPUT_JSON = "humble_keys.json"
+OUTPUT_NDJSON = "humble_keys.ndjson"
 OUTPUT_DB = "humble_keys.db"
+INCREMENTAL_SUFFIX = ".incremental"  # --incremental writes humble_keys.incremental.csv etc.
 HEADLESS = False
 MAX_KEYS = 2000
-
-# --- Latency/Wait Time Configuration (Randomization) ---
-MIN_WAIT_TIME_KEY = 0.1
-MAX_WAIT_TIME_KEY = 0.5
-MIN_WAIT_TIME_PAGE = 2
-MAX_WAIT_TIME_PAGE = 5
+SNAPSHOT_DIR = ""  # e.g. "keys_snapshots" to save every keys page for humbleparser_bench.py
+
+# --- Rate Limiting (only page loads and pagination clicks are throttled) ---
+PAGE_RATE_LIMIT = 0.3  # network actions per second
+PAGE_RATE_BURST = 2    # actions allowed back-to-back before throttling kicks in
+
+# --- Output Columns ---
+CSV_FIELDNAMES = ['title', 'key', 'platform', 'page_number', 'item_number', 'status']
+# Rows are identified by (title, platform, key, gamekey, copy_number); re-running only touches changed rows.
+# copy_number tells apart UNREDEEMED placeholders of the same game (see number_copies).
+INSERT_KEY_SQL = '''
+    INSERT INTO humble_keys (title, key, platform, page_number, item_number, status, gamekey, copy_number)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(title, platform, key, gamekey, copy_number) DO UPDATE SET
+        status = excluded.status,
+        page_number = excluded.page_number,
+        item_number = excluded.item_number
+    WHERE humble_keys.status IS NOT excluded.status
+       OR humble_keys.page_number IS NOT excluded.page_number
+       OR humble_keys.item_number IS NOT excluded.item_number
+'''
+# A key redeemed in place replaces the UNREDEEMED placeholder stored at the same position; other
+# copies of the same game keep their placeholders
+DELETE_PLACEHOLDER_SQL = '''
+    DELETE FROM humble_keys
+    WHERE key = 'UNREDEEMED' AND title = ? AND platform = ? AND gamekey = ? AND page_number = ? AND item_number = ?
+'''
+# After a run that reached the last page: placeholders it did not see were redeemed or removed
+DELETE_UNSEEN_PLACEHOLDERS_SQL = '''
+    DELETE FROM humble_keys
+    WHERE key = 'UNREDEEMED'
+      AND title || char(31) || platform || char(31) || key || char(31) || gamekey || char(31) || copy_number
+          NOT IN (SELECT identity FROM scrape_seen)
+'''
 
 # --- XPath Selectors ---
 KEY_CONTAINER_XPATH = "//td[contains(@class, 'js-redeemer-cell') and contains(@class, 'redeemer-cell')]"
 TITLE_XPATH = "./preceding-sibling::td[@class='game-name']/h4"
 LOAD_MORE_ELEMENT_XPATH = ".js-pagination-holder.pagination-holder > div.pagination > div.jump-to-page:not(.current) > i.hb.hb-chevron-right"
 LOAD_MORE_ELEMENT_XPATH_TYPE = By.CSS_SELECTOR
+PAGINATION_HOLDER_SELECTOR = ".js-pagination-holder.pagination-holder"
+JUMP_TO_PAGE_XPATH = "//div[contains(@class, 'pagination')]/div[contains(@class, 'jump-to-page') and not(contains(@class, 'current')) and normalize-space(.)='{page}']"
+
+# --- Resume Configuration ---
+# If the keys page accepts a page parameter, set e.g. "https://www.humblebundle.com/home/keys?page={page}"
+# and --resume loads the target page directly; otherwise it walks the pagination control.
+RESUME_PAGE_URL_TEMPLATE = ""
 
-# --- Cookie Handling ---
+# --- Cookie Handling (checked in main(), so the module can be imported by the replay benchmark) ---
 cookie_value = os.environ.get('HUMBLE_SESSION_COOKIE')
-if not cookie_value:
-    print("ERROR: HUMBLE_SESSION_COOKIE environment variable not set.")
-    exit(1)
-
-# --- WebDriver Setup ---
-options = webdriver.ChromeOptions()
-if HEADLESS:
-    options.add_argument("--headless")
-if CHROMEDRIVER_PATH:
-    service = Service(executable_path=CHROMEDRIVER_PATH)
-    driver = webdriver.Chrome(service=service, options=options)
-else:
-    driver = webdriver.Chrome(options=options)
+
+# --- WebDriver Setup (started in main()) ---
+driver = None
+
+def chrome_options():
+    options = webdriver.ChromeOptions()
+    if HEADLESS:
+        options.add_argument("--headless")
+    return options
+
+def chrome_service():
+    return Service(executable_path=CHROMEDRIVER_PATH) if CHROMEDRIVER_PATH else None
+
+def keys_driver_pool():
+    """Shared pool for the keys scripts: the profile (and its login cookie) persists between runs."""
+    return driver_pool.get_pool("keys-headless" if HEADLESS else "keys", chrome_options, chrome_service)
+
+def create_driver():
+    return keys_driver_pool().acquire()
 
 def extract_data(container, page_number, item_number):
     """Extracts data from a single key container, including key and redemption status."""
@@ -85,34 +132,45 @@ def extract_data(container, page_number, item_number):
         return None
 
     # --- Platform Inference ---
-    platform_keywords = {
-        "steam": "Steam",
-        "gog": "GOG",
-        "origin": "Origin",
-        "uplay": "Uplay",
-        "epic": "Epic Games Store",
-        "microsoft": "Microsoft Store",
-    }
-    container_html = container.get_attribute('outerHTML')
-    found_platform = False
-    for keyword, platform_name in platform_keywords.items():
-        if keyword in container_html.lower():
-            data['platform'] = platform_name
-            found_platform = True
-            break
-    if not found_platform:
-        data['platform'] = "Unknown"
+    data['platform'] = platform_name(element_platform_hint(container))
 
     data['page_number'] = page_number
     data['item_number'] = item_number
 
     return data
 
+def extract_page_data(driver, page_number):
+    """Extracts every key container on the current page with a single WebDriver round trip."""
+    return build_page_data(extract_page_rows(driver, KEY_CONTAINER_XPATH, TITLE_XPATH), page_number)
+
+def build_page_data(raw_rows, page_number):
+    """Turns raw page rows (from the page script or parse_keys_html) into output rows."""
+    page_data = []
+    for item_number, row in enumerate(raw_rows, start=1):
+        if row['title'] is None:
+            print(f"Warning (extract_page_data): Could not find title element (page {page_number}, item {item_number})")
+            continue  # Skip if no title
+        if not row['has_keyfield']:
+            print(f"Warning (extract_page_data): Could not find key element (page {page_number}, item {item_number})")
+            continue
+
+        data = {'title': clean_text(row['title'])}
+        if row['redeemed']:
+            data['status'] = "Redeemed"
+            data['key'] = clean_text(row['key'])
+        else:
+            data['status'] = "Unredeemed"
+            data['key'] = "UNREDEEMED"  # Placeholder for unredeemed keys
+        data['platform'] = platform_name(row['platform_hint'])
+        data['page_number'] = page_number
+        data['item_number'] = item_number
+        page_data.append(data)
+    return page_data
+
 def create_database(db_file):
     """Creates the SQLite database and table if they don't exist."""
-    conn = None
+    conn = scraper_storage.connect(db_file)
     try:
-        conn = sqlite3.connect(db_file)
         cursor = conn.cursor()
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS humble_keys (
@@ -122,56 +180,321 @@ def create_database(db_file):
                 platform TEXT,
                 page_number INTEGER,
                 item_number INTEGER,
-                status TEXT  -- Add status column
+                status TEXT,  -- Add status column
+                gamekey TEXT NOT NULL DEFAULT '',
+                copy_number INTEGER NOT NULL DEFAULT 1
+            )
+        ''')
+        cursor.execute("PRAGMA table_info(humble_keys)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if 'gamekey' not in columns:
+            cursor.execute("ALTER TABLE humble_keys ADD COLUMN gamekey TEXT NOT NULL DEFAULT ''")
+        if 'copy_number' not in columns:
+            cursor.execute("ALTER TABLE humble_keys ADD COLUMN copy_number INTEGER NOT NULL DEFAULT 1")
+        # Older databases hold one copy of the library per run; keep the newest row of each key
+        cursor.execute('''
+            DELETE FROM humble_keys
+            WHERE id NOT IN (SELECT MAX(id) FROM humble_keys GROUP BY title, platform, key, gamekey, copy_number)
+        ''')
+        if cursor.rowcount > 0:
+            print(f"Removed {cursor.rowcount} duplicate rows from humble_keys")
+        # The earlier identity index had no copy_number and merged copies of the same game
+        cursor.execute("DROP INDEX IF EXISTS idx_humble_keys_identity")
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_humble_keys_entitlement
+            ON humble_keys(title, platform, key, gamekey, copy_number)
+        ''')
+        # Checkpoint of the last fully persisted page, used by --resume
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_checkpoint (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                last_page INTEGER NOT NULL,
+                row_count INTEGER NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_seen (
+                identity TEXT PRIMARY KEY
             )
         ''')
         conn.commit()
     except sqlite3.Error as e:
         print(f"SQLite error: {e}")
-    finally:
-        if conn:
-            conn.close()
+        conn.rollback()
 
-def save_to_json(data, json_file):
-    """Saves the extracted data to a JSON file."""
+def ndjson_to_json(ndjson_file, json_file):
+    """Rewrites the streamed NDJSON file as a JSON array, one row at a time (constant memory)."""
     try:
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4)
+        with open(ndjson_file, 'r', encoding='utf-8') as src, open(json_file, 'w', encoding='utf-8') as dst:
+            dst.write("[")
+            first = True
+            for line in src:
+                if not line.strip():
+                    continue
+                dst.write("\n    " if first else ",\n    ")
+                dst.write(line.strip())
+                first = False
+            dst.write("\n]\n" if not first else "]\n")
     except (IOError, OSError) as e:
         print(f"Error writing to JSON file: {e}")
 
-def save_to_sqlite(data, db_file):
-    """Saves the extracted data to an SQLite database."""
-    conn = None
+def row_identity(item):
+    """Identity used to recognise rows already persisted by an interrupted run."""
+    return "\x1f".join((item['title'], item['platform'], item['key'], item.get('gamekey', ''),
+                        str(item.get('copy_number', 1))))
+
+def number_copies(rows, copies):
+    """Numbers the UNREDEEMED placeholders of each game (title, platform, gamekey) in library order.
+
+    `copies` holds the count per game so far and carries it across pages. Redeemed rows are
+    already told apart by their key and keep copy_number 1.
+    """
+    for item in rows:
+        if item['key'] == "UNREDEEMED":
+            game = (item['title'], item['platform'], item.get('gamekey', ''))
+            copies[game] = copies.get(game, 0) + 1
+            item['copy_number'] = copies[game]
+        else:
+            item['copy_number'] = 1
+    return rows
+
+def load_checkpoint(db_file):
+    """Returns the checkpoint row as a dict, or None if no run has been recorded."""
     try:
-        conn = sqlite3.connect(db_file)
-        cursor = conn.cursor()
-        for item in data:
-            cursor.execute('''
-                INSERT INTO humble_keys (title, key, platform, page_number, item_number, status)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (item['title'], item['key'], item['platform'], item['page_number'], item['item_number'], item['status']))  # Include status
-        conn.commit()
-        print(f"Data successfully saved to SQLite database: {db_file}")
+        row = scraper_storage.connect(db_file).execute("SELECT last_page, row_count, completed, updated_at FROM scrape_checkpoint WHERE id = 1").fetchone()
+        if not row:
+            return None
+        return {'last_page': row[0], 'row_count': row[1], 'completed': bool(row[2]), 'updated_at': row[3]}
     except sqlite3.Error as e:
         print(f"SQLite error: {e}")
-    finally:
-        if conn:
-            conn.close()
+        return None
+
+def key_row_values(item):
+    """Orders a row dict for INSERT_KEY_SQL."""
+    return (item['title'], item['key'], item['platform'], item['page_number'], item['item_number'], item['status'],
+            item.get('gamekey', ''), item.get('copy_number', 1))
+
+def upsert_keys(cursor, data):
+    """Bulk upserts rows by their natural key; returns the number of inserted or changed rows."""
+    redeemed = [(item['title'], item['platform'], item.get('gamekey', ''), item['page_number'], item['item_number'])
+                for item in data if item['key'] != "UNREDEEMED"]
+    cursor.executemany(DELETE_PLACEHOLDER_SQL, redeemed)
+    before = cursor.connection.total_changes
+    cursor.executemany(INSERT_KEY_SQL, [key_row_values(item) for item in data])
+    return cursor.connection.total_changes - before
+
+class KeySink:
+    """Streams each extracted page to SQLite, CSV and NDJSON as soon as it is extracted.
+
+    The rows of a page are written and flushed to the files first, then committed to SQLite
+    in one transaction together with the checkpoint. A crash mid-run therefore keeps everything
+    collected up to the last checkpointed page, and --resume never skips rows missing from the
+    files (at worst the page after the checkpoint appears twice in them).
+
+    Only full runs own the checkpoint (checkpoint=True). A new full run replaces the previous
+    checkpoint together with its first page, so a run that fails before saving anything keeps
+    an interrupted run resumable; --incremental runs (checkpoint=False) never touch it.
+    """
+
+    def __init__(self, db_file, csv_file, ndjson_file, resume_from=None, checkpoint=True):
+        self.db_file = db_file
+        self.conn = scraper_storage.connect(db_file)  # shared with create_database/load_checkpoint
+        self.checkpoint = checkpoint
+        self.reset_checkpoint = False
+        mode = 'a' if resume_from else 'w'
+        # A resumed run appends, but a missing or empty CSV still needs its header
+        needs_header = not resume_from or not os.path.exists(csv_file) or os.path.getsize(csv_file) == 0
+        self.csv_handle = open(csv_file, mode, newline='', encoding='utf-8')
+        self.csv_writer = csv.DictWriter(self.csv_handle, fieldnames=CSV_FIELDNAMES, quoting=csv.QUOTE_ALL, escapechar='\\',
+                                         extrasaction='ignore')
+        self.ndjson_handle = open(ndjson_file, mode, encoding='utf-8')
+        self.changed_count = 0
+        if needs_header:
+            self.csv_writer.writeheader()
+            self.csv_handle.flush()
+        if resume_from:
+            self.row_count = resume_from['row_count']
+            self.seen = {row[0] for row in self.conn.execute("SELECT identity FROM scrape_seen")}
+            self.copies = {}
+            for identity in self.seen:
+                title, platform, key, gamekey, copy_number = (identity.split("\x1f") + [""])[:5]
+                if key == "UNREDEEMED" and copy_number:
+                    game = (title, platform, gamekey)
+                    self.copies[game] = max(self.copies.get(game, 0), int(copy_number))
+        else:
+            self.row_count = 0
+            self.seen = set()
+            self.copies = {}
+            self.reset_checkpoint = checkpoint
+
+    def number_copies(self, rows):
+        """Numbers the page's UNREDEEMED placeholders, continuing the count of the earlier pages."""
+        return number_copies(rows, self.copies)
+
+    def write_page(self, rows, page_number):
+        """Persists one page of rows and advances the checkpoint; the SQLite part is all-or-nothing."""
+        # Rows persisted on an earlier page (e.g. shifted by newly added keys) are not written twice
+        rows = [item for item in rows if row_identity(item) not in self.seen]
+        # Files first: the checkpoint may only move past rows that are already in the exports
+        self.csv_writer.writerows(rows)
+        self.csv_handle.flush()
+        for item in rows:
+            self.ndjson_handle.write(json.dumps(item) + "\n")
+        self.ndjson_handle.flush()
+        with self.conn:  # one transaction per page, rolled back on error
+            self.changed_count += upsert_keys(self.conn.cursor(), rows)
+            if self.checkpoint:
+                if self.reset_checkpoint:
+                    # The previous run's checkpoint is dropped only once this run has a page of its own
+                    self.conn.execute("DELETE FROM scrape_checkpoint")
+                    self.conn.execute("DELETE FROM scrape_seen")
+                self.conn.executemany("INSERT OR IGNORE INTO scrape_seen (identity) VALUES (?)", [(row_identity(item),) for item in rows])
+                self.conn.execute('''
+                    INSERT INTO scrape_checkpoint (id, last_page, row_count, completed, updated_at)
+                    VALUES (1, ?, ?, 0, ?)
+                    ON CONFLICT(id) DO UPDATE SET last_page = excluded.last_page, row_count = excluded.row_count,
+                        completed = 0, updated_at = excluded.updated_at
+                ''', (page_number, self.row_count + len(rows), datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        self.reset_checkpoint = False
+        self.seen.update(row_identity(item) for item in rows)
+        self.row_count += len(rows)
+        return rows
+
+    def count_known(self, rows):
+        """Counts how many distinct natural keys of the rows are already stored in humble_keys."""
+        identities = list(dict.fromkeys(
+            (item['title'], item['platform'], item['key'], item.get('gamekey', ''), item.get('copy_number', 1))
+            for item in rows))
+        if not identities:
+            return 0
+        placeholders = ", ".join(["(?, ?, ?, ?, ?)"] * len(identities))
+        params = [value for identity in identities for value in identity]
+        return self.conn.execute(
+            f"SELECT COUNT(*) FROM humble_keys WHERE (title, platform, key, gamekey, copy_number) IN (VALUES {placeholders})",
+            params,
+        ).fetchone()[0]
+
+    def page_is_known(self, rows):
+        """True if every distinct row of the page is already stored (repeated rows count once)."""
+        return bool(rows) and self.count_known(rows) == len({row_identity(item) for item in rows})
+
+    def remove_unseen_placeholders(self):
+        """Drops UNREDEEMED rows this run did not see; only valid after walking to the last page."""
+        if not self.checkpoint or self.reset_checkpoint:
+            return 0  # scrape_seen holds another run's rows
+        with self.conn:
+            return self.conn.execute(DELETE_UNSEEN_PLACEHOLDERS_SQL).rowcount
+
+    def mark_completed(self):
+        """Marks the checkpoint as a finished run so --resume starts from page 1 again."""
+        if not self.checkpoint or self.reset_checkpoint:
+            return
+        with self.conn:
+            self.conn.execute("UPDATE scrape_checkpoint SET completed = 1 WHERE id = 1")
+
+    def close(self):
+        # The SQLite connection is owned by scraper_storage and closed at exit
+        for handle in (self.csv_handle, self.ndjson_handle):
+            try:
+                handle.close()
+            except Exception as e:
+                print(f"Error closing output ({self.db_file}): {e}")
+
+def wait_for_new_page(driver, old_container, timeout=10):
+    """Waits until the rows of the previous page are replaced and the new ones are present."""
+    if old_container is not None:
+        WebDriverWait(driver, timeout).until(EC.staleness_of(old_container))
+    WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.XPATH, KEY_CONTAINER_XPATH))
+    )
+
+def on_last_page(driver):
+    """True only if the pagination control is rendered and has no next-page chevron.
+
+    A Next Page wait that merely timed out (slow render, stalled page) is not proof that the
+    list ended, and the end of the list is what allows deleting UNREDEEMED rows not seen again.
+    """
+    if not driver.find_elements(By.CSS_SELECTOR, PAGINATION_HOLDER_SELECTOR):
+        return False
+    return not driver.find_elements(LOAD_MORE_ELEMENT_XPATH_TYPE, LOAD_MORE_ELEMENT_XPATH)
+
+def jump_to_page(driver, target_page, rate_limiter):
+    """Moves the keys listing from page 1 to target_page without extracting the pages in between."""
+    if RESUME_PAGE_URL_TEMPLATE:
+        rate_limiter.acquire(f"loading page {target_page}")
+        driver.get(RESUME_PAGE_URL_TEMPLATE.format(page=target_page))
+        wait_for_new_page(driver, None, timeout=20)
+        return True
+
+    current_page = 1
+    while current_page < target_page:
+        old_container = driver.find_elements(By.XPATH, KEY_CONTAINER_XPATH)[0]
+        # Prefer a numbered page link for the target page, else step with the "Next Page" chevron
+        direct_links = driver.find_elements(By.XPATH, JUMP_TO_PAGE_XPATH.format(page=target_page))
+        try:
+            if direct_links:
+                rate_limiter.acquire(f"jumping to page {target_page}")
+                direct_links[0].click()
+                next_page = target_page
+            else:
+                next_button = WebDriverWait(driver, 5).until(
+                    EC.element_to_be_clickable((LOAD_MORE_ELEMENT_XPATH_TYPE, LOAD_MORE_ELEMENT_XPATH))
+                )
+                rate_limiter.acquire(f"skipping to page {current_page + 1}")
+                next_button.click()
+                next_page = current_page + 1
+            wait_for_new_page(driver, old_container)
+        except TimeoutException:
+            print(f"Could not reach page {target_page} (stopped at page {current_page}).")
+            return False
+        current_page = next_page
+        print(f"Resume: at page {current_page}/{target_page}")
+    return True
+
+def incremental_output(path):
+    """humble_keys.csv -> humble_keys.incremental.csv; an --incremental run keeps the full exports intact."""
+    root, extension = os.path.splitext(path)
+    return f"{root}{INCREMENTAL_SUFFIX}{extension}"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Exports Humble Bundle keys to CSV, JSON and SQLite.")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue an interrupted run from the page after the last checkpoint")
+    parser.add_argument('--incremental', action='store_true',
+                        help="stop paginating at the first page whose keys are all already in the database; "
+                             "the scanned pages are exported to humble_keys.incremental.csv/.ndjson/.json; "
+                             "the checkpoint of an interrupted full run is kept")
+    args = parser.parse_args()
+    if args.resume and args.incremental:
+        parser.error("--resume continues an interrupted full run and cannot be combined with --incremental")
+    return args
 
 def main():
+    global driver
+    args = parse_args()
+    if not cookie_value:
+        print("ERROR: HUMBLE_SESSION_COOKIE environment variable not set.")
+        exit(1)
+    # The database is always merged; the file exports of an incremental run only hold the pages it scanned
+    output_csv, output_ndjson, output_json = OUTPUT_CSV, OUTPUT_NDJSON, OUTPUT_JSON
+    if args.incremental:
+        output_csv, output_ndjson, output_json = (incremental_output(path)
+                                                  for path in (OUTPUT_CSV, OUTPUT_NDJSON, OUTPUT_JSON))
+        print(f"Incremental sync: scanned pages are exported to {output_csv}, {output_ndjson} and {output_json}; "
+              f"{OUTPUT_CSV} keeps the last full export.")
+    sink = None
     try:
+        driver = create_driver()
         # --- Set the Cookie and Initial Load ---
+        rate_limiter = RateLimiter(PAGE_RATE_LIMIT, PAGE_RATE_BURST)
+        rate_limiter.acquire("loading the home page")
         driver.get("https://www.humblebundle.com/")
         driver.add_cookie({'name': '_simpleauth_sess', 'value': cookie_value, 'domain': '.humblebundle.com'})
-        wait_time = random.uniform(MIN_WAIT_TIME_KEY, MAX_WAIT_TIME_KEY)
-        time.sleep(wait_time)
-        print(f"Waiting for {wait_time:.2f} seconds after setting cookie...")
 
+        rate_limiter.acquire("navigating to keys page")
         driver.get(KEYS_PAGE_URL)
-        wait_time = random.uniform(MIN_WAIT_TIME_KEY, MAX_WAIT_TIME_KEY)
-        time.sleep(wait_time)
-        print(f"Waiting for {wait_time:.2f} seconds after navigating to keys page...")
 
         # Wait for initial page load
         try:
@@ -182,49 +505,90 @@ def main():
             print(f"ERROR: TimeoutException - Initial page load failed.")
             return
 
-        all_data = []
+        # --- Create Database and open streaming outputs ---
+        create_database(OUTPUT_DB)
+        checkpoint = load_checkpoint(OUTPUT_DB) if args.resume else None
         page_number = 1
-        extracted_key_count = 0
+        if args.resume:
+            if checkpoint and not checkpoint['completed']:
+                page_number = checkpoint['last_page'] + 1
+                print(f"Resuming after page {checkpoint['last_page']} ({checkpoint['row_count']} keys saved at {checkpoint['updated_at']}).")
+                if not jump_to_page(driver, page_number, rate_limiter):
+                    print("Resume failed; the checkpoint is kept so the run can be retried.")
+                    return
+            else:
+                print("No interrupted run to resume, starting from page 1.")
+                checkpoint = None
+        sink = KeySink(OUTPUT_DB, output_csv, output_ndjson, resume_from=checkpoint, checkpoint=not args.incremental)
+
+        extracted_key_count = sink.row_count
+        finished = False
+        reached_end = False
 
         while extracted_key_count < MAX_KEYS:
             # --- Find Key Containers on the *CURRENT* Page ---
             key_containers = driver.find_elements(By.XPATH, KEY_CONTAINER_XPATH)
             num_containers = len(key_containers)
             print(f"Found {num_containers} key containers on page {page_number}.")
+            if SNAPSHOT_DIR:
+                save_snapshot(driver, SNAPSHOT_DIR, page_number)
 
             # --- Extract Data from Current Page ---
-            item_number = 1
-            for container in key_containers:
-                try:
-                    key_data = extract_data(container, page_number, item_number)
-                    if key_data:
-                        all_data.append(key_data)
-                    item_number += 1
-                except Exception as e:
-                    print(f"Error during data extraction (page {page_number}): {e}. Skipping this key.")
-                wait_time = random.uniform(MIN_WAIT_TIME_KEY, MAX_WAIT_TIME_KEY)
-                time.sleep(wait_time)
-                print(f"Waiting for {wait_time:.2f} seconds after key extraction (page {page_number})...")
-
-            extracted_key_count = len(all_data)
+            page_data = []
+            try:
+                page_data = extract_page_data(driver, page_number)
+            except WebDriverException as e:
+                print(f"Page-level extraction failed (page {page_number}): {e}. Falling back to per-key extraction.")
+                item_number = 1
+                for container in key_containers:
+                    try:
+                        key_data = extract_data(container, page_number, item_number)
+                        if key_data:
+                            page_data.append(key_data)
+                        item_number += 1
+                    except Exception as e:
+                        print(f"Error during data extraction (page {page_number}): {e}. Skipping this key.")
+
+            sink.number_copies(page_data)
+
+            # The keys page is ordered newest first, so a page of known keys means the rest is known too
+            page_is_known = args.incremental and sink.page_is_known(page_data)
+
+            # --- Persist the page (and checkpoint) before touching pagination ---
+            saved_rows = sink.write_page(page_data, page_number)
+            extracted_key_count = sink.row_count
+            print(f"Saved {len(saved_rows)} keys from page {page_number} ({extracted_key_count} total).")
+
+            if page_is_known:
+                print(f"Incremental sync: every key on page {page_number} is already in {OUTPUT_DB}, stopping.")
+                finished = True
+                break
 
             # --- Click "Next Page" Button ---
             try:
                 load_more_element = WebDriverWait(driver, 5).until(
                     EC.element_to_be_clickable((LOAD_MORE_ELEMENT_XPATH_TYPE, LOAD_MORE_ELEMENT_XPATH))
                 )
+                # The old rows still match KEY_CONTAINER_XPATH, so remember one to wait for it to go stale
+                old_containers = driver.find_elements(By.XPATH, KEY_CONTAINER_XPATH)
+                rate_limiter.acquire(f"opening page {page_number + 1}")
                 load_more_element.click()
+                keys_driver_pool().page_loaded(driver)  # counts towards recycling the browser
+                try:
+                    wait_for_new_page(driver, old_containers[0] if old_containers else None)
+                except TimeoutException:
+                    print(f"Page {page_number + 1} did not replace the rows of page {page_number}, stopping.")
+                    break
                 page_number += 1
-                # Wait for the next page to start loading (key containers)
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.XPATH, KEY_CONTAINER_XPATH))
-                )
-                wait_time = random.uniform(MIN_WAIT_TIME_PAGE, MAX_WAIT_TIME_PAGE)
-                time.sleep(wait_time)
-                print(f"Waiting for {wait_time:.2f} seconds after clicking 'Next Page' (page {page_number})...")
 
             except TimeoutException:
-                print("No more 'Next Page' button found. Assuming end of list.")
+                if on_last_page(driver):
+                    print("No more 'Next Page' button found. End of list reached.")
+                    finished = True
+                    reached_end = True
+                else:
+                    print("'Next Page' button did not become clickable, but the list does not look finished. "
+                          "Treating the run as incomplete (--resume continues from here).")
                 break
             except NoSuchElementException:
                 print(f"Could not find 'Next Page' button. Selector: {LOAD_MORE_ELEMENT_XPATH}")
@@ -238,37 +602,17 @@ def main():
 
             if extracted_key_count >= MAX_KEYS:
                 print(f"Maximum key limit ({MAX_KEYS}) reached.")
+                finished = True
                 break
 
         print("Pagination completed or maximum keys reached.")
-
-        # --- Create Database ---
-        create_database(OUTPUT_DB)
-
-        # --- Write to CSV ---
-        try:
-            with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['title', 'key', 'platform', 'page_number', 'item_number', 'status']  # Added 'status'
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames, quoting=csv.QUOTE_ALL, escapechar='\\')
-                writer.writeheader()
-                writer.writerows(all_data)
-            print(f"Data saved to {OUTPUT_CSV}")
-        except (IOError, OSError) as e:
-            print(f"Error writing to CSV file: {e}")
-
-        # --- Write to JSON ---
-        try:
-            save_to_json(all_data, OUTPUT_JSON)
-            print(f"Data saved to {OUTPUT_JSON}")
-        except (IOError, OSError) as e:
-            print(f"Error writing to JSON file: {e}")
-
-        # --- Write to SQLite ---
-        try:
-            save_to_sqlite(all_data, OUTPUT_DB)
-            print(f"Data saved to {OUTPUT_DB}")
-        except Exception as e:
-            print(f"Error saving to SQLite database: {e}")
+        if reached_end:
+            removed = sink.remove_unseen_placeholders()
+            if removed:
+                print(f"Removed {removed} UNREDEEMED rows that are no longer on the keys page.")
+        if finished:
+            sink.mark_completed()
+        print(f"Rate limiter: {rate_limiter.summary()}")
 
     except WebDriverException as e:
          print(f"WebDriverError: {e}. Please ensure ChromeDriver is correctly installed and compatible with your Chrome/Brave version.")
@@ -276,7 +620,14 @@ def main():
         print(f"An unexpected error occurred in main(): {e}")
 
     finally:
-        driver.quit()
+        if driver:
+            keys_driver_pool().release(driver)
+        if sink:
+            sink.close()
+            print(f"{sink.row_count} keys saved to {OUTPUT_DB}, {output_csv} and {output_ndjson} "
+                  f"({sink.changed_count} new or changed rows in {OUTPUT_DB})")
+            ndjson_to_json(output_ndjson, output_json)
+            print(f"Data saved to {output_json}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
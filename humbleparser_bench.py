@@ -0,0 +1,133 @@
+"""Offline replay and benchmark for the humbleparser key extractors.
+
+Replays saved keys-page HTML snapshots (see SNAPSHOT_DIR in the humbleparser scripts) without
+touching the live site, and reports rows per second and WebDriver calls per row for:
+
+* parser  - parse_keys_html() on the saved HTML, no browser at all
+* browser - snapshots served by a local file server and opened in headless Chrome, measuring
+            both the page-level extract_page_data() and the legacy per-container extract_data()
+
+Usage:
+    python humbleparser_bench.py SNAPSHOT_DIR [--mode parser|browser|both] [--repeat N]
+"""
+
+import os
+import glob
+import time
+import argparse
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import humbleparser3db
+import humbleparser_complete
+from humble_common import parse_keys_html
+
+SCRIPTS = {
+    'humbleparser_complete': humbleparser_complete,
+    'humbleparser3db': humbleparser3db,
+}
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_file_server(directory):
+    """Serves the snapshot directory on a free local port; returns (server, base_url)."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def count_webdriver_calls(driver):
+    """Wraps driver.execute (used by the driver and all its WebElements) with a call counter."""
+    counter = {'calls': 0}
+    original_execute = driver.execute
+
+    def counting_execute(*args, **kwargs):
+        counter['calls'] += 1
+        return original_execute(*args, **kwargs)
+
+    driver.execute = counting_execute
+    return counter
+
+
+def report(name, path, rows, seconds, calls):
+    rows_per_second = rows / seconds if seconds else float('inf')
+    calls_per_row = calls / rows if rows else 0.0
+    print(f"{name:<24} {path:<14} {rows:>7} rows {seconds:>9.3f} s {rows_per_second:>11.1f} rows/s "
+          f"{calls:>7} calls {calls_per_row:>7.2f} calls/row")
+
+
+def bench_parser(snapshots, repeat):
+    html_pages = [open(path, encoding='utf-8').read() for path in snapshots]
+    for name, module in SCRIPTS.items():
+        rows = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for page_number, html in enumerate(html_pages, start=1):
+                rows += len(module.build_page_data(parse_keys_html(html), page_number))
+        report(name, "parser", rows, time.perf_counter() - start, 0)
+
+
+def legacy_extract(module, driver, page_number):
+    """The pre-page-level path: find_elements + extract_data() for every container."""
+    rows = []
+    containers = driver.find_elements(module.By.XPATH, module.KEY_CONTAINER_XPATH)
+    for item_number, container in enumerate(containers, start=1):
+        data = module.extract_data(container, page_number, item_number)
+        if data:
+            rows.append(data)
+    return rows
+
+
+def bench_browser(snapshot_dir, snapshots, repeat):
+    from selenium import webdriver
+
+    server, base_url = start_file_server(snapshot_dir)
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    driver = webdriver.Chrome(options=options)
+    try:
+        counter = count_webdriver_calls(driver)
+        for name, module in SCRIPTS.items():
+            for path, extract in (("page-level", module.extract_page_data),
+                                  ("per-container", partial(legacy_extract, module))):
+                rows = calls = 0
+                seconds = 0.0
+                for _ in range(repeat):
+                    for page_number, snapshot in enumerate(snapshots, start=1):
+                        driver.get(f"{base_url}/{os.path.basename(snapshot)}")  # page loads are not measured
+                        counter['calls'] = 0
+                        start = time.perf_counter()
+                        rows += len(extract(driver, page_number))
+                        seconds += time.perf_counter() - start
+                        calls += counter['calls']
+                report(name, path, rows, seconds, calls)
+    finally:
+        driver.quit()
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replays saved keys-page snapshots and benchmarks the extractors.")
+    parser.add_argument('snapshot_dir', help="directory with saved keys-page .html files")
+    parser.add_argument('--mode', choices=['parser', 'browser', 'both'], default='parser')
+    parser.add_argument('--repeat', type=int, default=1, help="replay every snapshot this many times")
+    args = parser.parse_args()
+
+    snapshots = sorted(glob.glob(os.path.join(args.snapshot_dir, '*.html')))
+    if not snapshots:
+        print(f"No .html snapshots found in {args.snapshot_dir}")
+        return
+    print(f"Replaying {len(snapshots)} snapshots x{args.repeat}")
+    if args.mode in ('parser', 'both'):
+        bench_parser(snapshots, args.repeat)
+    if args.mode in ('browser', 'both'):
+        bench_browser(os.path.abspath(args.snapshot_dir), snapshots, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
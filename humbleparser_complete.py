@@ -1,24 +1,28 @@
 import os
-import time
 import csv
-import random
+import argparse
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from selenium.webdriver.chrome.service import Service
+import driver_pool
+from humble_common import (RateLimiter, extract_page_rows, element_platform_hint, clean_text, platform_name,
+                          save_snapshot)
 
 # --- Configuration ---
 CHROMEDRIVER_PATH = ""
 KEYS_PAGE_URL = "https://www.humblebundle.com/home/keys"
 OUTPUT_CSV = "humble_keys.csv"
+CSV_FIELDNAMES = ['title', 'key', 'platform', 'page_number', 'item_number', 'status']  # same for both backends
 HEADLESS = False
 MAX_KEYS = 2000
+SNAPSHOT_DIR = ""  # e.g. "keys_snapshots" to save every keys page for humbleparser_bench.py
 
-# --- Latency/Wait Time Configuration (Randomization) ---
-MIN_WAIT_TIME = 0.1
-MAX_WAIT_TIME = 0.5
+# --- Rate Limiting (only page loads and pagination clicks are throttled) ---
+PAGE_RATE_LIMIT = 0.3  # network actions per second
+PAGE_RATE_BURST = 2    # actions allowed back-to-back before throttling kicks in
 
 # --- XPath Selectors ---
 KEY_CONTAINER_XPATH = "//td[contains(@class, 'js-redeemer-cell') and contains(@class, 'redeemer-cell')]"
@@ -27,20 +31,26 @@ LOAD_MORE_ELEMENT_XPATH = ".js-pagination-holder.pagination-holder > div.paginat
 LOAD_MORE_ELEMENT_XPATH_TYPE = By.CSS_SELECTOR
 
 # --- Cookie Handling (skopiuj ciasteczko _simpleauth_sess i ustaw je komendą $envHUMBLE_SESSION_COOKIE = )---
-cookie_value = os.environ.get('HUMBLE_SESSION_COOKIE')
-if not cookie_value:
-    print("ERROR: HUMBLE_SESSION_COOKIE environment variable not set.")
-    exit(1)
-
-# --- WebDriver Setup ---
-options = webdriver.ChromeOptions()
-if HEADLESS:
-    options.add_argument("--headless")
-if CHROMEDRIVER_PATH:
-    service = Service(executable_path=CHROMEDRIVER_PATH)
-    driver = webdriver.Chrome(service=service, options=options)
-else:
-    driver = webdriver.Chrome(options=options)
+cookie_value = os.environ.get('HUMBLE_SESSION_COOKIE')  # checked in main()
+
+# --- WebDriver Setup (only started for the browser backend) ---
+driver = None
+
+def chrome_options():
+    options = webdriver.ChromeOptions()
+    if HEADLESS:
+        options.add_argument("--headless")
+    return options
+
+def chrome_service():
+    return Service(executable_path=CHROMEDRIVER_PATH) if CHROMEDRIVER_PATH else None
+
+def keys_driver_pool():
+    """Shared pool for the keys scripts: the profile (and its login cookie) persists between runs."""
+    return driver_pool.get_pool("keys-headless" if HEADLESS else "keys", chrome_options, chrome_service)
+
+def create_driver():
+    return keys_driver_pool().acquire()
 
 def extract_data(container, page_number, item_number): # Added item_number
     """Extracts data from a single key container."""
@@ -56,53 +66,89 @@ def extract_data(container, page_number, item_number): # Added item_number
         data['title'] = "N/A"
         print(f"Warning (extract_data): Could not find title element")
 
-    # --- Extract Key ---
+    # --- Extract Key and Check Redemption Status ---
     try:
-        key_element = WebDriverWait(container, 10).until(
-            EC.presence_of_element_located((By.XPATH, ".//div[contains(@class, 'keyfield-value')]"))
+        key_field = WebDriverWait(container, 10).until(
+            EC.presence_of_element_located((By.XPATH, ".//div[contains(@class, 'js-keyfield keyfield')]"))
         )
-        data['key'] = key_element.text.strip().replace('"', '')
+        if "redeemed" in (key_field.get_attribute("class") or ""):
+            data['status'] = "Redeemed"
+            key_element = key_field.find_element(By.XPATH, ".//div[contains(@class, 'keyfield-value')]")
+            data['key'] = key_element.text.strip().replace('"', '')
+        else:
+            data['status'] = "Unredeemed"
+            data['key'] = "UNREDEEMED"  # Placeholder for unredeemed keys (same as the API backend)
     except (TimeoutException, NoSuchElementException):
         data['key'] = "N/A"
+        data['status'] = "Unknown"
         print(f"Warning (extract_data): Could not find key element")
 
     # --- Platform Inference ---
-    platform_keywords = {
-        "steam": "Steam",
-        "gog": "GOG",
-        "origin": "Origin",
-        "uplay": "Uplay",
-        "epic": "Epic Games Store",
-        "microsoft": "Microsoft Store",
-    }
-    container_html = container.get_attribute('outerHTML')
-    found_platform = False
-    for keyword, platform_name in platform_keywords.items():
-        if keyword in container_html.lower():
-            data['platform'] = platform_name
-            found_platform = True
-            break
-    if not found_platform:
-        data['platform'] = "Unknown"
+    data['platform'] = platform_name(element_platform_hint(container))
 
     data['page_number'] = page_number
     data['item_number'] = item_number  # Add item number
 
     return data
 
-def main():
+def extract_page_data(driver, page_number):
+    """Extracts every key container on the current page with a single WebDriver round trip."""
+    return build_page_data(extract_page_rows(driver, KEY_CONTAINER_XPATH, TITLE_XPATH), page_number)
+
+def build_page_data(raw_rows, page_number):
+    """Turns raw page rows (from the page script or parse_keys_html) into output rows.
+
+    Rows have the same fields as humble_api.order_to_rows (minus gamekey), so the CSV does not
+    depend on --backend: unredeemed keys get the "UNREDEEMED" placeholder and a status.
+    """
+    page_data = []
+    for item_number, row in enumerate(raw_rows, start=1):
+        if row['title'] is None:
+            print(f"Warning (extract_page_data): Could not find title element (page {page_number}, item {item_number})")
+        if not row['has_keyfield']:
+            print(f"Warning (extract_page_data): Could not find key element (page {page_number}, item {item_number})")
+            key, status = "N/A", "Unknown"
+        elif row['redeemed']:
+            key, status = clean_text(row['key']) if row['key'] is not None else "N/A", "Redeemed"
+        else:
+            key, status = "UNREDEEMED", "Unredeemed"  # Placeholder for unredeemed keys
+        page_data.append({
+            'title': clean_text(row['title']) if row['title'] is not None else "N/A",
+            'key': key,
+            'platform': platform_name(row['platform_hint']),
+            'page_number': page_number,
+            'item_number': item_number,
+            'status': status,
+        })
+    return page_data
+
+def wait_for_new_page(driver, old_container, timeout=10):
+    """Waits until the rows of the previous page are replaced and the new ones are present."""
+    if old_container is not None:
+        WebDriverWait(driver, timeout).until(EC.staleness_of(old_container))
+    WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.XPATH, KEY_CONTAINER_XPATH))
+    )
+
+def scrape_with_browser():
+    """Walks the rendered keys table page by page; returns (rows, succeeded).
+
+    A failed pagination click ends the walk but keeps the run successful (as before);
+    a failed initial load or a browser error fails it, so main() keeps the old CSV.
+    """
+    global driver
+    all_data = []
+    succeeded = False
     try:
+        driver = create_driver()
         # --- Set the Cookie and Initial Load ---
+        rate_limiter = RateLimiter(PAGE_RATE_LIMIT, PAGE_RATE_BURST)
+        rate_limiter.acquire("loading the home page")
         driver.get("https://www.humblebundle.com/")
         driver.add_cookie({'name': '_simpleauth_sess', 'value': cookie_value, 'domain': '.humblebundle.com'})
-        wait_time = random.uniform(MIN_WAIT_TIME, MAX_WAIT_TIME)
-        time.sleep(wait_time)
-        print(f"Waiting for {wait_time:.2f} seconds after setting cookie...")
 
+        rate_limiter.acquire("navigating to keys page")
         driver.get(KEYS_PAGE_URL)
-        wait_time = random.uniform(MIN_WAIT_TIME, MAX_WAIT_TIME)
-        time.sleep(wait_time)
-        print(f"Waiting for {wait_time:.2f} seconds after navigating to keys page...")
 
         # Wait for initial page load
         try:
@@ -111,9 +157,8 @@ def main():
             )
         except TimeoutException:
             print(f"ERROR: TimeoutException - Initial page load failed.")
-            return
+            return all_data, False
 
-        all_data = []
         page_number = 1
         extracted_key_count = 0
 
@@ -122,20 +167,23 @@ def main():
             key_containers = driver.find_elements(By.XPATH, KEY_CONTAINER_XPATH)
             num_containers = len(key_containers)
             print(f"Found {num_containers} key containers on page {page_number}.")
+            if SNAPSHOT_DIR:
+                save_snapshot(driver, SNAPSHOT_DIR, page_number)
 
             # --- Extract Data from Current Page ---
-            item_number = 1  # Initialize item number for each page
-            for container in key_containers:
-                try:
-                    key_data = extract_data(container, page_number, item_number)  # Pass page_number and item_number
-                    if key_data:
-                        all_data.append(key_data)
-                    item_number += 1  # Increment item number *after* processing each key
-                except Exception as e:
-                    print(f"Error during data extraction (page {page_number}): {e}. Skipping this key.")
-                wait_time = random.uniform(MIN_WAIT_TIME, MAX_WAIT_TIME)
-                time.sleep(wait_time)
-                print(f"Waiting for {wait_time:.2f} seconds after key extraction (page {page_number})...")
+            try:
+                all_data.extend(extract_page_data(driver, page_number))
+            except WebDriverException as e:
+                print(f"Page-level extraction failed (page {page_number}): {e}. Falling back to per-key extraction.")
+                item_number = 1  # Initialize item number for each page
+                for container in key_containers:
+                    try:
+                        key_data = extract_data(container, page_number, item_number)  # Pass page_number and item_number
+                        if key_data:
+                            all_data.append(key_data)
+                        item_number += 1  # Increment item number *after* processing each key
+                    except Exception as e:
+                        print(f"Error during data extraction (page {page_number}): {e}. Skipping this key.")
 
             extracted_key_count = len(all_data)
 
@@ -144,15 +192,17 @@ def main():
                 load_more_element = WebDriverWait(driver, 5).until(
                     EC.element_to_be_clickable((LOAD_MORE_ELEMENT_XPATH_TYPE, LOAD_MORE_ELEMENT_XPATH))
                 )
+                # The old rows still match KEY_CONTAINER_XPATH, so remember one to wait for it to go stale
+                old_containers = driver.find_elements(By.XPATH, KEY_CONTAINER_XPATH)
+                rate_limiter.acquire(f"opening page {page_number + 1}")
                 load_more_element.click()
-                page_number += 1  # Increment page number *after* clicking nieprzetestowane
-                # Wait for the next page to start loading (key containers) nieprzetestowane
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.XPATH, KEY_CONTAINER_XPATH))
-                )
-                wait_time = random.uniform(MIN_WAIT_TIME, MAX_WAIT_TIME)
-                time.sleep(wait_time)
-                print(f"Waiting for {wait_time:.2f} seconds after clicking and waiting for new containers...")
+                keys_driver_pool().page_loaded(driver)  # counts towards recycling the browser
+                try:
+                    wait_for_new_page(driver, old_containers[0] if old_containers else None)
+                except TimeoutException:
+                    print(f"Page {page_number + 1} did not replace the rows of page {page_number}, stopping.")
+                    break
+                page_number += 1  # Increment page number *after* the new page is in place
 
             except TimeoutException:
                 print("No more 'Next Page' button found. Assuming end of list.")
@@ -172,23 +222,63 @@ def main():
                 break
 
         print("Pagination completed or maximum keys reached.")
-
-        # --- Write to CSV ---
-        with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['title', 'key', 'platform', 'page_number', 'item_number']  # Added 'item_number'
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, quoting=csv.QUOTE_ALL, escapechar='\\')
-            writer.writeheader()
-            writer.writerows(all_data)
-
-        print(f"Data saved to {OUTPUT_CSV}")
+        print(f"Rate limiter: {rate_limiter.summary()}")
+        succeeded = True
 
     except WebDriverException as e:
          print(f"WebDriverError: {e}. Please ensure ChromeDriver is correctly installed and compatible with your Chrome/Brave version.")
     except Exception as e:
-        print(f"An unexpected error occurred in main(): {e}")
+        print(f"An unexpected error occurred in scrape_with_browser(): {e}")
+
+    finally:
+        if driver:
+            keys_driver_pool().release(driver)
 
+    return all_data, succeeded
+
+def scrape_with_api():
+    """Fetches the order JSON behind the keys page over HTTP, without starting a browser; returns (rows, succeeded)."""
+    from humble_api import HumbleApiClient  # requests is only needed for this backend
+
+    client = HumbleApiClient(cookie_value)
+    try:
+        return client.fetch_key_rows(max_keys=MAX_KEYS), True
+    except Exception as e:
+        print(f"An unexpected error occurred in scrape_with_api(): {e}")
+        return [], False
     finally:
-        driver.quit()
+        client.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Exports Humble Bundle keys to CSV.")
+    parser.add_argument('--backend', choices=['browser', 'api'], default='browser',
+                        help="'browser' walks the rendered keys page in Chrome, 'api' fetches the order JSON directly")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if not cookie_value:
+        print("ERROR: HUMBLE_SESSION_COOKIE environment variable not set.")
+        exit(1)
+    if args.backend == 'api':
+        all_data, succeeded = scrape_with_api()
+    else:
+        all_data, succeeded = scrape_with_browser()
+    if not succeeded:
+        print(f"ERROR: Scrape failed, {OUTPUT_CSV} was left unchanged.")
+        exit(1)
+
+    # --- Write to CSV ---
+    try:
+        with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as csvfile:
+            # API rows also carry the order's gamekey; it is not part of the shared CSV layout
+            writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES, quoting=csv.QUOTE_ALL, escapechar='\\',
+                                    extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(all_data)
+        print(f"Data saved to {OUTPUT_CSV} ({len(all_data)} keys)")
+    except (IOError, OSError) as e:
+        print(f"Error writing to CSV file: {e}")
 
 if __name__ == "__main__":
     main()
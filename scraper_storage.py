@@ -0,0 +1,62 @@
+"""Shared SQLite storage layer for the scrapers (bundle scrapers and humbleparser3db).
+
+Each database file gets one long-lived connection per process (per thread, since sqlite3
+connections are thread-bound), opened once and tuned for a writer running next to readers:
+
+* journal_mode=WAL     - reports and summaries can read while a scraper writes
+* synchronous=NORMAL   - fsync at checkpoints instead of every commit (safe with WAL)
+* cache_size           - page cache sized for the history tables instead of the 2 MB default
+* busy_timeout         - waits for a competing writer instead of failing with "database is locked"
+* cached_statements    - prepared statements are reused across calls on the same connection
+
+Callers commit or roll back as before, but must not close the connection; it is closed
+(and the WAL checkpointed) at interpreter exit, or explicitly with close_all().
+"""
+
+import os
+import atexit
+import sqlite3
+import threading
+
+# --- Configuration ---
+CACHE_SIZE_KIB = 64 * 1024  # page cache per connection (64 MiB)
+BUSY_TIMEOUT_MS = 30000     # how long a write waits for another process holding the lock
+CACHED_STATEMENTS = 256     # prepared statements kept per connection
+
+_connections = {}
+_lock = threading.Lock()
+
+
+def connect(db_file):
+    """Returns the shared, tuned connection for db_file, opening it on first use."""
+    path = os.path.abspath(db_file)
+    key = (path, threading.get_ident())
+    with _lock:
+        conn = _connections.get(key)
+        if conn is None:
+            db_dir = os.path.dirname(path)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir)
+            conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=CACHED_STATEMENTS)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            _connections[key] = conn
+        return conn
+
+
+def close_all():
+    """Closes every shared connection; uncommitted work is rolled back and the WAL is checkpointed."""
+    with _lock:
+        connections = list(_connections.values())
+        _connections.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Error closing SQLite connection: {e}")
+
+
+atexit.register(close_all)